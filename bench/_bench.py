@@ -0,0 +1,61 @@
+# _bench.py Shared helpers for the host-side benchmarks in this directory.
+
+# Run a benchmark from the repository root, e.g.
+#   python bench/bench_schema.py
+# The device sources in src/ are put on the import path.
+
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+
+def timeit(fn, n=20000, repeat=5):
+    # best of `repeat` runs, in microseconds per call
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(n):
+            fn()
+        us = (time.perf_counter() - t) * 1e6 / n
+        if best is None or us < best:
+            best = us
+    return best
+
+
+def peak_alloc(fn):
+    # peak bytes of Python heap allocated during one call, after a warm up call
+    tracemalloc.start()
+    fn()
+    tracemalloc.reset_peak()
+    current = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - current
+
+
+def report(name, us, base=None):
+    if base:
+        print("{:<40s} {:8.2f} us  ({:.2f}x)".format(name, us, base / us))
+    else:
+        print("{:<40s} {:8.2f} us".format(name, us))
+
+
+# The payload dict exactly as main.gather_loop builds it.
+def gather_loop_payload():
+    return {
+        'temp': 21.37,
+        'humidity': 48.2,
+        'battery': 3.91,
+        'avg_wind': 0.45,
+        'gust_wind': 3.3333,
+        'pressure': 100653.26,
+        'wind_dir': 271,
+        'rainbuckets': 2,
+        'rainbuckets_total': 117,
+        'timemark': 749283012,
+    }
@@ -0,0 +1,99 @@
+# bench_acquire.py Awake time of the sensor reads in one gather_loop cycle:
+# one sensor after the other against the ACQUISITION scheduler, with the
+# radio wake up from sim/ running alongside, and with a blocking collect that
+# has to overlap the conversions.
+
+import os
+import sys
+import time
+import _bench
+
+sys.path.insert(0, os.path.join(_bench.ROOT, 'sim'))
+import mptime
+mptime.install()
+import uasyncio as asyncio
+from acquire import ACQUISITION
+from fake_hc12 import FakeHC12
+from hc12 import HC12
+
+
+class FakeSensor:
+    # conversion time in ms, the value is only ready once it has passed
+    def __init__(self, conversion_ms, value):
+        self.conversion_ms = conversion_ms
+        self.value = value
+        self.ready_at = None
+
+    def start(self):
+        self.ready_at = time.monotonic() + self.conversion_ms / 1000
+        return self.conversion_ms
+
+    def read(self):
+        assert time.monotonic() >= self.ready_at, "read before conversion finished"
+        return self.value
+
+    def blocking_read(self):
+        self.start()
+        time.sleep(self.conversion_ms / 1000)
+        return self.read()
+
+
+# SHT41 high precision as the driver waits today, BME280 at 8x oversampling
+# (datasheet 9.1 maximum), ADC and AS5600 read straight away
+def sensors():
+    return {
+        'sht41': FakeSensor(200, (21.4, 48.0)),
+        'bme280': FakeSensor(58, (2143, 101325, 48000)),
+    }
+
+
+def sequential(s):
+    return {name: sensor.blocking_read() for name, sensor in s.items()}
+
+
+async def scheduled(acq, radio=None):
+    wake = asyncio.create_task(radio.wake()) if radio else None
+    if wake:
+        await asyncio.sleep_ms(0)
+    result = await acq.run()
+    if wake:
+        await wake
+    return result
+
+
+def main():
+    s = sensors()
+    acq = ACQUISITION()
+    for name, sensor in s.items():
+        acq.add(name, sensor.start, sensor.read)
+    acq.add('battery', None, lambda: 3.91)
+
+    t = time.monotonic()
+    expected = sequential(s)
+    print("sequential reads          {:6.1f} ms".format((time.monotonic() - t) * 1000))
+
+    t = time.monotonic()
+    result = asyncio.run(scheduled(acq))
+    print("ACQUISITION.run           {:6.1f} ms".format((time.monotonic() - t) * 1000))
+    assert result['sht41'] == expected['sht41'] and result['bme280'] == expected['bme280']
+
+    fake = FakeHC12()
+    t = time.monotonic()
+    asyncio.run(scheduled(acq, HC12(fake, fake.set_pin)))
+    print("ACQUISITION + radio wake  {:6.1f} ms".format((time.monotonic() - t) * 1000))
+
+    # BME280 at 8x with a 64ms wind vane burst, as in gather_loop: the burst
+    # runs while the BME280 converts
+    bme = FakeSensor(58, (2143, 101325, 48000))
+    acq = ACQUISITION()
+    acq.add('bme280', bme.start, bme.read)
+    acq.add('wind_dir', None, lambda: time.sleep(0.064))
+    t = time.monotonic()
+    asyncio.run(scheduled(acq))
+    ms = (time.monotonic() - t) * 1000
+    print("58 ms BME280 + 64 ms burst {:5.1f} ms".format(ms))
+    assert ms < 80, ms
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# bench_as5600.py Wind direction error per reading on a vane swinging 30
+# degrees around its heading, on the fake AS5600 from sim/: the single angle
+# read gather_loop used to take against a 16 sample burst reduced with
+# circular_mean.  Also checks the wrap around north and CIRCULAR weighting.
+
+import os
+import sys
+import time
+from array import array
+import _bench
+
+sys.path.insert(0, os.path.join(_bench.ROOT, 'sim'))
+import mptime
+mptime.install()
+import filters
+from as5600 import AS5600, circular_mean
+from fake_as5600 import FakeAS5600I2C
+
+CYCLES = 200
+
+
+def error(a, b):
+    return abs((a - b + 180) % 360 - 180)
+
+
+def main():
+    # samples either side of north average to north, not south
+    d, r = circular_mean(array('H', [4090, 4095, 0, 6]))
+    assert error(d, 0) < 0.5 and r > 0.99, (d, r)
+    avg = filters.CIRCULAR(samples=3)
+    assert avg.compute_avg() is None
+    avg.submit(350, 1)
+    avg.submit(20, 0)
+    assert error(avg.compute_avg(), 350) < 1e-3
+    avg.submit(10, 1)
+    assert error(avg.compute_avg(), 0) < 1e-3
+
+    raw = array('H', bytes(2 * 16))
+    for heading in (0.0, 135.0, 270.0):
+        i2c = FakeAS5600I2C(heading=heading)
+        vane = AS5600(i2c=i2c)
+        single = burst = 0.0
+        for _ in range(CYCLES):
+            time.sleep(0.1)  # the sensor polls again while we sleep
+            single += error(vane.getAngle(), heading)
+            before = i2c.transactions
+            t = time.monotonic()
+            d, r = circular_mean(vane.read_burst(raw))
+            ms = (time.monotonic() - t) * 1000
+            burst += error(d, heading)
+        print("heading {:5.1f}: mean error single read {:5.1f} deg, burst {:4.1f} deg "
+              "(r {:.2f}, {:.0f} ms, {} I2C transactions)".format(
+                  heading, single / CYCLES, burst / CYCLES, r, ms, i2c.transactions - before))
+    _bench.report("circular_mean 16 samples", _bench.timeit(lambda: circular_mean(raw), 5000))
+
+
+if __name__ == '__main__':
+    main()
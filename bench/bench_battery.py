@@ -0,0 +1,84 @@
+# bench_battery.py Battery estimate on a simulated discharge trace with ADC
+# noise, failed reads and spikes: the old 5 sample mean fed 0.0 on failures
+# against the filter chain main.py uses, and the sleep each one schedules.
+
+import math
+import random
+import _bench
+import filters
+import rolling_average
+
+
+# main.compute_sleep_seconds
+def compute_sleep_seconds(avg):
+    default_seconds = 20
+    max_delay = 200
+    cutoff_voltage = 3.7
+    min_voltage = 3.0
+    delay_factor = (max_delay / (cutoff_voltage - min_voltage))
+    if avg is None:
+        sleep_seconds = default_seconds
+    elif avg >= cutoff_voltage:
+        sleep_seconds = default_seconds
+    elif avg >= min_voltage:
+        sleep_seconds = ((cutoff_voltage - avg) * delay_factor) + default_seconds
+    else:
+        sleep_seconds = max_delay + default_seconds
+    return int(sleep_seconds)
+
+
+def trace(n, seed=7):
+    # (true voltage, reading), None where the ADC read failed
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        true = 4.1 - 0.6 * i / n + 0.05 * math.sin(i / 40)  # discharge with a solar ripple
+        r = rnd.random()
+        if r < 0.05:
+            reading = None
+        elif r < 0.08:
+            reading = true + rnd.choice((-1, 1)) * rnd.uniform(0.4, 1.0)  # spike
+        else:
+            reading = true + rnd.gauss(0, 0.02)
+        out.append((true, reading))
+    return out
+
+
+def run(estimator, data, old_zero):
+    err = 0.0
+    sleeps = 0
+    for true, reading in data:
+        if old_zero:
+            estimator.submit(0.0 if reading is None else reading)
+        elif reading is not None:
+            estimator.submit(reading)
+        est = estimator.compute_avg()
+        err += (est - true) ** 2
+        sleeps += compute_sleep_seconds(est) - compute_sleep_seconds(true)
+    return math.sqrt(err / len(data)), sleeps / len(data)
+
+
+def main():
+    data = trace(2000)
+    old = rolling_average.ROLLINGAVERAGE(samples=5)
+    new = filters.OUTLIER(
+        filters.CHAIN(filters.MEDIAN(samples=5), filters.EWMA(alpha=0.3)),
+        low=2.5, high=4.5, max_step=0.3)
+    for name, est, zero in (("mean of 5, 0.0 on failure", old, True),
+                            ("outlier + median + EWMA", new, False)):
+        rms, extra = run(est, data, zero)
+        print("{:<28s} rms error {:.3f} V, sleep {:+.1f} s per cycle vs true voltage".format(name, rms, extra))
+    print("readings dropped as outliers: {}".format(new.rejected))
+
+    # a real step (charger connected) is accepted after max_rejects readings
+    step = filters.OUTLIER(filters.EWMA(alpha=1.0), max_step=0.3)
+    for v in (3.5, 3.5, 4.1, 4.1, 4.1, 4.1):
+        step.submit(v)
+    assert step.compute_avg() == 4.1
+
+    _bench.report("filter chain submit + estimate", _bench.timeit(
+        lambda: (new.submit(3.9), new.compute_avg())))
+
+
+if __name__ == '__main__':
+    main()
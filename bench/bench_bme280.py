@@ -0,0 +1,87 @@
+# bench_bme280.py BME280 compensation: the golden vectors of golden_bme280.py,
+# the datasheet worked example read through the fake sensor, bit for bit
+# agreement with the per call formulas the driver used before the calibration
+# terms were folded, and the time per call.  On CPython both take the same
+# time within noise: the folding saves a few float operations per call, which
+# would only show on the device, and this bench cannot measure that.
+
+import os
+import random
+import sys
+from array import array
+import _bench
+
+sys.path.insert(0, os.path.join(_bench.ROOT, 'sim'))
+import mptime
+mptime.install()
+import bme280_float
+from fake_bme280 import FakeBME280I2C
+import golden_bme280
+
+
+# read_compensated_data before the calibration terms were folded, which is
+# datasheet 8.1 with the driver's clamping
+def reference(d, raw_temp, raw_press, raw_hum):
+    var1 = (raw_temp/16384.0 - d.dig_T1/1024.0) * d.dig_T2
+    var2 = raw_temp/131072.0 - d.dig_T1/8192.0
+    var2 = var2 * var2 * d.dig_T3
+    t_fine = int(var1 + var2)
+    temp = (var1 + var2) / 5120.0
+    temp = max(-40, min(85, temp))
+
+    var1 = (t_fine/2.0) - 64000.0
+    var2 = var1 * var1 * d.dig_P6 / 32768.0 + var1 * d.dig_P5 * 2.0
+    var2 = (var2 / 4.0) + (d.dig_P4 * 65536.0)
+    var1 = (d.dig_P3 * var1 * var1 / 524288.0 + d.dig_P2 * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * d.dig_P1
+    if (var1 == 0.0):
+        pressure = 30000
+    else:
+        p = ((1048576.0 - raw_press) - (var2 / 4096.0)) * 6250.0 / var1
+        var1 = d.dig_P9 * p * p / 2147483648.0
+        var2 = p * d.dig_P8 / 32768.0
+        pressure = p + (var1 + var2 + d.dig_P7) / 16.0
+        pressure = max(30000, min(110000, pressure))
+
+    h = (t_fine - 76800.0)
+    h = ((raw_hum - (d.dig_H4 * 64.0 + d.dig_H5 / 16384.0 * h)) *
+         (d.dig_H2 / 65536.0 * (1.0 + d.dig_H6 / 67108864.0 * h *
+                                (1.0 + d.dig_H3 / 67108864.0 * h))))
+    humidity = h * (1.0 - d.dig_H1 * h / 524288.0)
+    if (humidity < 0):
+        humidity = 0
+    if (humidity > 100):
+        humidity = 100.0
+    return temp, pressure, humidity, t_fine
+
+
+def main():
+    golden_bme280.main()
+
+    i2c = FakeBME280I2C()
+    bme = bme280_float.BME280(i2c=i2c)
+
+    # BMP280 datasheet 3.12: 25.08 degC, 100653.27 Pa
+    t, p, h = bme.read_compensated_data(array("d", [0, 0, 0]))
+    print("datasheet example: {:.4f} C {:.2f} Pa {:.3f} %".format(t, p, h))
+    assert abs(t - 25.08) < 0.005 and abs(p - 100653.27) < 0.02, (t, p)
+    assert 0 <= h <= 100
+
+    rnd = random.Random(4)
+    out = array("d", [0, 0, 0])
+    for _ in range(20000):
+        raw = array("i", (rnd.randrange(300000, 700000), rnd.randrange(200000, 700000),
+                          rnd.randrange(0, 65536)))
+        bme.compensate(raw, out)
+        ref = reference(bme, *raw)
+        assert tuple(out) == ref[:3] and bme.t_fine == ref[3], (raw, tuple(out), ref)
+    print("20000 random raw readings match the reference bit for bit")
+
+    raw = array("i", (519888, 415148, 30000))
+    base = _bench.timeit(lambda: reference(bme, *raw))
+    _bench.report("per call formulas", base)
+    _bench.report("folded calibration", _bench.timeit(lambda: bme.compensate(raw, out)), base)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# bench_bme280_batch.py host/bme280_batch.py against the scalar
+# BME280.compensate: bit for bit agreement in float64, and throughput over an
+# archive sized batch of raw samples.
+
+import os
+import sys
+import time
+from array import array
+import numpy as np
+import _bench
+
+sys.path.insert(0, os.path.join(_bench.ROOT, 'sim'))
+sys.path.insert(0, os.path.join(_bench.ROOT, 'host'))
+import mptime
+mptime.install()
+import bme280_float
+import bme280_batch
+from fake_bme280 import FakeBME280I2C
+
+
+def main():
+    i2c = FakeBME280I2C()
+    bme = bme280_float.BME280(i2c=i2c)
+    cal = bme280_batch.parse_calibration(i2c.regs[0x88:0x88 + 26], i2c.regs[0xE1:0xE1 + 7])
+
+    rng = np.random.default_rng(5)
+    n = 20000
+    raw = np.stack([rng.integers(300000, 700000, n), rng.integers(200000, 700000, n),
+                    rng.integers(0, 65536, n)], axis=1)
+    # include the datasheet example and a zero raw reading
+    raw[0] = (519888, 415148, 30000)
+    raw[1] = (0, 0, 0)
+
+    temp, press, hum, t_fine = bme280_batch.compensate(cal, raw)
+    out = array("d", [0, 0, 0])
+    for i in range(n):
+        bme.compensate(array("i", raw[i].tolist()), out)
+        assert (out[0], out[1], out[2], bme.t_fine) == (temp[i], press[i], hum[i], t_fine[i]), i
+    print("{} samples match BME280.compensate bit for bit".format(n))
+
+    t = time.perf_counter()
+    for i in range(n):
+        bme.compensate(array("i", raw[i].tolist()), out)
+    scalar = (time.perf_counter() - t) / n * 1e9
+    big = np.tile(raw, (50, 1))
+    t = time.perf_counter()
+    bme280_batch.compensate(cal, big)
+    batch = (time.perf_counter() - t) / len(big) * 1e9
+    print("scalar  {:8.1f} ns per sample".format(scalar))
+    print("batch   {:8.1f} ns per sample ({:.0f}x), {} samples".format(batch, scalar / batch, len(big)))
+    t = time.perf_counter()
+    bme280_batch.compensate(cal, big, np.float32)
+    print("float32 {:8.1f} ns per sample".format((time.perf_counter() - t) / len(big) * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# bench_crc.py CRC-8/0x31 throughput: the bit by bit loop SHT4X._crc used
+# against the table in crc.py, and heap use of the SHT4X CRC check and of a
+# whole read_measurement on the fake sensor from sim/, broken down by source.
+# The driver reads into its own buffer and stores into a caller's array, what
+# is left are the simulated bus, CPython's range iterators and the two floats,
+# which MicroPython boxes on the heap as well (16 bytes each on the ESP32).
+
+import os
+import sys
+import time
+from array import array
+import _bench
+
+sys.path.insert(0, os.path.join(_bench.ROOT, 'sim'))
+import mptime
+mptime.install()
+import sht4x
+from crc import crc8, check_crc8
+from fake_sht4x import FakeSHT4xI2C
+
+
+# SHT4X._crc before the table
+def bitwise_crc(buffer):
+    crc = 0xFF
+    for byte in buffer:
+        crc ^= byte
+        for _ in range(8):
+            if crc & 0x80:
+                crc = (crc << 1) ^ 0x31
+            else:
+                crc = crc << 1
+    return crc & 0xFF
+
+
+class ReplayI2C:
+    # answers every read with one fixed reading, allocating nothing
+    def __init__(self, reading):
+        self.reading = reading
+
+    def writeto(self, addr, buf, stop=True):
+        pass
+
+    def readfrom_into(self, addr, buf):
+        buf[:] = self.reading
+
+
+def main():
+    # datasheet example: 0xBEEF -> 0x92
+    assert crc8(b'\xbe\xef') == bitwise_crc(b'\xbe\xef') == 0x92
+    data = bytes(range(256)) * 4
+    for n in (0, 1, 2, 3, 100):
+        assert crc8(data, n, 7) == bitwise_crc(data[n:n + 7])
+    try:
+        crc8(data, 1020, 8)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("length past the end accepted")
+
+    base = _bench.timeit(lambda: bitwise_crc(data), 200) / len(data) * 1000
+    print("bit loop    {:7.1f} ns per byte".format(base))
+    table = _bench.timeit(lambda: crc8(data), 200) / len(data) * 1000
+    print("table       {:7.1f} ns per byte ({:.1f}x)".format(table, base / table))
+
+    reading = bytearray(b'\xbe\xef\x92\xbe\xef\x92')
+    print("old check of one reading: {} bytes peak heap".format(_bench.peak_alloc(
+        lambda: bitwise_crc(memoryview(reading[0:2])) == reading[2]
+        and bitwise_crc(memoryview(reading[3:5])) == reading[5])))
+    # CPython allocates a range iterator per loop, MicroPython compiles
+    # for .. in range() to a plain counter, so on the device this is 0
+    print("check_crc8 of one reading: {} bytes peak heap (range iterators)".format(_bench.peak_alloc(
+        lambda: check_crc8(reading, 0, 2) and check_crc8(reading, 3, 2))))
+
+    # where the heap of one read_measurement goes on CPython, piece by piece
+    i2c = FakeSHT4xI2C()
+    sht = sht4x.SHT4X(i2c)
+    result = array('f', [0, 0])
+
+    def start():
+        sht.start_measurement()
+        time.sleep(0.01)
+
+    def read():
+        start()
+        return sht.read_measurement(result)
+
+    assert _bench.peak_alloc(start) == 0
+    total = _bench.peak_alloc(read)
+    assert result[0] == array('f', [-45 + 175 * 26000 / 65535])[0]
+    data = sht._data
+    replay = sht4x.SHT4X(ReplayI2C(bytes(data)))
+    driver = _bench.peak_alloc(lambda: replay.read_measurement(result))
+    crc = _bench.peak_alloc(lambda: check_crc8(data, 0, 2) and check_crc8(data, 3, 2))
+    floats = _bench.peak_alloc(lambda: sht4x._T_SCALE * ((data[0] << 8) | data[1]) - 45.0)
+    print("read_measurement(result) on the fake sensor: {} bytes peak heap, "
+          "the simulated bus builds its reply from bytes objects".format(total))
+    print("read_measurement(result) on a replayed reading: {} bytes peak heap, "
+          "the largest of".format(driver))
+    print("  check_crc8: {} bytes (range iterators, 0 on MicroPython)".format(crc))
+    print("  a conversion: {} bytes (the float values, boxed on MicroPython too)".format(floats))
+    # CPython takes the returned tuple and floats from its free lists, so
+    # without a result array the peak is the same here.  On the ESP32 the
+    # tuple is one more 16 byte heap block per reading.
+    assert driver == _bench.peak_alloc(lambda: replay.read_measurement())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# bench_dump.py Per-field cost of umsgpack.dumps and umsgpack.dumps_into,
+# against umsgpack.dumps of the baseline tree with its isinstance chain.
+
+# Each field is packed inside a one element list, so the figures include one
+# array header and the per-value dispatch in dump(). The baseline package is
+# read from git history (BASELINE) into a temporary directory and imported as
+# umsgpack_baseline. It ignores use_mpext and has no dumps_into, so every row
+# is compared with the baseline dumps, which always runs the umsgpack_ext
+# pass. The timings of all variants of a row are taken in turn.
+
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import _bench
+import umsgpack
+
+BASELINE = '34b9d12'
+
+FIELDS = (
+    ('float', 21.37),
+    ('int', 271),
+    ('str', 'rainbuckets_total'),
+    ('bytes', b'\x00' * 16),
+    ('None', None),
+)
+
+
+def baseline_umsgpack():
+    tar = subprocess.run(['git', '-C', _bench.ROOT, 'archive', BASELINE, 'src/umsgpack'],
+                         check=True, stdout=subprocess.PIPE).stdout
+    tmp = tempfile.mkdtemp()
+    tarfile.open(fileobj=io.BytesIO(tar)).extractall(tmp)
+    pkg = os.path.join(tmp, 'umsgpack_baseline')
+    os.rename(os.path.join(tmp, 'src', 'umsgpack'), pkg)
+    # umsgpack_ext registers its classes with whatever "umsgpack" imports as
+    ext = os.path.join(pkg, 'umsgpack_ext.py')
+    with open(ext) as f:
+        source = f.read()
+    with open(ext, 'w') as f:
+        f.write(source.replace('import umsgpack\n', 'import umsgpack_baseline as umsgpack\n', 1))
+    sys.path.insert(0, tmp)
+    import umsgpack_baseline
+    return umsgpack_baseline
+
+
+def race(*fns, rounds=15):
+    # best time of each fn over rounds taken in turn, so that load on the
+    # machine hits them all alike
+    best = [None] * len(fns)
+    for _ in range(rounds):
+        for i, fn in enumerate(fns):
+            us = _bench.timeit(fn, repeat=1)
+            if best[i] is None or us < best[i]:
+                best[i] = us
+    return best
+
+
+def main():
+    old = baseline_umsgpack()
+    buf = bytearray(256)
+    record = _bench.gather_loop_payload()
+    assert old.dumps(record) == umsgpack.dumps(record)
+    rows = []
+    for name, value in FIELDS:
+        obj = [value]
+        rows.append((name, 1, race(
+            lambda: old.dumps(obj),
+            lambda: umsgpack.dumps(obj),
+            lambda: umsgpack.dumps_into(obj, buf),
+            lambda: umsgpack.dumps(obj, use_mpext=False),
+            lambda: umsgpack.dumps_into(obj, buf, use_mpext=False))))
+    rows.append(("gather_loop record, per field", 2 * len(record), race(
+        lambda: old.dumps(record),
+        lambda: umsgpack.dumps(record),
+        lambda: umsgpack.dumps_into(record, buf),
+        lambda: umsgpack.dumps(record, use_mpext=False),
+        lambda: umsgpack.dumps_into(record, buf, use_mpext=False))))
+    for name, n, (base, *times) in rows:
+        print(name)
+        _bench.report("  baseline {} dumps".format(BASELINE), base / n)
+        for label, us in zip(("dumps", "dumps_into", "dumps use_mpext=False",
+                              "dumps_into use_mpext=False"), times):
+            _bench.report("  " + label, us / n, base / n)
+
+
+if __name__ == '__main__':
+    main()
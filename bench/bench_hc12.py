@@ -0,0 +1,91 @@
+# bench_hc12.py Wall clock of one radio cycle with hc12.HC12 on the simulated
+# HC-12 in sim/, against the fixed sleep_ms choreography of the old
+# broadcast_data.  Also checks the driver state machine on the way.
+
+import os
+import sys
+import time
+import _bench
+
+sys.path.insert(0, os.path.join(_bench.ROOT, 'sim'))
+import uasyncio as asyncio
+from fake_hc12 import FakeHC12
+from hc12 import HC12, HC12Exception
+
+# broadcast_data before the driver: four 200ms waits around the frame, plus
+# the 200ms after it was written
+OLD_CYCLE_MS = 5 * 200
+FRAME = bytes(150)
+
+
+async def cycle(radio, frames):
+    t = time.monotonic()
+    await radio.wake()
+    for f in frames:
+        await radio.send(f)
+    await radio.sleep()
+    return (time.monotonic() - t) * 1000
+
+
+async def overlapped(radio, work_ms):
+    # sensor reads run while the radio wakes up
+    t = time.monotonic()
+    wake = asyncio.create_task(radio.wake())
+    await asyncio.sleep_ms(0)
+    time.sleep(work_ms / 1000)  # blocking sensor reads
+    await wake
+    await radio.send(FRAME)
+    await radio.sleep()
+    return (time.monotonic() - t) * 1000
+
+
+async def run():
+    fake = FakeHC12()
+    radio = HC12(fake, fake.set_pin)
+    await radio.configure((b'AT+P6', b'OK+P6'))
+    assert fake.power == 'P6'
+    try:
+        await radio.configure((b'AT+BOGUS', b'OK'))
+    except HC12Exception:
+        pass
+    else:
+        raise AssertionError("bad command accepted")
+
+    ms = await cycle(radio, [FRAME])
+    assert fake.asleep and fake.sent[-1][1] == FRAME
+    print("old broadcast_data, 1 frame       {:7.1f} ms busy".format(OLD_CYCLE_MS + 150 * 10000 / 9600))
+    print("HC12 wake/send/sleep, 1 frame     {:7.1f} ms, cpu free while waiting".format(ms))
+
+    # frames sent while asleep wake the module first
+    await radio.send(FRAME)
+    assert len(fake.sent) == 2
+    await radio.sleep()
+
+    ms = await cycle(radio, [FRAME] * 3)
+    print("HC12 wake/send/sleep, 3 frames    {:7.1f} ms".format(ms))
+    ms = await overlapped(radio, 30)
+    print("HC12 with 30 ms sensor reads      {:7.1f} ms".format(ms))
+    # nothing but the frames went over the air, no early AT
+    assert all(frame == FRAME for t, frame in fake.sent), fake.sent
+
+    # no answer at all: wake gives up after wake_timeout_ms
+    dead = FakeHC12()
+    dead.write = lambda buf: len(buf)
+    radio = HC12(dead, dead.set_pin, wake_timeout_ms=100)
+    t = time.monotonic()
+    try:
+        await radio.wake()
+    except HC12Exception:
+        pass
+    else:
+        raise AssertionError("silent radio woke up")
+    print("silent radio, wake timeout        {:7.1f} ms".format((time.monotonic() - t) * 1000))
+    assert dead.set_pin.value() == 1
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# bench_iterative.py Recursive against explicit stack decoding of batch
+# payloads: arrays of sample records, and a deeply nested message.  The peak
+# heap of a batch is mostly the decoded records, the working heap is the peak
+# less what the result keeps: what the decoder itself needs on the way.
+
+import random
+import tracemalloc
+import _bench
+import umsgpack
+from umsgpack import mp_load
+
+
+def batch(n):
+    rnd = random.Random(2)
+    return [{
+        'temp': rnd.uniform(-10, 35),
+        'humidity': rnd.uniform(10, 100),
+        'battery': rnd.uniform(3.0, 4.2),
+        'avg_wind': rnd.uniform(0, 10),
+        'gust_wind': rnd.uniform(0, 30),
+        'wind_dir': rnd.randrange(360),
+        'rainbuckets': rnd.choice((0, 0, 1)),
+        'rainbuckets_total': i,
+        'timemark': 749283012 + i * 20,
+    } for i in range(n)]
+
+
+def working_heap(fn):
+    # peak bytes during one call above the result it returns, after a warm up
+    tracemalloc.start()
+    fn()
+    tracemalloc.reset_peak()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak - current
+
+
+def heap_line(packed):
+    return "  peak heap: mp_load {} bytes, loads {} bytes, iterative {} bytes\n" \
+           "  working heap: mp_load {} bytes, loads {} bytes, iterative {} bytes".format(
+               _bench.peak_alloc(lambda: mp_load.loads(packed, {})),
+               _bench.peak_alloc(lambda: umsgpack.loads(packed)),
+               _bench.peak_alloc(lambda: umsgpack.loads(packed, iterative=True)),
+               working_heap(lambda: mp_load.loads(packed, {})),
+               working_heap(lambda: umsgpack.loads(packed)),
+               working_heap(lambda: umsgpack.loads(packed, iterative=True)))
+
+
+def main():
+    for n in (10, 300):
+        packed = umsgpack.dumps(batch(n), force_float_precision="single")
+        assert mp_load.loads(packed, {}) == umsgpack.loads(packed) == umsgpack.loads(packed, iterative=True)
+        print("batch of {} records, {} bytes".format(n, len(packed)))
+        objs = n * 10  # records, plus 9 values each
+        reps = max(1, 30000 // n)
+        base = _bench.timeit(lambda: mp_load.loads(packed, {}), reps) / objs
+        _bench.report("  mp_load.loads per object", base)
+        _bench.report("  loads per object", _bench.timeit(lambda: umsgpack.loads(packed), reps) / objs, base)
+        _bench.report("  loads iterative per object",
+                      _bench.timeit(lambda: umsgpack.loads(packed, iterative=True), reps) / objs, base)
+        print(heap_line(packed))
+
+    depth = 200
+    nested = b'\x91' * depth + b'\x01'
+    assert mp_load.loads(nested, {}) == umsgpack.loads(nested, iterative=True)
+    print("{} nested arrays".format(depth))
+    print(heap_line(nested))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# bench_loads.py Decode a corpus of radio frames with the stream decoder
+# (mp_load) and the buffer decoder behind umsgpack.loads.
+
+# Usage: python bench/bench_loads.py [frames.hex]
+# The optional file holds one recorded frame per line as hex, as captured from
+# the base station receiver. Without it a corpus is synthesised exactly as
+# main.checksum_payload builds frames from schema packed gather_loop payloads.
+
+import random
+import struct
+import sys
+import _bench
+import umsgpack
+from umsgpack import mp_load
+
+FIELDS = (
+    ('temp', 'f'),
+    ('humidity', 'f'),
+    ('battery', 'f'),
+    ('avg_wind', 'f'),
+    ('gust_wind', 'f'),
+    ('wind_dir', 'H'),
+    ('rainbuckets', 'H'),
+    ('rainbuckets_total', 'I'),
+    ('timemark', 'I'),
+)
+
+
+def frame(packed):
+    data = umsgpack.dumps(packed)
+    checksum = sum(data)
+    return umsgpack.dumps(data + struct.pack(">hh", checksum // 256, checksum % 256))
+
+
+def synthetic_corpus(n=500):
+    rnd = random.Random(1)
+    packer = umsgpack.schema(FIELDS)
+    corpus = []
+    total = 0
+    for i in range(n):
+        rain = rnd.choice((0, 0, 0, 1, 2))
+        total += rain
+        payload = {
+            'temp': rnd.uniform(-10, 35),
+            'humidity': rnd.uniform(10, 100),
+            'battery': rnd.uniform(3.0, 4.2),
+            'avg_wind': rnd.uniform(0, 10),
+            'gust_wind': rnd.uniform(0, 30),
+            'wind_dir': rnd.randrange(360),
+            'rainbuckets': rain,
+            'rainbuckets_total': total,
+            'timemark': 749283012 + i * 20,
+        }
+        corpus.append(frame(bytes(packer.pack(payload))))
+    return corpus
+
+
+def read_corpus(path):
+    with open(path) as f:
+        return [bytes.fromhex(line.strip()) for line in f if line.strip()]
+
+
+# Base station decode: outer bin -> checksummed inner bin -> payload map
+def decode(loads, frame, **options):
+    outer = loads(frame, **options)
+    data = outer[:-4]
+    hi, lo = struct.unpack_from(">hh", outer, len(outer) - 4)
+    if sum(data) != hi * 256 + lo:
+        raise ValueError("bad checksum")
+    return loads(loads(data, **options), **options)
+
+
+def stream_loads(s, **options):
+    return mp_load.loads(bytes(s), options)
+
+
+def main():
+    corpus = read_corpus(sys.argv[1]) if len(sys.argv) > 1 else synthetic_corpus()
+    for f in corpus:
+        assert decode(stream_loads, f) == decode(umsgpack.loads, f) == decode(umsgpack.loads, f, zero_copy=True)
+    print("{} frames, {} bytes".format(len(corpus), sum(len(f) for f in corpus)))
+
+    def run(loads, **options):
+        return lambda: [decode(loads, f, **options) for f in corpus]
+
+    n = 100
+    base = _bench.timeit(run(stream_loads), n) / len(corpus)
+    _bench.report("mp_load.loads (BytesIO) per frame", base)
+    _bench.report("umsgpack.loads per frame", _bench.timeit(run(umsgpack.loads), n) / len(corpus), base)
+    _bench.report("umsgpack.loads zero_copy per frame",
+                  _bench.timeit(run(umsgpack.loads, zero_copy=True), n) / len(corpus), base)
+    f = corpus[0]
+    print("peak heap per frame: mp_load {} bytes, loads {} bytes, zero_copy {} bytes".format(
+        _bench.peak_alloc(lambda: decode(stream_loads, f)),
+        _bench.peak_alloc(lambda: decode(umsgpack.loads, f)),
+        _bench.peak_alloc(lambda: decode(umsgpack.loads, f, zero_copy=True))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# bench_profiler.py PROFILER on a scripted cycle: spans, heap deltas and the
+# charge estimate checked by hand, frame() through decode(), then the cost of
+# a begin/end pair, the price of leaving it on.
+
+import os
+import sys
+import _bench
+
+sys.path.insert(0, os.path.join(_bench.ROOT, 'sim'))
+import board
+import time
+from profiler import PROFILER, decode
+
+PHASES = ('sensors', 'transmit')
+
+
+def main():
+    board.install()
+    p = PROFILER(PHASES, ma=(50, 140), idle_ma=40, cycles=4, frame_every=3)
+    for cycle in range(5):
+        p.start_cycle()
+        p.begin('sensors')
+        time.sleep(0.060)
+        p.end('sensors')
+        for _ in range(2):  # two frames, one phase
+            p.begin('transmit')
+            time.sleep(0.100)
+            p.end('transmit')
+        time.sleep(0.040)
+        assert bool(p.frame_due()) == (cycle == 3)
+        if p.frame_due():
+            frame = p.frame()
+        p.end_cycle()
+
+    # 60ms at 50mA, 200ms at 140mA, 300ms awake: 0.3s * 40mA + 0.06s * 10mA + 0.2s * 100mA
+    assert abs(p.mah('sensors') - 0.06 * 50 / 3600) < 1e-6
+    assert abs(p.mah('transmit') - 0.2 * 140 / 3600) < 1e-6
+    assert abs(p.mah() - (0.3 * 40 + 0.06 * 10 + 0.2 * 100) / 3600) < 1e-6
+    got = decode(PHASES, frame)
+    assert got['cycle'] == 3 and got['awake_ms'] == 300, got
+    assert abs(got['sensors'][0] - 60000) <= 100 and abs(got['transmit'][0] - 200000) <= 100, got
+    print(p.report())
+
+    def pair():
+        p.begin('sensors')
+        p.end('sensors')
+    _bench.report("begin/end pair", _bench.timeit(pair, 20000))
+    p.heap = False
+    _bench.report("begin/end pair, no heap", _bench.timeit(pair, 20000))
+    print("peak heap per pair: {} bytes".format(_bench.peak_alloc(pair)))
+
+
+if __name__ == '__main__':
+    main()
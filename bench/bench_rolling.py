@@ -0,0 +1,96 @@
+# bench_rolling.py submit + mean per sample for the list rescan the old
+# ROLLINGAVERAGE did against ROLLINGAVERAGE and ROLLINGSTATS, at battery, gust
+# and pressure trend window sizes.  ROLLINGSTATS is checked against a full
+# rescan on the way, ROLLINGAVERAGE against the old class with failed reads.
+
+import random
+import statistics
+import _bench
+from rolling_average import ROLLINGSTATS, ROLLINGAVERAGE
+
+
+# ROLLINGAVERAGE before ROLLINGSTATS
+class RESCAN:
+    def __init__(self, **kwargs):
+        samples = kwargs.get('samples', 5)
+        self.holder = [None] * samples
+        self.index = 0
+
+    def submit(self, value):
+        self.holder[self.index] = value
+        if self.index < len(self.holder) - 1:
+            self.index += 1
+        else:
+            self.index = 0
+
+    def compute_avg(self):
+        samples = 0
+        total = 0
+        for i in self.holder:
+            if i is not None:
+                samples += 1
+                total += i
+        if samples > 0:
+            return (total / samples)
+        else:
+            return None
+
+
+def main():
+    rnd = random.Random(3)
+    data = [rnd.uniform(99000, 102000) for _ in range(2000)]
+
+    stats = ROLLINGSTATS(samples=300)
+    for i, v in enumerate(data):
+        stats.submit(v)
+        window = data[max(0, i - 299):i + 1]
+        assert abs(stats.compute_avg() - statistics.fmean(window)) < 0.05
+        assert stats.minimum() == min(window) or abs(stats.minimum() - min(window)) < 0.01
+    # failed reads are submitted as None, they take a slot in the window
+    avg = ROLLINGAVERAGE(samples=3)
+    assert avg.compute_avg() is None
+    for v in (1.0, None, 2.0, None, 3.0):
+        avg.submit(v)
+    assert avg.compute_avg() == 2.5
+    for samples in (1, 5, 60):
+        avg = ROLLINGAVERAGE(samples=samples)
+        old = RESCAN(samples=samples)
+        for v in data:
+            v = None if rnd.random() < 0.2 else v
+            avg.submit(v)
+            old.submit(v)
+            a, b = avg.compute_avg(), old.compute_avg()
+            assert (a is None and b is None) or abs(a - b) < 0.05, (a, b)
+
+    print("mean {:.2f} stddev {:.2f} min {:.2f} max {:.2f}".format(
+        stats.compute_avg(), stats.stddev(), stats.minimum(), stats.maximum()))
+
+    for samples in (5, 60, 300):
+        old = RESCAN(samples=samples)
+        new = ROLLINGSTATS(samples=samples)
+        it = iter(range(10 ** 9))
+
+        def step_old():
+            old.submit(data[next(it) % 2000])
+            old.compute_avg()
+
+        avg = ROLLINGAVERAGE(samples=samples)
+
+        def step_avg():
+            avg.submit(data[next(it) % 2000])
+            avg.compute_avg()
+
+        def step_new():
+            new.submit(data[next(it) % 2000])
+            new.compute_avg()
+            new.variance()
+            new.minimum()
+            new.maximum()
+        base = _bench.timeit(step_old, 2000)
+        _bench.report("rescan mean, window {}".format(samples), base)
+        _bench.report("ROLLINGAVERAGE mean, window {}".format(samples), _bench.timeit(step_avg, 2000), base)
+        _bench.report("ROLLINGSTATS all stats, window {}".format(samples), _bench.timeit(step_new, 2000), base)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# bench_scheduler.py Replay sleep schedules against a solar charged battery
+# and report energy spent against readings delivered: the fixed ramp of the
+# old compute_sleep_seconds against scheduler.SCHEDULER.
+#
+#   python bench/bench_scheduler.py [trace.csv]
+#
+# Without an argument a 10 day closed loop simulation runs on the battery
+# model in sim/, with two cloudy days and a storm.  With a recorded trace of
+# "seconds,volts" lines the voltages are replayed as recorded and each policy
+# is charged for the readings it would have taken.  In the simulation
+# SCHEDULER has to match the ramp's readings and readings per mAh in every
+# scenario without browning out.
+
+import os
+import sys
+import _bench
+
+sys.path.insert(0, os.path.join(_bench.ROOT, 'sim'))
+from solar_battery import SolarBattery, SLEEP_MA, READING_MAS
+from scheduler import SCHEDULER
+from bench_battery import compute_sleep_seconds
+
+DAYS = 10
+# (panel mA, starting state of charge): a panel that keeps up, a weak one,
+# and a weak one on a low battery
+SCENARIOS = ((15, 0.5), (6, 0.6), (6, 0.3), (4, 0.3))
+STORM = (5 * 24 + 10, 5 * 24 + 16)  # hours with gusty wind and falling pressure
+
+
+def weather(t):
+    hour = t / 3600
+    if STORM[0] <= hour < STORM[1]:
+        return 6.0 + 5.0 * ((int(t) // 60) % 3), 100500 - 60 * (hour - STORM[0]) * 10
+    return 1.0, 100500.0
+
+
+class Ramp:
+    name = "fixed ramp"
+
+    def __init__(self):
+        self.voltage = None
+
+    def submit(self, now, voltage, wind=None, pressure=None):
+        self.voltage = voltage
+
+    def next_sleep_seconds(self, hour=None):
+        return compute_sleep_seconds(self.voltage)
+
+
+def closed_loop(policy, panel_ma, soc):
+    bat = SolarBattery(panel_ma=panel_ma, soc=soc, cloudy_days=(3, 4))
+    t = 0.0
+    readings = storm = 0
+    spent = 0.0
+    down = 0.0
+    vmin = 9.0
+    sleep = 20
+    while t < DAYS * 86400:
+        if bat.running:
+            readings += 1
+            wind, pressure = weather(t)
+            if STORM[0] <= t / 3600 < STORM[1]:
+                storm += 1
+            policy.submit(t, bat.voltage, wind, pressure)
+            sleep = policy.next_sleep_seconds((t / 3600) % 24)
+        else:
+            sleep = 60
+            down += sleep
+        spent += bat.step(t, sleep, bat.running)
+        vmin = min(vmin, bat.voltage)
+        t += sleep
+    print("{:<11s} {:6d} readings ({:4d} in the storm), {:6.1f} mAh spent, "
+          "{:6.1f} readings/mAh, min {:.2f} V, {:5.1f} h browned out".format(
+              policy.name, readings, storm, spent, readings / spent, vmin, down / 3600))
+    return readings, readings / spent, down
+
+
+def replay(policy, path):
+    trace = []
+    with open(path) as f:
+        for line in f:
+            if line.strip() and not line.startswith('#'):
+                s, v = line.split(',')[:2]
+                trace.append((float(s), float(v)))
+    t = trace[0][0]
+    i = 0
+    readings = 0
+    spent = 0.0
+    while t <= trace[-1][0]:
+        while i + 1 < len(trace) and trace[i + 1][0] <= t:
+            i += 1
+        readings += 1
+        policy.submit(t, trace[i][1])
+        sleep = policy.next_sleep_seconds()
+        spent += (SLEEP_MA * sleep + READING_MAS) / 3600
+        t += sleep
+    print("{:<11s} {:6d} readings, {:6.1f} mAh spent, {:6.1f} readings/mAh".format(
+        policy.name, readings, spent, readings / spent))
+
+
+def policies():
+    sched = SCHEDULER()
+    sched.name = "SCHEDULER"
+    return Ramp(), sched
+
+
+def main():
+    if len(sys.argv) > 1:
+        for policy in policies():
+            replay(policy, sys.argv[1])
+        return
+    for panel_ma, soc in SCENARIOS:
+        print("{} mA panel, battery at {:.0%}".format(panel_ma, soc))
+        ramp, sched = [closed_loop(policy, panel_ma, soc) for policy in policies()]
+        assert sched[0] >= ramp[0] and sched[1] >= ramp[1] and sched[2] == 0, (ramp, sched)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# bench_schema.py Compare umsgpack.dumps with the schema packer on the
+# gather_loop payload.
+
+import _bench
+import umsgpack
+
+# Same field list as main.PAYLOAD_FIELDS
+FIELDS = (
+    ('temp', 'f'),
+    ('humidity', 'f'),
+    ('battery', 'f'),
+    ('avg_wind', 'f'),
+    ('gust_wind', 'f'),
+    ('pressure', 'f'),
+    ('wind_dir', 'H'),
+    ('rainbuckets', 'H'),
+    ('rainbuckets_total', 'I'),
+    ('timemark', 'I'),
+)
+
+
+def main():
+    payload = _bench.gather_loop_payload()
+    packer = umsgpack.schema(FIELDS)
+
+    # the schema output must decode to the same map (floats are single precision)
+    decoded = umsgpack.loads(bytes(packer.pack(payload)))
+    single = umsgpack.loads(umsgpack.dumps(payload, force_float_precision="single"))
+    assert decoded == single, (decoded, single)
+
+    print("dumps (single) : {} bytes".format(len(umsgpack.dumps(payload, force_float_precision="single"))))
+    print("schema.pack    : {} bytes".format(packer.size))
+    base = _bench.timeit(lambda: umsgpack.dumps(payload, force_float_precision="single"))
+    _bench.report("umsgpack.dumps", base)
+    _bench.report("Schema.pack", _bench.timeit(lambda: packer.pack(payload)), base)
+    print("peak heap per call: dumps {} bytes, Schema.pack {} bytes".format(
+        _bench.peak_alloc(lambda: umsgpack.dumps(payload, force_float_precision="single")),
+        _bench.peak_alloc(lambda: packer.pack(payload))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# bench_sht4x.py Time the SHT41 keeps the ESP32 awake per reading, for each
+# precision: the fixed 0.2 s wait the driver used to do against the datasheet
+# wait tables with NACK polling, on the fake sensor from sim/.
+
+import os
+import sys
+import time
+import _bench
+
+sys.path.insert(0, os.path.join(_bench.ROOT, 'sim'))
+import mptime
+mptime.install()
+import sht4x
+from fake_sht4x import FakeSHT4xI2C
+
+# old wait without the heater, whatever the precision
+OLD_WAIT_MS = 200
+
+
+def main():
+    for precision in sht4x.temperature_precision_options:
+        i2c = FakeSHT4xI2C()
+        sht = sht4x.SHT4X(i2c)
+        sht.temperature_precision = precision
+        t = time.monotonic()
+        temp, rh = sht.measurements
+        ms = (time.monotonic() - t) * 1000
+        assert abs(temp - (-45 + 175 * 26000 / 65535)) < 1e-9
+        print("{:<17s} old {:4d} ms, now {:5.1f} ms, {} NACKs".format(
+            sht.temperature_precision, OLD_WAIT_MS, ms, i2c.nacks))
+
+    # polling right after the command: the NACKs carry the wait on their own
+    i2c = FakeSHT4xI2C()
+    sht = sht4x.SHT4X(i2c)
+    t = time.monotonic()
+    sht.start_measurement()
+    sht.read_measurement()
+    print("HIGH_PRECISION, polling only: {:5.1f} ms, {} NACKs".format((time.monotonic() - t) * 1000, i2c.nacks))
+
+    # a sensor that never answers gives up after the poll budget
+    i2c = FakeSHT4xI2C()
+    i2c.writeto = lambda addr, buf, stop=True: None
+    sht = sht4x.SHT4X(i2c)
+    try:
+        sht.measurements
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("missing sensor returned a reading")
+
+
+if __name__ == '__main__':
+    main()
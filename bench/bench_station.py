@@ -0,0 +1,138 @@
+# bench_station.py The whole station, main.py unchanged, on the simulated
+# board in sim/: boot, then gather_loop for CYCLES sleeps in each weather.
+# Per cycle: awake time (virtual, see sim/board.py), Python heap allocated,
+# I2C transactions and bytes on air.  Every frame the radio sent is decoded
+# back into readings and checked against what gather_loop queued, profile
+# frames against the board's own awake time.
+
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import tracemalloc
+import _bench
+
+sys.path.insert(0, os.path.join(_bench.ROOT, 'sim'))
+import board
+import profiler
+
+CYCLES = 40
+WEATHER = (
+    ('showers', dict()),
+    ('storm', dict(wind=8.0, gust=10.0, rain=120.0, heading=80.0)),
+    ('gale', dict(wind=20.0, gust=15.0, rain=0.0, heading=300.0)),
+)
+
+
+def run_station(weather, cycles=CYCLES):
+    # returns the board after main.py ran `cycles` sleeps, and main
+    station = board.install(sleeps=cycles, weather=board.Weather(**weather))
+    allocs = []
+
+    def measure(cycle):
+        cycle['alloc'] = tracemalloc.get_traced_memory()[1] - allocs[-1] if allocs else 0
+        tracemalloc.reset_peak()
+        allocs.append(tracemalloc.get_traced_memory()[0])
+
+    station.hooks.append(measure)
+    cwd = os.getcwd()
+    tmp = tempfile.mkdtemp()
+    for name in ('ulp_two_pins.ulp', 'ulp_two_pins.sym'):
+        shutil.copy(os.path.join(_bench.ROOT, 'src', name), tmp)
+    # main.py runs main() on import, keep the module when Stop ends it
+    spec = importlib.util.spec_from_file_location('main', os.path.join(_bench.ROOT, 'src', 'main.py'))
+    station_main = importlib.util.module_from_spec(spec)
+    log = io.StringIO()
+    os.chdir(tmp)
+    tracemalloc.start()
+    allocs.append(0)
+    try:
+        with contextlib.redirect_stdout(log):
+            spec.loader.exec_module(station_main)
+    except board.Stop:
+        pass
+    finally:
+        tracemalloc.stop()
+        os.chdir(cwd)
+        shutil.rmtree(tmp)
+    return station, station_main, log.getvalue()
+
+
+def decode_frames(main, sent):
+    # gather_loop's framing undone: msgpack of (msgpack of the batch, two
+    # checksum halves), an optional priority prefix, the tscodec batch.  or a
+    # profile frame
+    import umsgpack
+    import tscodec
+    readings = []
+    events = []
+    profiles = []
+    for t, frame in sent:
+        outer = umsgpack.loads(frame)
+        body, check = outer[:-4], outer[-4:]
+        total = sum(body)
+        assert struct.unpack(">hh", check) == (total // 256, total % 256)
+        batch = umsgpack.loads(body)
+        if batch[0] == main.PROFILE_FRAME:
+            profiles.append(profiler.decode(main.PROFILE_PHASES, batch[1:]))
+            continue
+        if batch[0] == main.PRIORITY_FRAME:
+            events.append(batch[1])
+            batch = batch[2:]
+        readings.extend(tscodec.decode(main.PAYLOAD_FIELDS, batch))
+    return readings, events, profiles
+
+
+def main():
+    for name, weather in WEATHER:
+        station, station_main, log = run_station(weather)
+        # cycle k is the time awake before sleep k, then that sleep.  the
+        # first is boot, the last raised Stop instead of sleeping
+        cycles = station.cycles
+        assert len(cycles) == CYCLES + 1, len(cycles)
+        woken = sum(c['woken'] for c in cycles)
+        slept = sum(c['slept'] for c in cycles)
+        boot, cycles = cycles[0], cycles[1:]
+        readings, events, profiles = decode_frames(station_main, station.uart[2].sent)
+        queued = len(station_main.store)
+        assert len(readings) + queued == CYCLES, (len(readings), queued)
+        marks = [r['timemark'] for r in readings]
+        assert marks == sorted(marks)
+        assert woken == len([line for line in log.splitlines() if line.startswith('woken early')])
+        # each reason at most once per hold-off
+        assert woken <= 2 * (1 + slept // station_main.EVENT_HOLDOFF_SECONDS), woken
+
+        n = len(cycles)
+        print("{}: {} cycles over {:.0f} s, {} ended early by the ulp, {} readings sent in {} frames ({} priority)".format(
+            name, n, slept, woken, len(readings), len(station.uart[2].sent), len(events)))
+        print("  boot: {:.0f} ms awake, {} heap bytes".format(boot['awake'] * 1000, boot['alloc']))
+        awake = sorted(c['awake'] * 1000 for c in cycles)
+        print("  awake per cycle: median {:.0f} ms, max {:.0f} ms".format(awake[n // 2], awake[-1]))
+        heap = sorted(c['alloc'] for c in cycles)
+        print("  heap per cycle: median {}, max {} bytes".format(heap[n // 2], heap[-1]))
+        print("  i2c per cycle: mean {:.1f}, bytes on air per cycle: mean {:.1f}".format(
+            sum(c['i2c'] for c in cycles) / n, sum(c['tx_bytes'] for c in cycles) / n))
+        # a profile is the last finished cycle, the board counts boot as one too.
+        # one packed after the last transmission waits for the next
+        if station_main.profile_frame is not None:
+            profiles.append(profiler.decode(station_main.PROFILE_PHASES, station_main.profile_frame[1:]))
+        assert profiles
+        for p in profiles:
+            assert abs(p['awake_ms'] - station.cycles[p['cycle'] - 1]['awake'] * 1000) < 2, p
+            # the profiled cycle is one that transmitted
+            assert p['transmit'][0] > 0, p
+        p = profiles[-1]
+        print("  profile of cycle {}: awake {} ms, {:.5f} mAh, {}".format(
+            p['cycle'], p['awake_ms'], p['mah'],
+            ", ".join("{} {:.1f} ms".format(name, p[name][0] / 1000) for name in station_main.PROFILE_PHASES)))
+        dirs = [r['wind_dir'] for r in readings]
+        if dirs:
+            print("  wind_dir sent: {}..{} deg, vane at {:.0f}".format(min(dirs), max(dirs), station.weather.heading))
+
+
+if __name__ == '__main__':
+    main()
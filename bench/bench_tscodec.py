@@ -0,0 +1,73 @@
+# bench_tscodec.py Bytes per reading for batches of gather_loop payloads:
+# one schema msgpack map per reading against one tscodec batch.
+
+import random
+import struct
+import _bench
+import umsgpack
+import tscodec
+from bench_schema import FIELDS
+
+
+def f32(v):
+    return struct.unpack(">f", struct.pack(">f", v))[0]
+
+
+# Readings as the sensors produce them: SHT4x temperature and humidity are
+# 16 bit ticks scaled to float, the battery is an ADC reading, wind speeds
+# are pulse counts over the span, pressure drifts by a few Pa, times step by
+# the 20 second sleep.
+def readings(n, seed=1):
+    rnd = random.Random(seed)
+    t_ticks = 26000
+    rh_ticks = 30000
+    bat_uv = 1955000
+    press = 100650.0
+    total = 117
+    out = []
+    for i in range(n):
+        t_ticks += rnd.choice((-12, -4, 0, 0, 4, 12))
+        rh_ticks += rnd.choice((-40, -8, 0, 0, 8, 40))
+        bat_uv += rnd.randrange(-3000, 3000)
+        press += rnd.uniform(-8, 8)
+        pulses = rnd.choice((0, 0, 3, 9, 14))
+        rain = rnd.choice((0, 0, 0, 0, 1))
+        total += rain
+        out.append({
+            'temp': f32(-45 + 175 * t_ticks / 65535),
+            'humidity': f32(-6 + 125 * rh_ticks / 65535),
+            'battery': f32(bat_uv / 1000000 * 2),
+            'avg_wind': f32(pulses / 20),
+            'gust_wind': f32(rnd.choice((0.0, 2.0, 3.3333, 5.0)) if pulses else 0.0),
+            'pressure': f32(press),
+            'wind_dir': rnd.randrange(240, 300),
+            'rainbuckets': rain,
+            'rainbuckets_total': total,
+            'timemark': 749283012 + i * 20 + rnd.choice((0, 0, 0, 1)),
+        })
+    return out
+
+
+def main():
+    packer = umsgpack.schema(FIELDS)
+    recs = readings(300)
+    single = len(packer.pack(recs[0]))
+    print("schema msgpack map: {} bytes per reading".format(single))
+    for n in (1, 5, 10, 30, 100, 300):
+        batch = recs[:n]
+        data = tscodec.encode(FIELDS, batch)
+        assert tscodec.decode(FIELDS, data) == batch
+        per = len(data) / n
+        print("tscodec batch of {:3d}: {:5d} bytes, {:6.1f} bytes per reading ({:.1f}x)".format(
+            n, len(data), per, single / per))
+
+    batch = recs[:10]
+    data = tscodec.encode(FIELDS, batch)
+    base = _bench.timeit(lambda: [packer.pack(r) for r in batch], 500) / 10
+    _bench.report("schema pack per reading", base)
+    _bench.report("tscodec.encode per reading", _bench.timeit(lambda: tscodec.encode(FIELDS, batch), 500) / 10)
+    _bench.report("tscodec.decode per reading", _bench.timeit(lambda: tscodec.decode(FIELDS, data), 500) / 10)
+
+
+if __name__ == '__main__':
+    main()
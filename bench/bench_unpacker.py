@@ -0,0 +1,70 @@
+# bench_unpacker.py Receive a stream of radio frames in small UART sized
+# chunks with umsgpack.Unpacker, against retrying umsgpack.loads on the
+# accumulated bytes after every chunk.  Also checks that the stream resumes
+# after an ext handler raised.
+
+import _bench
+import umsgpack
+from bench_loads import synthetic_corpus
+
+
+def chunks(stream, size):
+    return [stream[i : i + size] for i in range(0, len(stream), size)]
+
+
+def unpacker_rx(parts):
+    u = umsgpack.Unpacker()
+    out = []
+    for p in parts:
+        u.feed(p)
+        out.extend(u)
+    return out
+
+
+# What a receiver without framing has to do: re-parse from the frame start
+def retry_rx(parts):
+    out = []
+    pending = b''
+    for p in parts:
+        pending += p
+        try:
+            obj = umsgpack.loads(pending)
+        except umsgpack.InsufficientDataException:
+            continue
+        out.append(obj)
+        pending = pending[len(umsgpack.dumps(obj)):]
+    return out
+
+
+def resync():
+    def broken(ext):
+        raise ValueError("bad ext")
+    u = umsgpack.Unpacker(ext_handlers={5: broken})
+    u.feed(b'\xd4\x05\x00' + umsgpack.dumps([1, 2]))
+    try:
+        next(u)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("ext handler did not raise")
+    # resumes at the byte after 0xd4: fixints 5 and 0, then the array
+    assert list(u) == [5, 0, [1, 2]]
+
+
+def main():
+    resync()
+    corpus = synthetic_corpus(200)
+    stream = b''.join(corpus)
+    expected = [umsgpack.loads(f) for f in corpus]
+    for size in (1, 8, 32):
+        parts = chunks(stream, size)
+        assert unpacker_rx(parts) == expected
+        assert retry_rx(parts) == expected
+        base = _bench.timeit(lambda: retry_rx(parts), 5, 3) / len(corpus)
+        _bench.report("retry loads, {:2d} byte chunks, per frame".format(size), base)
+        _bench.report("Unpacker, {:2d} byte chunks, per frame".format(size),
+                      _bench.timeit(lambda: unpacker_rx(parts), 5, 3) / len(corpus), base)
+
+
+if __name__ == '__main__':
+    main()
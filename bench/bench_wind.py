@@ -0,0 +1,66 @@
+# bench_wind.py WINDSTATS over per second pulse counts as the ULP logs them:
+# checked against a brute force over sorted lists, through the wrapped
+# 16 bit view ULP_WEATHER reads, then timed for a full ring and for a
+# 220 second sleep.
+
+import random
+from array import array
+import _bench
+from wind_stats import WINDSTATS
+
+SLOTS = 512
+
+
+def gusty(n, seed=1):
+    rnd = random.Random(seed)
+    base = 4.0
+    out = []
+    for _ in range(n):
+        base = min(30.0, max(0.0, base + rnd.uniform(-1, 1)))
+        out.append(max(0, int(rnd.gauss(base, 2) + (12 if rnd.random() < 0.03 else 0))))
+    return out
+
+
+def brute(counts):
+    threes = [sum(counts[i - 2:i + 1]) / 3 for i in range(2, len(counts))]
+    s = sorted(counts)
+    n = len(s)
+
+    def pct(p):
+        # nearest rank
+        return s[max(0, -(-n * p // 100) - 1)]
+    return sum(counts) / n, max(threes), min(threes), pct(10), pct(50), pct(90)
+
+
+def ring(counts, start):
+    # the ULP words as ULP_WEATHER sees them: count in the low half, the
+    # store instruction's bits in the high half, read as 16 bit values
+    words = array('H', bytes(4 * SLOTS))
+    for i, c in enumerate(counts):
+        slot = (start + i) % SLOTS
+        words[2 * slot] = c
+        words[2 * slot + 1] = 0x1234
+    return words
+
+
+def main():
+    stats = WINDSTATS()
+    for n, start in ((3, 0), (10, 509), (220, 400), (512, 37)):
+        counts = gusty(n, seed=n)
+        got = stats.compute(ring(counts, start), SLOTS, start, n, 2)
+        want = brute(counts)
+        assert abs(got.mean - want[0]) < 1e-9
+        assert (got.gust, got.lull, got.p10, got.p50, got.p90) == want[1:], (n, got.__dict__, want)
+    assert stats.compute(ring([1, 2], 0), SLOTS, 0, 2, 2).gust is None
+
+    counts = gusty(SLOTS)
+    words = ring(counts, 100)
+    print("220 s: mean {0.mean:.2f} gust {0.gust:.2f} lull {0.lull:.2f} p10/50/90 {0.p10}/{0.p50}/{0.p90} pulses/s".format(
+        stats.compute(words, SLOTS, 100, 220, 2)))
+    _bench.report("WINDSTATS 220 s", _bench.timeit(lambda: stats.compute(words, SLOTS, 100, 220, 2), 500))
+    _bench.report("WINDSTATS 512 s", _bench.timeit(lambda: stats.compute(words, SLOTS, 100, SLOTS, 2), 500))
+    print("peak heap per compute: {} bytes".format(_bench.peak_alloc(lambda: stats.compute(words, SLOTS, 100, 220, 2))))
+
+
+if __name__ == '__main__':
+    main()
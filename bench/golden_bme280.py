@@ -0,0 +1,68 @@
+# golden_bme280.py Golden vectors for the BME280 compensation: calibration
+# words and raw adc values in, temperature, pressure and humidity out.
+#
+#   python bench/golden_bme280.py
+#
+# The first row is the BMP280 datasheet 3.12 worked example (T and P as
+# printed there).  The others were computed once with the datasheet 8.1
+# double precision formulas, rounded to 0.01, and cover both ends of every
+# clamp.  Calibration B is made up so that every folded term is non zero.
+# The tolerances leave room for the ESP32's single precision floats, a wrong
+# folded term is off by far more.
+
+import os
+import sys
+from array import array
+import _bench
+
+sys.path.insert(0, os.path.join(_bench.ROOT, 'sim'))
+import mptime
+mptime.install()
+from bme280_float import _calibration, _compensate
+
+# dig_T1..T3, dig_P1..P9, dig_H1..H6, after the H4/H5 unfolding
+CAL_A = (27504, 26435, -1000, 36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000,
+         75, 362, 0, 324, 0, 30)
+CAL_B = (28485, 26735, 50, 36738, -10635, 3024, 7130, -4, -7, 9900, -10230, 4285,
+         75, 362, 12, 313, 50, 30)
+
+# (calibration, (raw temperature, pressure, humidity), (degC, Pa, %rH))
+GOLDEN = (
+    (CAL_A, (519888, 415148, 30000), (25.08, 100653.27, 51.96)),
+    (CAL_A, (415148, 519888, 20000), (-7.86, 78574.63, 0.0)),     # humidity floor
+    (CAL_A, (600000, 300000, 40000), (50.11, 110000.0, 100.0)),  # pressure, humidity ceiling
+    (CAL_A, (519888, 415148, 0), (25.08, 100653.26, 0.0)),
+    (CAL_A, (519888, 415148, 65535), (25.08, 100653.26, 100.0)),
+    (CAL_A, (0, 415148, 30000), (-40.0, 77126.36, 32.76)),        # temperature floor
+    (CAL_A, (1048575, 1048575, 30000), (85.0, 30000.0, 70.65)),   # temperature ceiling, pressure floor
+    (CAL_B, (519888, 415148, 30000), (20.44, 87581.58, 54.84)),
+    (CAL_B, (415148, 519888, 20000), (-12.94, 66221.04, 2.09)),
+    (CAL_B, (0, 415148, 30000), (-40.0, 66427.23, 47.02)),
+)
+TOLERANCE = (0.01, 1.0, 0.01)
+
+
+def check():
+    # list of (row, got, expected) for every vector out of tolerance
+    failed = []
+    out = array("f", [0, 0, 0])
+    for i, (cal, raw, expected) in enumerate(GOLDEN):
+        _compensate(_calibration(*cal), array("i", raw), out)
+        for got, want, tol in zip(out, expected, TOLERANCE):
+            if abs(got - want) > tol:
+                failed.append((i, tuple(out), expected))
+                break
+    return failed
+
+
+def main():
+    failed = check()
+    for i, got, expected in failed:
+        print("vector {}: got {:.2f} C {:.2f} Pa {:.2f} %, expected {:.2f} C {:.2f} Pa {:.2f} %".format(
+            i, *(got + expected)))
+    print("{} of {} golden vectors match".format(len(GOLDEN) - len(failed), len(GOLDEN)))
+    assert not failed
+
+
+if __name__ == '__main__':
+    main()
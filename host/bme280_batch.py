@@ -0,0 +1,86 @@
+# bme280_batch.py Batch BME280 compensation for the base station (CPython +
+# NumPy).  Takes the calibration blocks a sensor returns at 0x88 (26 bytes)
+# and 0xE1 (7 bytes), parsed exactly as bme280_float.BME280.__init__ does,
+# and an (n, 3) array of raw (temp, press, hum) readings.
+#
+# The operations follow bme280_float._compensate one for one, with the same
+# folded calibration terms.  float64 matches the driver run on CPython bit for
+# bit, float32 runs the same operations in single precision as the ESP32 does.
+
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+Calibration = namedtuple('Calibration', (
+    'T1', 'T2', 'T3', 'P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7', 'P8', 'P9',
+    'H1', 'H2', 'H3', 'H4', 'H5', 'H6'))
+
+
+def parse_calibration(block_88, block_e1):
+    t1, t2, t3, p1, p2, p3, p4, p5, p6, p7, p8, p9, _, h1 = \
+        struct.unpack("<HhhHhhhhhhhhBB", bytes(block_88))
+    h2, h3, h4, h5, h6 = struct.unpack("<hBbhb", bytes(block_e1))
+    # unfold H4, H5, keeping care of a potential sign
+    h4 = (h4 * 16) + (h5 & 0xF)
+    h5 //= 16
+    return Calibration(t1, t2, t3, p1, p2, p3, p4, p5, p6, p7, p8, p9,
+                       h1, h2, h3, h4, h5, h6)
+
+
+def _folded(cal, dtype):
+    # the terms of bme280_float._calibration, exact in float32 and float64
+    c = cal
+    return [dtype(v) for v in (
+        c.T1 / 1024.0, c.T2, c.T1 / 8192.0, c.T3,
+        c.P6 / 32768.0, c.P5 * 2.0, c.P4 * 65536.0, c.P3 / 524288.0,
+        c.P2, c.P1, c.P9 / 2147483648.0, c.P8 / 32768.0, c.P7,
+        c.H4 * 64.0, c.H5 / 16384.0, c.H2 / 65536.0,
+        c.H6 / 67108864.0, c.H3 / 67108864.0, c.H1 / 524288.0)]
+
+
+def compensate(cal, raw, dtype=np.float64):
+    """Compensate raw readings.
+
+    cal: Calibration from parse_calibration
+    raw: array like of shape (n, 3), raw temperature, pressure, humidity
+    dtype: np.float64 (CPython scalar path) or np.float32 (device path)
+
+    Returns temperature (C), pressure (Pa), humidity (%) and t_fine arrays.
+    """
+    raw = np.asarray(raw)
+    k = _folded(cal, dtype)
+    raw_temp = raw[:, 0].astype(dtype)
+    raw_press = raw[:, 1].astype(dtype)
+    raw_hum = raw[:, 2].astype(dtype)
+
+    # temperature
+    var1 = (raw_temp / dtype(16384.0) - k[0]) * k[1]
+    var2 = raw_temp / dtype(131072.0) - k[2]
+    var2 = var2 * var2 * k[3]
+    t_fine = np.trunc(var1 + var2).astype(np.int64)
+    temp = np.clip((var1 + var2) / dtype(5120.0), dtype(-40), dtype(85))
+
+    # pressure
+    tf = t_fine.astype(dtype)
+    var1 = (tf / dtype(2.0)) - dtype(64000.0)
+    var2 = var1 * var1 * k[4] + var1 * k[5]
+    var2 = (var2 / dtype(4.0)) + k[6]
+    var1 = (k[7] * var1 * var1 + k[8] * var1) / dtype(524288.0)
+    var1 = (dtype(1.0) + var1 / dtype(32768.0)) * k[9]
+    zero = var1 == 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = ((dtype(1048576.0) - raw_press) - (var2 / dtype(4096.0))) * dtype(6250.0) / var1
+    var1 = k[10] * p * p
+    var2 = p * k[11]
+    pressure = p + (var1 + var2 + k[12]) / dtype(16.0)
+    pressure = np.clip(pressure, dtype(30000), dtype(110000))
+    pressure[zero] = 30000  # avoid exception caused by division by zero
+
+    # humidity
+    h = tf - dtype(76800.0)
+    h = ((raw_hum - (k[13] + k[14] * h)) *
+         (k[15] * (dtype(1.0) + k[16] * h * (dtype(1.0) + k[17] * h))))
+    humidity = np.clip(h * (dtype(1.0) - k[18] * h), dtype(0), dtype(100))
+
+    return temp, pressure, humidity, t_fine
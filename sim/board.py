@@ -0,0 +1,273 @@
+# board.py The simulated weather station board behind sim/machine.py,
+# sim/esp32.py and sim/uctypes.py.  install() sets it up before any device
+# code is imported:
+#
+#   import board
+#   station = board.install(sleeps=10)
+#   import main               # runs gather_loop until the 10th lightsleep
+#
+# Time is virtual while asleep and real while awake: time.monotonic (and with
+# it ticks_ms, the fake sensors and the asyncio loop) is the real clock plus
+# everything slept so far.  time.sleep, sleep_ms, sleep_us and lightsleep
+# only move the offset, asyncio sleeps take real time.  time.time and
+# time.localtime count from `start` (UTC).  gc.mem_free and gc.mem_alloc
+# follow tracemalloc while it traces, only their changes mean anything.
+#
+# Devices: SHT4x, BME280 and AS5600 on I2C 0, the HC-12 on UART 2 with its
+# SET pin on GPIO23, the battery divider on GPIO34 and the AS5600 analog
+# output on GPIO39.  While the CPU sleeps the ULP program is not executed;
+# UlpModel does what ulp_two_pins.S does to its variables, ULP_STEP_S at a
+# time, from the wind and rain of `weather`.  A wake up ends the sleep at the
+# end of that step.
+
+import gc
+import math
+import os
+import random
+import time
+import tracemalloc
+import mptime
+from fake_sht4x import FakeSHT4xI2C, ADDRESS as SHT4X_ADDRESS
+from fake_bme280 import FakeBME280I2C, ADDRESS as BME280_ADDRESS
+from fake_as5600 import FakeAS5600I2C, ADDRESS as AS5600_ADDRESS
+from fake_hc12 import FakeHC12
+
+RTC_SLOW_MEM_BASE = 0x50000000
+RTC_SLOW_MEM_SIZE = 8192
+RTC_MEMORY_SIZE = 2048  # machine.RTC().memory()
+HEAP_SIZE = 1 << 24
+ADC_FULL_SCALE_UV = 3300000  # an ideal 12 bit ADC, 0 to 3.3V at 11dB
+ULP_SYMBOLS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'ulp_two_pins.sym')
+BATTERY_PIN = 34
+VANE_PIN = 39
+HC12_SET_PIN = 23
+ULP_STEP_S = 0.1
+
+
+class Stop(Exception):
+    "The simulation ran the requested number of sleeps."
+
+
+class Clock:
+    def __init__(self, start):
+        self.real = time.monotonic
+        self.t0 = self.real()
+        self.offset = 0.0
+        self.start = start
+
+    def monotonic(self):
+        return self.real() - self.t0 + self.offset
+
+    def sleep(self, seconds):
+        self.offset += seconds
+
+    def time(self):
+        # whole seconds like MicroPython
+        return int(self.start + self.monotonic())
+
+
+class Weather:
+    # wind in pulses per second, rain in bucket tips per hour, the vane
+    # heading in degrees.  a gusty afternoon shower by default
+    def __init__(self, wind=3.0, gust=4.0, rain=6.0, heading=250.0, seed=1):
+        self.wind_mean = wind
+        self.gust = gust
+        self.rain_rate = rain
+        self.heading = heading
+        self.rnd = random.Random(seed)
+
+    def wind(self, t):
+        return max(0.0, self.wind_mean + self.gust * math.sin(t / 37.0) * self.rnd.random())
+
+    def rain(self, t):
+        return self.rain_rate / 3600
+
+
+class UlpModel:
+    def __init__(self, board, symbols=ULP_SYMBOLS):
+        self.board = board
+        self.symbols = {}
+        self.running = False
+        self.wind_carry = 0.0
+        self.rain_carry = 0.0
+        self.second = 0.0  # into the current wind second, like wind_tick
+        self.vane_second = 0.0
+        self.load_symbols(symbols)
+        self.wind_buckets = self.symbols['vane_bins'] - self.symbols['wind_buckets']
+
+    def load_symbols(self, filename):
+        with open(filename) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    addr, name = line.split()
+                    self.symbols[name] = int(addr)
+
+    def _addr(self, name, index=0):
+        return (self.symbols[name] + index) * 4
+
+    def get(self, name, index=0):
+        a = self._addr(name, index)
+        return int.from_bytes(self.board.rtc_slow[a:a + 2], 'little')
+
+    def set(self, name, value, index=0):
+        # the ULP st instruction fills the upper half word, with the PC among
+        # other things: anything reading the whole word has to mask it
+        a = self._addr(name, index)
+        self.board.rtc_slow[a:a + 4] = ((value & 0xffff) | 0x5a5a0000).to_bytes(4, 'little')
+
+    def add(self, name, n, index=0):
+        self.set(name, self.get(name, index) + n, index)
+
+    def run(self, t, dt):
+        # dt seconds from t on, returns True if the ULP woke the cpu
+        if not self.running:
+            return False
+        board = self.board
+        ticks = self.get('wind_second_ticks') or 200
+        rate = board.weather.wind(t)
+        self.wind_carry += rate * dt
+        pulses = int(self.wind_carry)
+        self.wind_carry -= pulses
+        if pulses:
+            self.add('wind_edge_count', 2 * pulses)
+            self.add('wind_bucket_count', pulses)
+            # pulses at this rate are this many ticks apart
+            gap = max(1, int(ticks / rate))
+            low = self.get('wind_pulse_min')
+            if low == 0 or gap < low:
+                self.set('wind_pulse_min', gap)
+        self.second += dt
+        if self.second >= 1.0 - 1e-9:
+            self.second -= 1.0
+            seq = self.get('wind_bucket_seq')
+            self.set('wind_buckets', self.get('wind_bucket_count'), seq % self.wind_buckets)
+            self.set('wind_bucket_seq', seq + 1)
+            self.set('wind_bucket_count', 0)
+            total = sum(self.get('wind_buckets', (seq - i) % self.wind_buckets) for i in range(3))
+            wait = self.get('wind_sum_wait')
+            if wait:
+                self.set('wind_sum_wait', wait - 1)
+            else:
+                if total > self.get('wind_gust_sum'):
+                    self.set('wind_gust_sum', total)
+                if total < self.get('wind_lull_sum'):
+                    self.set('wind_lull_sum', total)
+
+        self.rain_carry += board.weather.rain(t) * dt
+        tips = int(self.rain_carry)
+        self.rain_carry -= tips
+        self.add('rain_edge_count', 2 * tips)
+
+        vane_ticks = self.get('vane_sample_ticks')
+        if vane_ticks:
+            self.vane_second += dt
+            if self.vane_second >= vane_ticks / ticks - 1e-9:
+                self.vane_second = 0.0
+                seq = self.get('wind_bucket_seq')
+                weight = 1 + self.get('wind_buckets', (seq - 1) % self.wind_buckets)
+                self.add('vane_bins', weight, board.adc_raw(VANE_PIN) >> 6)
+                self.add('vane_samples', 1)
+
+        if self.get('wake_armed') and board.wake_on_ulp:
+            reason = 0
+            edges = self.get('rain_wake_edges')
+            low = self.get('wind_pulse_min')
+            if edges and self.get('rain_edge_count') >= edges:
+                reason = 1
+            elif self.get('wind_wake_ticks') and low and low < self.get('wind_wake_ticks'):
+                reason = 2
+            if reason:
+                self.set('wake_reason', reason)
+                self.set('wake_armed', 0)
+                return True
+        return False
+
+
+class Board:
+    def __init__(self, sleeps=None, start=1718236800, battery=3.9, weather=None, seed=1):
+        self.clock = Clock(start)
+        self.rnd = random.Random(seed)
+        self.sleeps_left = sleeps
+        self.battery = battery  # volts at the pack
+        self.weather = weather or Weather(seed=seed)
+        self.i2c = {
+            SHT4X_ADDRESS: FakeSHT4xI2C(),
+            BME280_ADDRESS: FakeBME280I2C(),
+            AS5600_ADDRESS: FakeAS5600I2C(heading=self.weather.heading, seed=seed),
+        }
+        self.i2c_transactions = 0
+        self.uart = {2: FakeHC12()}
+        self.pins = {HC12_SET_PIN: self.uart[2].set_pin}
+        self.rtc_slow = bytearray(RTC_SLOW_MEM_SIZE)
+        self.rtc_memory = b''
+        self.ulp = UlpModel(self)
+        self.wake_on_ulp = False
+        # one dict per lightsleep: awake and slept seconds, woken by the ulp,
+        # bytes sent over the air and I2C transactions while awake.  hooks
+        # are called with it before the sleep, also before the sleep that
+        # raises Stop
+        self.cycles = []
+        self.hooks = []
+        self.awake_since = self.clock.monotonic()
+        self.tx_seen = 0
+
+    def adc_uv(self, pin):
+        if pin == BATTERY_PIN:
+            # halved by the divider, a little noise
+            return int(self.battery / 2 * 1000000 + self.rnd.gauss(0, 2000))
+        if pin == VANE_PIN:
+            return int(self.i2c[AS5600_ADDRESS].out_volts() * 1000000)
+        return 0
+
+    def adc_raw(self, pin):
+        return min(4095, self.adc_uv(pin) * 4096 // ADC_FULL_SCALE_UV)
+
+    def tx_bytes(self):
+        return sum(len(frame) for t, frame in self.uart[2].sent)
+
+    def lightsleep(self, ms):
+        t = self.clock.monotonic()
+        tx = self.tx_bytes()
+        cycle = {'awake': t - self.awake_since, 'tx_bytes': tx - self.tx_seen,
+                 'i2c': self.i2c_transactions, 'slept': 0.0, 'woken': False}
+        self.tx_seen = tx
+        self.i2c_transactions = 0
+        self.cycles.append(cycle)
+        for hook in self.hooks:
+            hook(cycle)
+        if self.sleeps_left is not None:
+            if self.sleeps_left <= 0:
+                raise Stop()
+            self.sleeps_left -= 1
+        seconds = ms / 1000
+        slept = 0.0
+        while slept < seconds:
+            dt = min(ULP_STEP_S, seconds - slept)
+            slept += dt
+            if self.ulp.run(t + slept, dt):
+                cycle['woken'] = True
+                break
+        cycle['slept'] = slept
+        self.clock.sleep(slept)
+        self.awake_since = self.clock.monotonic()
+
+
+board = None
+_gmtime = time.gmtime
+
+
+def install(**kwargs):
+    # patch the time module onto the board's clock, add gc.mem_free and
+    # return the board
+    global board
+    board = Board(**kwargs)
+    clock = board.clock
+    time.monotonic = clock.monotonic
+    time.sleep = clock.sleep
+    time.time = clock.time
+    time.localtime = lambda secs=None: _gmtime(clock.time() if secs is None else secs)
+    mptime.install()
+    gc.mem_alloc = lambda: tracemalloc.get_traced_memory()[0]
+    gc.mem_free = lambda: HEAP_SIZE - gc.mem_alloc()
+    return board
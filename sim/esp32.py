@@ -0,0 +1,46 @@
+# esp32.py The esp32 module on the simulated board (sim/board.py): ULP and
+# wake_on_ulp.  load_binary() puts the program into the board's RTC slow
+# memory like the real one, but run() starts board.UlpModel instead of
+# executing it: the model updates the program's variables while the cpu
+# sleeps.
+
+import struct
+import board as _board
+
+ULP_MAGIC = 0x00706c75  # 'ulp\0'
+_HEADER = '<IHHHH'  # magic, text offset, text, data and bss size in bytes
+
+
+class ULP:
+    RESERVE_MEM = 2040  # CONFIG_ULP_COPROC_RESERVE_MEM of the MicroPython firmware
+
+    def __init__(self):
+        self.period = {}
+
+    def set_wakeup_period(self, period_index, period_us):
+        self.period[period_index] = period_us
+
+    def load_binary(self, load_addr, program_binary):
+        # load_addr in words
+        magic, text_offset, text_size, data_size, bss_size = struct.unpack_from(_HEADER, program_binary)
+        if magic != ULP_MAGIC:
+            raise ValueError("not a ULP binary")
+        start = load_addr * 4
+        end = start + text_size + data_size + bss_size
+        # ESP-IDF only checks text and data, a bss past the reservation would
+        # silently overwrite the RTC memory data behind it
+        if end > self.RESERVE_MEM:
+            raise ValueError("ULP program needs {} bytes, {} reserved".format(end, self.RESERVE_MEM))
+        mem = _board.board.rtc_slow
+        mem[start:start + text_size + data_size] = program_binary[text_offset:text_offset + text_size + data_size]
+        mem[start + text_size + data_size:end] = bytes(bss_size)
+
+    def run(self, entry_point):
+        model = _board.board.ulp
+        model.entry = entry_point
+        model.period_us = self.period.get(0)
+        model.running = True
+
+
+def wake_on_ulp(wake):
+    _board.board.wake_on_ulp = bool(wake)
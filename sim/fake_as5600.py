@@ -0,0 +1,69 @@
+# fake_as5600.py An AS5600 on a wind vane, on a fake I2C bus.  The vane
+# swings around `heading` degrees; in LPM3 the angle register only follows it
+# every 100ms, in NOM on every read.  Counts the I2C transactions.  The OUT
+# pin follows the angle as set by the OUTS bits of CONF, see out_volts().
+
+import random
+import time
+
+ADDRESS = 0x36
+POLL_S = {0: 0.0, 1: 0.005, 2: 0.02, 3: 0.1}  # power mode: polling time
+VDD = 3.3
+
+
+class FakeAS5600I2C:
+    def __init__(self, heading=0.0, swing=30.0, seed=1):
+        self.heading = heading
+        self.swing = swing
+        self.rnd = random.Random(seed)
+        self.conf = bytearray(2)
+        self.raw = 0
+        self.sampled_at = None
+        self.transactions = 0
+
+    def _sample(self):
+        now = time.monotonic()
+        poll = POLL_S[self.conf[1] & 3]
+        if self.sampled_at is None or now - self.sampled_at >= poll:
+            angle = (self.heading + self.rnd.gauss(0, self.swing)) % 360
+            self.raw = int(angle / 360 * 4096) & 0x0fff
+            self.sampled_at = now
+
+    def writeto_mem(self, addr, reg, buf):
+        self.transactions += 1
+        if addr != ADDRESS:
+            raise OSError(19)
+        if reg == 0x07:
+            self.conf[:] = buf[:2]
+
+    def writeto(self, addr, buf, stop=True):
+        self.transactions += 1
+        if addr != ADDRESS:
+            raise OSError(19)
+        self.reg = buf[0]
+
+    def readfrom(self, addr, n):
+        buf = bytearray(n)
+        self.readfrom_mem_into(addr, self.reg, buf)
+        return bytes(buf)
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        self.transactions += 1
+        if addr != ADDRESS:
+            raise OSError(19)
+        self._sample()
+        if reg == 0x0E:
+            buf[0] = self.raw >> 8
+            buf[1] = self.raw & 0xff
+
+    def out_volts(self):
+        # voltage on OUT: 0 to 100% of VDD over the circle, 10 to 90% with the
+        # reduced range.  PWM reads as its average
+        self._sample()
+        outs = (self.conf[1] >> 4) & 3
+        frac = self.raw / 4096
+        if outs == 1:
+            frac = 0.1 + 0.8 * frac
+        elif outs == 2:
+            frac = (128 + frac * 4095) / 4351
+        return frac * VDD
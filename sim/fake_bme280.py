@@ -0,0 +1,65 @@
+# fake_bme280.py A BME280 on a fake I2C bus: calibration registers, control
+# registers, the measuring bit in status and the burst data registers.  A
+# forced conversion takes the datasheet maximum time for the oversampling
+# written to the control registers.
+
+import struct
+import time
+
+ADDRESS = 0x76
+
+# BMP280 datasheet 3.12 worked example for T and P, humidity terms of a
+# typical part
+CALIBRATION = dict(T1=27504, T2=26435, T3=-1000, P1=36477, P2=-10685, P3=3024,
+                   P4=2855, P5=140, P6=-7, P7=15500, P8=-14600, P9=6000,
+                   H1=75, H2=362, H3=0, H4=324, H5=0, H6=30)
+
+
+class FakeBME280I2C:
+    def __init__(self, raw=(519888, 415148, 30000), cal=CALIBRATION):
+        self.raw = raw  # temperature, pressure, humidity adc values
+        self.regs = bytearray(256)
+        c = cal
+        self.regs[0x88:0x88 + 26] = struct.pack(
+            "<HhhHhhhhhhhhBB", c['T1'], c['T2'], c['T3'], c['P1'], c['P2'], c['P3'],
+            c['P4'], c['P5'], c['P6'], c['P7'], c['P8'], c['P9'], 0, c['H1'])
+        h4, h5 = c['H4'], c['H5']
+        self.regs[0xE1:0xE1 + 7] = struct.pack(
+            "<hBBBBb", c['H2'], c['H3'], (h4 >> 4) & 0xFF,
+            (h4 & 0xF) | ((h5 & 0xF) << 4), (h5 >> 4) & 0xFF, c['H6'])
+        self.ready_at = 0
+        self.conversions = 0
+
+    def _measuring(self):
+        return time.monotonic() < self.ready_at
+
+    def _load_data(self):
+        t, p, h = self.raw
+        self.regs[0xF7:0xFA] = (p << 4).to_bytes(3, 'big')
+        self.regs[0xFA:0xFD] = (t << 4).to_bytes(3, 'big')
+        self.regs[0xFD:0xFF] = h.to_bytes(2, 'big')
+
+    def writeto_mem(self, addr, reg, buf):
+        if addr != ADDRESS:
+            raise OSError(19)
+        for i, b in enumerate(buf):
+            self.regs[reg + i] = b
+        if reg == 0xF4 and buf[0] & 3 == 1:
+            osrs = [(1 << (v - 1)) if v else 0 for v in
+                    (buf[0] >> 5, (buf[0] >> 2) & 7, self.regs[0xF2] & 7)]
+            us = 1250 + 2300 * osrs[0] + (2300 * osrs[1] + 575 if osrs[1] else 0) \
+                + (2300 * osrs[2] + 575 if osrs[2] else 0)
+            self.ready_at = time.monotonic() + us / 1000000
+            self.conversions += 1
+            self._load_data()
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        if addr != ADDRESS:
+            raise OSError(19)
+        self.regs[0xF3] = 0x08 if self._measuring() else 0
+        buf[:] = self.regs[reg:reg + len(buf)]
+
+    def readfrom_mem(self, addr, reg, n):
+        buf = bytearray(n)
+        self.readfrom_mem_into(addr, reg, buf)
+        return bytes(buf)
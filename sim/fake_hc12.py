@@ -0,0 +1,118 @@
+# fake_hc12.py An HC-12 radio behind a UART, for running hc12.HC12 on Linux.
+# The UART methods used by the driver (write, read, any, txdone) are
+# implemented with the module's timing taken from the datasheet:
+#  * for CMD_ENTER_MS after SET goes low the module is still transparent,
+#    bytes written then go over the air
+#  * answers come ANSWER_MS after the command
+#  * the module sleeps after AT+SLEEP once SET goes high, and wakes when SET
+#    goes low again
+# Frames written in transparent mode while awake are kept in `sent`.
+
+import time
+
+CMD_ENTER_MS = 40
+ANSWER_MS = 5
+
+
+def _ms():
+    return time.monotonic() * 1000
+
+
+class FakePin:
+    def __init__(self, hc12):
+        self.hc12 = hc12
+        self._value = 1
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        v = 1 if v else 0
+        if v != self._value:
+            self._value = v
+            self.hc12._set_changed(v)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+
+class FakeHC12:
+    def __init__(self, baudrate=9600):
+        self.baudrate = baudrate
+        self.set_pin = FakePin(self)
+        self.asleep = False
+        self.sleep_pending = False
+        self.cmd_since = None
+        self.rx = []  # (ready time, bytes) answers waiting for the driver
+        self.tx_done_at = 0
+        self.sent = []  # (time, frame) transmitted over the air
+        self.commands = []  # (time, command) answered AT commands
+        self.power = 'P8'
+
+    def _set_changed(self, v):
+        if v == 0:
+            self.asleep = False
+            self.cmd_since = _ms()
+        else:
+            self.cmd_since = None
+            if self.sleep_pending:
+                self.sleep_pending = False
+                self.asleep = True
+
+    def _serial_ms(self, n):
+        return n * 10000 / self.baudrate
+
+    # UART interface
+    def write(self, buf):
+        now = _ms()
+        buf = bytes(buf)
+        self.tx_done_at = max(now, self.tx_done_at) + self._serial_ms(len(buf))
+        if self.cmd_since is not None and now - self.cmd_since >= CMD_ENTER_MS:
+            self._answer(buf, self.tx_done_at)
+        elif not self.asleep:
+            self.sent.append((now, buf))
+        return len(buf)
+
+    def _answer(self, cmd, at):
+        if cmd == b'AT':
+            answer = b'OK'
+        elif cmd == b'AT+SLEEP':
+            answer = b'OK+SLEEP'
+            self.sleep_pending = True
+        elif cmd.startswith(b'AT+P') and len(cmd) == 5:
+            self.power = cmd[3:].decode()
+            answer = b'OK+' + cmd[3:]
+        else:
+            answer = b'ERROR'
+        self.commands.append((at, cmd))
+        self.rx.append((at + ANSWER_MS, answer + b'\r\n'))
+
+    def _ready(self):
+        now = _ms()
+        return b''.join(data for t, data in self.rx if t <= now)
+
+    def any(self):
+        return len(self._ready())
+
+    def read(self, n=None):
+        data = self._ready()
+        if not data:
+            return None
+        if n is not None:
+            data = data[:n]
+        # drop what was read
+        left = len(data)
+        while left:
+            t, d = self.rx[0]
+            if len(d) <= left:
+                left -= len(d)
+                self.rx.pop(0)
+            else:
+                self.rx[0] = (t, d[left:])
+                left = 0
+        return data
+
+    def txdone(self):
+        return _ms() >= self.tx_done_at
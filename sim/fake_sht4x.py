@@ -0,0 +1,45 @@
+# fake_sht4x.py An SHT4x on a fake I2C bus.  After a measure command the
+# sensor NACKs reads (OSError) until the typical measurement duration from the
+# datasheet has passed, then returns the reading with its CRCs.
+
+import time
+
+ADDRESS = 0x44
+
+# typical duration in ms per command, datasheet table 4
+TYPICAL_MS = {
+    0xFD: 6.9, 0xF6: 3.7, 0xE0: 1.3,
+    0x39: 1006.9, 0x2F: 1006.9, 0x1E: 1006.9,
+    0x32: 106.9, 0x24: 106.9, 0x15: 106.9,
+}
+
+
+def crc8(data):
+    crc = 0xFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31 if crc & 0x80 else crc << 1) & 0xFF
+    return crc
+
+
+class FakeSHT4xI2C:
+    def __init__(self, temp_ticks=26000, rh_ticks=30000):
+        self.temp_ticks = temp_ticks
+        self.rh_ticks = rh_ticks
+        self.ready_at = None
+        self.nacks = 0
+
+    def writeto(self, addr, buf, stop=True):
+        if addr != ADDRESS:
+            raise OSError(19)
+        self.ready_at = time.monotonic() + TYPICAL_MS.get(buf[0], 1) / 1000
+
+    def readfrom_into(self, addr, buf):
+        if addr != ADDRESS or self.ready_at is None or time.monotonic() < self.ready_at:
+            self.nacks += 1
+            raise OSError(19)
+        self.ready_at = None
+        t = self.temp_ticks.to_bytes(2, 'big')
+        h = self.rh_ticks.to_bytes(2, 'big')
+        buf[:6] = t + bytes([crc8(t)]) + h + bytes([crc8(h)])
@@ -0,0 +1,160 @@
+# machine.py The machine module on the simulated board (sim/board.py):
+# I2C, UART, Pin, ADC, RTC, lightsleep and the mem8/mem16/mem32 views.
+# Call board.install() before importing device code.
+
+import struct as _struct
+import time
+import board as _board
+import uctypes as _uctypes
+
+
+class I2C:
+    # transactions go to the fake device at the address, nothing there NACKs
+    def __init__(self, id, scl=None, sda=None, freq=400000):
+        self.id = id
+        self.freq = freq
+
+    def _device(self, addr):
+        b = _board.board
+        b.i2c_transactions += 1
+        try:
+            return b.i2c[addr]
+        except KeyError:
+            raise OSError(19)  # ENODEV
+
+    def scan(self):
+        return sorted(_board.board.i2c)
+
+    def writeto(self, addr, buf, stop=True):
+        return self._device(addr).writeto(addr, buf)
+
+    def readfrom(self, addr, n, stop=True):
+        return self._device(addr).readfrom(addr, n)
+
+    def readfrom_into(self, addr, buf, stop=True):
+        self._device(addr).readfrom_into(addr, buf)
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        self._device(addr).writeto_mem(addr, memaddr, buf)
+
+    def readfrom_mem(self, addr, memaddr, n, addrsize=8):
+        buf = bytearray(n)
+        self._device(addr).readfrom_mem_into(addr, memaddr, buf)
+        return bytes(buf)
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        self._device(addr).readfrom_mem_into(addr, memaddr, buf)
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    OPEN_DRAIN = 7
+    PULL_UP = 2
+    PULL_DOWN = 1
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        # pins wired to a fake device drive it, the rest just keep their level
+        self._pin = _board.board.pins.get(id)
+        self._value = 0
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        if self._pin is not None:
+            return self._pin.value(v)
+        if v is None:
+            return self._value
+        self._value = 1 if v else 0
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+
+class UART:
+    # only the UARTs the board has a device on
+    def __init__(self, id, baudrate=9600, tx=None, rx=None, **kwargs):
+        self.id = id
+        self.dev = _board.board.uart[id]
+        self.dev.baudrate = baudrate
+
+    def write(self, buf):
+        return self.dev.write(buf)
+
+    def read(self, n=None):
+        return self.dev.read(n)
+
+    def any(self):
+        return self.dev.any()
+
+    def txdone(self):
+        return self.dev.txdone()
+
+
+class ADC:
+    ATTN_0DB = 0
+    ATTN_2_5DB = 1
+    ATTN_6DB = 2
+    ATTN_11DB = 3
+
+    def __init__(self, pin, atten=ATTN_0DB):
+        self.pin = pin.id if isinstance(pin, Pin) else pin
+        self.atten = atten
+
+    def read_uv(self):
+        return _board.board.adc_uv(self.pin)
+
+    def read(self):
+        return _board.board.adc_raw(self.pin)
+
+    def read_u16(self):
+        return self.read() << 4
+
+
+class RTC:
+    def __init__(self, id=0):
+        pass
+
+    def memory(self, data=None):
+        b = _board.board
+        if data is None:
+            return b.rtc_memory
+        if len(data) > _board.RTC_MEMORY_SIZE:
+            raise ValueError("buffer too long")
+        b.rtc_memory = bytes(data)
+
+    def datetime(self):
+        tm = time.localtime()
+        return (tm[0], tm[1], tm[2], tm[6], tm[3], tm[4], tm[5], 0)
+
+
+def lightsleep(ms=None):
+    _board.board.lightsleep(ms if ms is not None else 0)
+
+
+class _Mem:
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.size = _struct.calcsize(fmt)
+
+    def __getitem__(self, addr):
+        return _struct.unpack(self.fmt, _uctypes.bytearray_at(addr, self.size))[0]
+
+    def __setitem__(self, addr, v):
+        _struct.pack_into(self.fmt, _uctypes.bytearray_at(addr, self.size), 0,
+                          v & ((1 << 8 * self.size) - 1))
+
+
+mem8 = _Mem('<B')
+mem16 = _Mem('<H')
+mem32 = _Mem('<I')
@@ -0,0 +1,13 @@
+# micropython.py Stand-in for the micropython module on CPython.
+
+
+def const(x):
+    return x
+
+
+def native(f):
+    return f
+
+
+def viper(f):
+    return f
@@ -0,0 +1,21 @@
+# mptime.py The MicroPython additions to the time module (sleep_ms, ticks_ms
+# ...), installed onto CPython's time module.  Call install() before importing
+# device code.
+
+import time
+
+_TICKS_PERIOD = 1 << 30
+
+
+def install():
+    time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+    time.sleep_us = lambda us: time.sleep(us / 1000000)
+    time.ticks_ms = lambda: int(time.monotonic() * 1000) % _TICKS_PERIOD
+    time.ticks_us = lambda: int(time.monotonic() * 1000000) % _TICKS_PERIOD
+    time.ticks_add = lambda t, delta: (t + delta) % _TICKS_PERIOD
+    time.ticks_diff = _ticks_diff
+
+
+def _ticks_diff(end, start):
+    d = (end - start) % _TICKS_PERIOD
+    return d - _TICKS_PERIOD if d >= _TICKS_PERIOD // 2 else d
@@ -0,0 +1,56 @@
+# solar_battery.py A small solar charged Li-ion pack and the station's energy
+# use, for replaying sleep schedules on Linux.  Charge is counted in mAh, the
+# voltage is the open circuit voltage for the state of charge.
+
+import math
+import random
+
+# (state of charge, volts)
+OCV = ((0.0, 3.0), (0.05, 3.3), (0.1, 3.45), (0.3, 3.62), (0.5, 3.7),
+       (0.7, 3.85), (0.9, 4.0), (1.0, 4.2))
+
+SLEEP_MA = 1.0  # lightsleep, ULP running, radio asleep
+READING_MAS = 24.0  # sensors, radio share of a batch, in mA * s per reading
+BROWNOUT_V = 3.0  # the ESP32 stops here
+RESTART_V = 3.3  # and starts again here
+
+
+def ocv(soc):
+    for (s0, v0), (s1, v1) in zip(OCV, OCV[1:]):
+        if soc <= s1:
+            return v0 + (v1 - v0) * (max(soc, 0.0) - s0) / (s1 - s0)
+    return OCV[-1][1]
+
+
+class SolarBattery:
+    def __init__(self, capacity_mah=300, soc=0.5, panel_ma=15, seed=1, cloudy_days=()):
+        self.capacity = capacity_mah
+        self.charge = capacity_mah * soc
+        self.panel_ma = panel_ma
+        self.cloudy_days = cloudy_days
+        self.rnd = random.Random(seed)
+        self.running = True
+
+    def solar_ma(self, t):
+        # clear sky half sine from 7:00 to 19:00, a tenth of it on cloudy days
+        day, hour = divmod(t / 3600, 24)
+        if not 7 <= hour <= 19:
+            return 0.0
+        ma = self.panel_ma * math.sin(math.pi * (hour - 7) / 12)
+        return ma * (0.1 if int(day) in self.cloudy_days else 1.0)
+
+    @property
+    def voltage(self):
+        return ocv(self.charge / self.capacity)
+
+    def step(self, t, seconds, reading):
+        # advance `seconds` from t, sleeping, after one reading if `reading`
+        used = SLEEP_MA * seconds / 3600 + (READING_MAS / 3600 if reading and self.running else 0)
+        gained = sum(self.solar_ma(t + s) for s in range(0, int(seconds), 10)) * 10 / 3600
+        self.charge = min(self.capacity, max(0.0, self.charge + gained - used))
+        v = self.voltage
+        if self.running and v < BROWNOUT_V + 0.01:
+            self.running = False
+        elif not self.running and v >= RESTART_V:
+            self.running = True
+        return used
@@ -0,0 +1,49 @@
+# uasyncio.py The parts of the MicroPython uasyncio API used by the device
+# code, on top of CPython asyncio.  Put sim/ on sys.path to run device modules
+# on Linux.
+
+import asyncio as _asyncio
+from asyncio import *  # noqa: F401,F403  run, create_task, Lock, TimeoutError...
+
+TimeoutError = _asyncio.TimeoutError
+
+
+async def sleep_ms(ms):
+    await _asyncio.sleep(ms / 1000)
+
+
+async def wait_for_ms(aw, ms):
+    return await _asyncio.wait_for(aw, ms / 1000)
+
+
+# MicroPython streams poll the device, here the device is polled every ms
+class StreamReader:
+    def __init__(self, dev, extra=None):
+        self.dev = dev
+
+    async def read(self, n=-1):
+        while not self.dev.any():
+            await _asyncio.sleep(0.001)
+        return self.dev.read(n if n > 0 else None)
+
+    async def readline(self):
+        line = b''
+        while not line.endswith(b'\n'):
+            while not self.dev.any():
+                await _asyncio.sleep(0.001)
+            line += self.dev.read(1)
+        return line
+
+
+class StreamWriter(StreamReader):
+    def __init__(self, dev, extra=None):
+        super().__init__(dev)
+        self.out = b''
+
+    def write(self, buf):
+        self.out += bytes(buf)
+
+    async def drain(self):
+        out, self.out = self.out, b''
+        self.dev.write(out)
+        await _asyncio.sleep(0)
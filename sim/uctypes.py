@@ -0,0 +1,130 @@
+# uctypes.py The parts of MicroPython's uctypes used by the device code:
+# scalar and array fields, struct(), bytearray_at() and addressof().
+#
+# Addresses are fake.  RTC slow memory at board.RTC_SLOW_MEM_BASE is the
+# board's bytearray, addressof() hands out an address for any other buffer
+# and keeps it alive so struct() and bytearray_at() can find it again.
+
+import struct as _struct
+import board as _board
+
+LITTLE_ENDIAN = 0
+BIG_ENDIAN = 1
+NATIVE = 2
+
+# scalar types in the top bits, offsets (or array lengths) in the low 17
+_TYPE_SHIFT = 27
+_OFFSET_MASK = (1 << 17) - 1
+UINT8 = 0 << _TYPE_SHIFT
+INT8 = 1 << _TYPE_SHIFT
+UINT16 = 2 << _TYPE_SHIFT
+INT16 = 3 << _TYPE_SHIFT
+UINT32 = 4 << _TYPE_SHIFT
+INT32 = 5 << _TYPE_SHIFT
+UINT64 = 6 << _TYPE_SHIFT
+INT64 = 7 << _TYPE_SHIFT
+FLOAT32 = 8 << _TYPE_SHIFT
+FLOAT64 = 9 << _TYPE_SHIFT
+ARRAY = 1 << 31
+
+_FORMATS = 'BbHhIiQqfd'
+_ENDIAN = '<>='
+
+_buffers = {}  # address: buffer from addressof()
+_next_addr = 0x3ffb0000
+
+
+def addressof(buf):
+    global _next_addr
+    for addr, b in _buffers.items():
+        if b is buf:
+            return addr
+    addr = _next_addr
+    _buffers[addr] = buf
+    _next_addr += (len(buf) + 15) & ~15
+    return addr
+
+
+def _view(addr, size):
+    # memoryview of size bytes at addr
+    base = _board.RTC_SLOW_MEM_BASE
+    if base <= addr and addr + size <= base + _board.RTC_SLOW_MEM_SIZE:
+        return memoryview(_board.board.rtc_slow)[addr - base:addr - base + size]
+    for start, buf in _buffers.items():
+        if start <= addr and addr + size <= start + len(buf):
+            return memoryview(buf)[addr - start:addr - start + size]
+    raise ValueError("no memory at 0x{:08x}".format(addr))
+
+
+def bytearray_at(addr, size):
+    return _view(addr, size)
+
+
+def _format(desc, layout_type):
+    return _ENDIAN[layout_type] + _FORMATS[(desc >> _TYPE_SHIFT) & 15]
+
+
+def sizeof(layout, layout_type=NATIVE):
+    end = 0
+    for desc in layout.values():
+        if isinstance(desc, tuple):
+            fmt = _format(desc[1], layout_type)
+            end = max(end, (desc[0] & _OFFSET_MASK) + _struct.calcsize(fmt) * (desc[1] & _OFFSET_MASK))
+        else:
+            end = max(end, (desc & _OFFSET_MASK) + _struct.calcsize(_format(desc, layout_type)))
+    return end
+
+
+class _Array:
+    def __init__(self, mem, fmt, n):
+        self._mem = mem
+        self._fmt = fmt
+        self._size = _struct.calcsize(fmt)
+        self._n = n
+
+    def __len__(self):
+        return self._n
+
+    def _offset(self, i):
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError
+        return i * self._size
+
+    def __getitem__(self, i):
+        return _struct.unpack_from(self._fmt, self._mem, self._offset(i))[0]
+
+    def __setitem__(self, i, v):
+        _struct.pack_into(self._fmt, self._mem, self._offset(i), v)
+
+
+class struct:
+    def __init__(self, addr, layout, layout_type=NATIVE):
+        d = self.__dict__
+        d['_mem'] = _view(addr, sizeof(layout, layout_type))
+        d['_layout'] = layout
+        d['_type'] = layout_type
+
+    def __getattr__(self, name):
+        try:
+            desc = self._layout[name]
+        except KeyError:
+            raise AttributeError(name)
+        if isinstance(desc, tuple):
+            offset = desc[0] & _OFFSET_MASK
+            return _Array(self._mem[offset:], _format(desc[1], self._type), desc[1] & _OFFSET_MASK)
+        return _struct.unpack_from(_format(desc, self._type), self._mem, desc & _OFFSET_MASK)[0]
+
+    def __setattr__(self, name, v):
+        try:
+            desc = self._layout[name]
+        except KeyError:
+            raise AttributeError(name)
+        if isinstance(desc, tuple):
+            raise TypeError("can't assign to an array field")
+        fmt = _format(desc, self._type)
+        # stores truncate like on the device
+        if fmt[-1] in 'BHIQ':
+            v &= (1 << 8 * _struct.calcsize(fmt)) - 1
+        _struct.pack_into(fmt, self._mem, desc & _OFFSET_MASK, v)
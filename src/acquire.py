@@ -0,0 +1,37 @@
+import time
+import uasyncio as asyncio
+
+# Acquisition scheduler.  Every sensor is registered with a trigger that starts
+# its conversion and returns the time in ms until the result is ready, and a
+# collect that reads the result.  run() triggers all sensors first, then
+# collects each one as soon as its conversion time has passed, so a cycle
+# takes about as long as the slowest sensor instead of the sum of them all.
+# Sensors that read instantly (ADC, AS5600) have no trigger.  Waits run to
+# each conversion's deadline, so time spent in blocking collects (the ADC
+# oversampling, an AS5600 burst) overlaps the conversions still running.
+
+class ACQUISITION:
+    def __init__(self):
+        self.sensors = []
+
+    def add(self, name, trigger, collect):
+        self.sensors.append((name, trigger, collect))
+
+    async def run(self, result=None):
+        # returns a dict of name: collected value, result is reused if given
+        if result is None:
+            result = {}
+        waits = []
+        for name, trigger, collect in self.sensors:
+            wait_ms = trigger() if trigger is not None else 0
+            # deadlines in us: ticks_ms truncates, a deadline from it could
+            # come up to a millisecond before the conversion is done
+            waits.append((wait_ms, time.ticks_add(time.ticks_us(), wait_ms * 1000), name, collect))
+        waits.sort(key=lambda w: w[0])
+        for wait_ms, deadline, name, collect in waits:
+            left = time.ticks_diff(deadline, time.ticks_us())
+            if left > 0:
+                # other tasks (the radio wake up) run while sensors convert
+                await asyncio.sleep_ms((left + 999) // 1000)
+            result[name] = collect()
+        return result
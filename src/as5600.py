@@ -1,30 +1,73 @@
 from micropython import const
+from math import atan2, cos, sin, sqrt, pi
+import time
 
 AS5600_ADDRESS = const(0x36)   # AS5600 has a fixed address (so can only use one per I2C bus?)
+CONF = const(0x07)             # Configuration register (2 bytes)
 ANGLE_H	= const(0x0E)          # Angle register (high byte)
 ANGLE_L	= const(0x0F)          # Angle register (low byte)
 zero_correction = const(0)   # what the as5600 reads at North on the windvane.
 
+# power modes, CONF bits 1:0.  LPM3 polls the magnet every 100ms, NOM
+# continuously
+AS5600_PM_NOM = const(0)
+AS5600_PM_LPM3 = const(3)
+BURST_INTERVAL_US = const(4000)
+# OUT pin, CONF bits 5:4.  analog 0 to 100% or 10 to 90% of VDD, or PWM
+AS5600_OUT_ANALOG = const(0)
+AS5600_OUT_ANALOG_REDUCED = const(1)
+AS5600_OUT_PWM = const(2)
+
+RAW_TO_RADIANS = 2 * pi / 4096
+
+
+def circular_mean(raw, n=None):
+    # mean direction of n raw 12 bit angles as (degrees, r).  r is the length
+    # of the mean unit vector: 1 when all samples agree, near 0 when they
+    # spread around the circle
+    if n is None:
+        n = len(raw)
+    x = y = 0.0
+    for i in range(n):
+        a = raw[i] * RAW_TO_RADIANS
+        x += cos(a)
+        y += sin(a)
+    r = sqrt(x * x + y * y) / n
+    angle = atan2(y, x) * 180 / pi - zero_correction
+    return angle % 360, r
+
+
 class AS5600:
-    def __init__(self, i2c=None):
+    def __init__(self, i2c=None, output=AS5600_OUT_ANALOG):
 
         if i2c is None:
             raise ValueError('An I2C object is required.')
         self.i2c = i2c
+        self.output = output
+        self._buf = bytearray(2)
         # set power mode to lowest
-        conf = b'\x00\x03'
-        self.i2c.writeto_mem(AS5600_ADDRESS, 0x07, conf)
+        self.set_power_mode(AS5600_PM_LPM3)
+
+    def set_power_mode(self, mode):
+        self._buf[0] = 0x00
+        self._buf[1] = (self.output << 4) | mode
+        self.i2c.writeto_mem(AS5600_ADDRESS, CONF, self._buf)
 
     def getnReg(self, reg, n):
         self.i2c.writeto(AS5600_ADDRESS, bytearray([reg]))
         t =	self.i2c.readfrom(AS5600_ADDRESS, n)
         return t
 
+    def getRawAngle(self):
+        # 12 bit angle, read into the driver's buffer
+        buf = self._buf
+        self.i2c.readfrom_mem_into(AS5600_ADDRESS, ANGLE_H, buf)
+        return ((buf[0] << 8) | buf[1]) & 0x0fff
+
     # main function to get angle information
     def getAngle(self):
-        buf = self.getnReg(ANGLE_H, 2)
         #return ((buf[0]<<8) | buf[1])/ 4096.0*360
-        angle = int(((buf[0]<<8) | buf[1])/ 4096.0*360)
+        angle = int(self.getRawAngle() / 4096.0 * 360)
 
         if angle >= zero_correction:
             angle = angle - zero_correction
@@ -32,3 +75,15 @@ class AS5600:
             angle = angle - zero_correction
             angle = angle + 360
         return angle
+
+    def read_burst(self, raw, interval_us=BURST_INTERVAL_US):
+        # fill raw (e.g. array('H')) with 12 bit angles interval_us apart.  the
+        # magnet is only polled every 100ms in LPM3, so the burst runs in NOM
+        self.set_power_mode(AS5600_PM_NOM)
+        try:
+            for i in range(len(raw)):
+                time.sleep_us(interval_us)
+                raw[i] = self.getRawAngle()
+        finally:
+            self.set_power_mode(AS5600_PM_LPM3)
+        return raw
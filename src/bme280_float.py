@@ -41,7 +41,9 @@
 #
 
 import time
-from ustruct import unpack, unpack_from
+import micropython
+from micropython import const
+from struct import unpack, unpack_from
 from array import array
 
 # BME280 default address.
@@ -57,6 +59,14 @@ BME280_OSAMPLE_16 = 5
 BME280_REGISTER_CONTROL_HUM = 0xF2
 BME280_REGISTER_STATUS = 0xF3
 BME280_REGISTER_CONTROL = 0xF4
+BME280_REGISTER_CONFIG = 0xF5
+
+# IIR filter coefficients
+BME280_FILTER_OFF = 0
+BME280_FILTER_2 = 1
+BME280_FILTER_4 = 2
+BME280_FILTER_8 = 3
+BME280_FILTER_16 = 4
 
 MODE_SLEEP = const(0)
 MODE_FORCED = const(1)
@@ -64,6 +74,65 @@ MODE_NORMAL = const(3)
 
 BME280_TIMEOUT = const(100)  # about 1 second timeout
 
+
+# Calibration terms as used by _compensate, folded once at init.  Only
+# power of two scale factors are folded into the coefficients, which is exact
+# in binary floating point, so results match the datasheet formulas bit for bit.
+def _calibration(t1, t2, t3, p1, p2, p3, p4, p5, p6, p7, p8, p9,
+                 h1, h2, h3, h4, h5, h6):
+    return array("f", (
+        t1 / 1024.0, t2, t1 / 8192.0, t3,                   # 0..3 temperature
+        p6 / 32768.0, p5 * 2.0, p4 * 65536.0, p3 / 524288.0,  # 4..7 pressure
+        p2, p1, p9 / 2147483648.0, p8 / 32768.0, p7,          # 8..12
+        h4 * 64.0, h5 / 16384.0, h2 / 65536.0,              # 13..15 humidity
+        h6 / 67108864.0, h3 / 67108864.0, h1 / 524288.0))   # 16..18
+
+
+# Datasheet 8.1 floating point compensation on raw (temp, press, hum), results
+# go to out in the same order.  Only locals and array indexing, no attribute
+# lookups, so it compiles with the native emitter.  Returns t_fine.
+@micropython.native
+def _compensate(cal, raw, out):
+    raw_temp = raw[0]
+    raw_press = raw[1]
+    raw_hum = raw[2]
+
+    # temperature
+    var1 = (raw_temp / 16384.0 - cal[0]) * cal[1]
+    var2 = raw_temp / 131072.0 - cal[2]
+    var2 = var2 * var2 * cal[3]
+    t_fine = int(var1 + var2)
+    temp = (var1 + var2) / 5120.0
+    out[0] = max(-40, min(85, temp))
+
+    # pressure
+    var1 = (t_fine / 2.0) - 64000.0
+    var2 = var1 * var1 * cal[4] + var1 * cal[5]
+    var2 = (var2 / 4.0) + cal[6]
+    var1 = (cal[7] * var1 * var1 + cal[8] * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * cal[9]
+    if (var1 == 0.0):
+        out[1] = 30000  # avoid exception caused by division by zero
+    else:
+        p = ((1048576.0 - raw_press) - (var2 / 4096.0)) * 6250.0 / var1
+        var1 = cal[10] * p * p
+        var2 = p * cal[11]
+        pressure = p + (var1 + var2 + cal[12]) / 16.0
+        out[1] = max(30000, min(110000, pressure))
+
+    # humidity
+    h = (t_fine - 76800.0)
+    h = ((raw_hum - (cal[13] + cal[14] * h)) *
+         (cal[15] * (1.0 + cal[16] * h * (1.0 + cal[17] * h))))
+    humidity = h * (1.0 - cal[18] * h)
+    if (humidity < 0):
+        humidity = 0
+    if (humidity > 100):
+        humidity = 100.0
+    out[2] = humidity
+    return t_fine
+
+
 class BME280:
 
     def __init__(self,
@@ -71,21 +140,7 @@ class BME280:
                  address=BME280_I2CADDR,
                  i2c=None,
                  **kwargs):
-        # Check that mode is valid.
-        if type(mode) is tuple and len(mode) == 3:
-            self._mode_hum, self._mode_temp, self._mode_press = mode
-        elif type(mode) == int:
-            self._mode_hum, self._mode_temp, self._mode_press = mode, mode, mode
-        else:
-            raise ValueError("Wrong type for the mode parameter, must be int or a 3 element tuple")
-
-        for mode in (self._mode_hum, self._mode_temp, self._mode_press):
-            if mode not in [BME280_OSAMPLE_1, BME280_OSAMPLE_2, BME280_OSAMPLE_4,
-                            BME280_OSAMPLE_8, BME280_OSAMPLE_16]:
-                raise ValueError(
-                    'Unexpected mode value {0}. Set mode to one of '
-                    'BME280_ULTRALOWPOWER, BME280_STANDARD, BME280_HIGHRES, or '
-                    'BME280_ULTRAHIGHRES'.format(mode))
+        self.set_oversampling(mode)
 
         self.address = address
         if i2c is None:
@@ -107,17 +162,63 @@ class BME280:
         # unfold H4, H5, keeping care of a potential sign
         self.dig_H4 = (self.dig_H4 * 16) + (self.dig_H5 & 0xF)
         self.dig_H5 //= 16
+        self._cal = _calibration(
+            self.dig_T1, self.dig_T2, self.dig_T3, self.dig_P1, self.dig_P2,
+            self.dig_P3, self.dig_P4, self.dig_P5, self.dig_P6, self.dig_P7,
+            self.dig_P8, self.dig_P9, self.dig_H1, self.dig_H2, self.dig_H3,
+            self.dig_H4, self.dig_H5, self.dig_H6)
 
         # temporary data holders which stay allocated
         self._l1_barray = bytearray(1)
         self._l8_barray = bytearray(8)
         self._l3_resultarray = array("i", [0, 0, 0])
+        self._l3_floatarray = array("f", [0, 0, 0])
 
         self._l1_barray[0] = self._mode_temp << 5 | self._mode_press << 2 | MODE_SLEEP
         self.i2c.writeto_mem(self.address, BME280_REGISTER_CONTROL,
                              self._l1_barray)
         self.t_fine = 0
 
+    def set_oversampling(self, mode):
+        """ Sets the oversampling used by the next conversion.
+
+            Args:
+                mode: BME280_OSAMPLE_x for all channels, or a tuple of
+                (humidity, temperature, pressure) settings
+        """
+        # Check that mode is valid.
+        if type(mode) is tuple and len(mode) == 3:
+            modes = mode
+        elif type(mode) == int:
+            modes = mode, mode, mode
+        else:
+            raise ValueError("Wrong type for the mode parameter, must be int or a 3 element tuple")
+
+        for mode in modes:
+            if mode not in [BME280_OSAMPLE_1, BME280_OSAMPLE_2, BME280_OSAMPLE_4,
+                            BME280_OSAMPLE_8, BME280_OSAMPLE_16]:
+                raise ValueError(
+                    'Unexpected mode value {0}. Set mode to one of '
+                    'BME280_ULTRALOWPOWER, BME280_STANDARD, BME280_HIGHRES, or '
+                    'BME280_ULTRAHIGHRES'.format(mode))
+        self._mode_hum, self._mode_temp, self._mode_press = modes
+
+    def set_filter(self, coefficient):
+        """ Sets the IIR filter on pressure and temperature. In forced
+            mode the filter runs across consecutive conversions.
+
+            Args:
+                coefficient: one of BME280_FILTER_OFF .. BME280_FILTER_16
+        """
+        if coefficient not in (BME280_FILTER_OFF, BME280_FILTER_2, BME280_FILTER_4,
+                               BME280_FILTER_8, BME280_FILTER_16):
+            raise ValueError('Unexpected filter value {0}'.format(coefficient))
+        # config is only written while the sensor sleeps, which it does
+        # between forced conversions
+        self._l1_barray[0] = coefficient << 2
+        self.i2c.writeto_mem(self.address, BME280_REGISTER_CONFIG,
+                             self._l1_barray)
+
     def read_raw_data(self, result):
         """ Reads the raw (uncompensated) data from the sensor.
 
@@ -128,16 +229,42 @@ class BME280:
                 None
         """
 
+        time.sleep_ms(self.start_forced())
+        self.read_forced(result)
+
+    def start_forced(self):
+        """ Starts one forced mode conversion without waiting for it.
+
+            Returns:
+                maximum conversion time in ms for the oversampling
+                settings, after which read_forced() can collect the result
+        """
         self._l1_barray[0] = self._mode_hum
         self.i2c.writeto_mem(self.address, BME280_REGISTER_CONTROL_HUM,
                              self._l1_barray)
         self._l1_barray[0] = self._mode_temp << 5 | self._mode_press << 2 | MODE_FORCED
         self.i2c.writeto_mem(self.address, BME280_REGISTER_CONTROL,
                              self._l1_barray)
+        # datasheet 9.1, maximum measurement time in us
+        us = 1250 + 2300 * (1 << (self._mode_temp - 1)) \
+            + 2300 * (1 << (self._mode_press - 1)) + 575 \
+            + 2300 * (1 << (self._mode_hum - 1)) + 575
+        return (us + 999) // 1000
+
+    def read_forced(self, result):
+        """ Reads the raw data of the conversion started by start_forced().
 
+            Args:
+                result: array of length 3 or alike where the result will be
+                stored, in temperature, pressure, humidity order
+            Returns:
+                None
+        """
         # Wait for conversion to complete
         for _ in range(BME280_TIMEOUT):
-            if self.i2c.readfrom_mem(self.address, BME280_REGISTER_STATUS, 1)[0] & 0x08:
+            self.i2c.readfrom_mem_into(self.address, BME280_REGISTER_STATUS,
+                                       self._l1_barray)
+            if self._l1_barray[0] & 0x08:
                 time.sleep_ms(10)  # still busy
             else:
                 break  # Sensor ready
@@ -171,48 +298,26 @@ class BME280:
                 from the result parameter if not None
         """
         self.read_raw_data(self._l3_resultarray)
-        raw_temp, raw_press, raw_hum = self._l3_resultarray
-        # temperature
-        var1 = (raw_temp/16384.0 - self.dig_T1/1024.0) * self.dig_T2
-        var2 = raw_temp/131072.0 - self.dig_T1/8192.0
-        var2 = var2 * var2 * self.dig_T3
-        self.t_fine = int(var1 + var2)
-        temp = (var1 + var2) / 5120.0
-        temp = max(-40, min(85, temp))
-
-        # pressure
-        var1 = (self.t_fine/2.0) - 64000.0
-        var2 = var1 * var1 * self.dig_P6 / 32768.0 + var1 * self.dig_P5 * 2.0
-        var2 = (var2 / 4.0) + (self.dig_P4 * 65536.0)
-        var1 = (self.dig_P3 * var1 * var1 / 524288.0 + self.dig_P2 * var1) / 524288.0
-        var1 = (1.0 + var1 / 32768.0) * self.dig_P1
-        if (var1 == 0.0):
-            pressure = 30000  # avoid exception caused by division by zero
-        else:
-            p = ((1048576.0 - raw_press) - (var2 / 4096.0)) * 6250.0 / var1
-            var1 = self.dig_P9 * p * p / 2147483648.0
-            var2 = p * self.dig_P8 / 32768.0
-            pressure = p + (var1 + var2 + self.dig_P7) / 16.0
-            pressure = max(30000, min(110000, pressure))
-
-        # humidity
-        h = (self.t_fine - 76800.0)
-        h = ((raw_hum - (self.dig_H4 * 64.0 + self.dig_H5 / 16384.0 * h)) *
-             (self.dig_H2 / 65536.0 * (1.0 + self.dig_H6 / 67108864.0 * h *
-                                       (1.0 + self.dig_H3 / 67108864.0 * h))))
-        humidity = h * (1.0 - self.dig_H1 * h / 524288.0)
-        if (humidity < 0):
-            humidity = 0
-        if (humidity > 100):
-            humidity = 100.0
+        return self.compensate(self._l3_resultarray, result)
+
+    def compensate(self, raw, result=None):
+        """ Compensates raw data as read by read_raw_data().
+
+            Args:
+                raw: array of length 3 with raw temperature, pressure,
+                humidity
+                result: array of length 3 or alike where the result will be
+                stored, in temperature, pressure, humidity order
 
+            Returns:
+                array with temperature, pressure, humidity. Will be the one
+                from the result parameter if not None
+        """
+        out = self._l3_floatarray if result is None else result
+        self.t_fine = _compensate(self._cal, raw, out)
         if result:
-            result[0] = temp
-            result[1] = pressure
-            result[2] = humidity
             return result
-
-        return array("f", (temp, pressure, humidity))
+        return array("f", out)
 
     @property
     def sealevel(self):
@@ -0,0 +1,32 @@
+# crc.py Table driven CRC-8 as used by the Sensirion sensors (SHT4x, SHT3x,
+# SGP, SCD...): polynomial 0x31, init 0xFF, no reflection, no final xor.
+# The functions work in place on a slice of an existing buffer given as
+# offset and length, so checking a reading allocates nothing.
+
+
+def _make_table(poly):
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly if crc & 0x80 else crc << 1) & 0xFF
+        table[i] = crc
+    return bytes(table)
+
+
+CRC8_31_TABLE = _make_table(0x31)
+
+
+def crc8(buf, offset=0, length=None, crc=0xFF, table=CRC8_31_TABLE):
+    # CRC of buf[offset:offset + length], length defaults to the rest of buf
+    end = len(buf) if length is None else offset + length
+    if offset < 0 or end > len(buf) or end < offset:
+        raise ValueError("offset {} length {} outside buffer of {}".format(offset, length, len(buf)))
+    for i in range(offset, end):
+        crc = table[crc ^ buf[i]]
+    return crc
+
+
+def check_crc8(buf, offset, length):
+    # True if the byte after buf[offset:offset + length] is its CRC
+    return crc8(buf, offset, length) == buf[offset + length]
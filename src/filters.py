@@ -0,0 +1,136 @@
+from array import array
+from math import atan2, cos, sin, radians, degrees
+
+# Estimators for noisy sensor readings, with the submit()/compute_avg()
+# interface of rolling_average.ROLLINGAVERAGE so any of them can stand in for
+# it.  compute_avg() returns None until a value has been accepted.
+#
+#   EWMA      exponentially weighted moving average
+#   MEDIAN    median of the last `samples` values
+#   OUTLIER   drops values out of range or too far from the estimate, then
+#             passes the rest to another filter
+#   CHAIN     feeds the output of each filter into the next
+#   CIRCULAR  weighted vector mean of the last `samples` angles in degrees
+
+
+class EWMA:
+    def __init__(self, **kwargs):
+        self.alpha = kwargs.get('alpha', 0.3)
+        self.value = None
+
+    def submit(self, value):
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+
+    def compute_avg(self):
+        return self.value
+
+
+class MEDIAN:
+    def __init__(self, **kwargs):
+        samples = kwargs.get('samples', 5)
+        self.values = array('f', bytes(4 * samples))
+        self.sorted = array('f', bytes(4 * samples))
+        self.index = 0
+        self.count = 0
+
+    def submit(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % len(self.values)
+        if self.count < len(self.values):
+            self.count += 1
+
+    def compute_avg(self):
+        n = self.count
+        if not n:
+            return None
+        # insertion sort into the preallocated scratch array
+        s = self.sorted
+        for i in range(n):
+            v = self.values[i]
+            j = i
+            while j and s[j - 1] > v:
+                s[j] = s[j - 1]
+                j -= 1
+            s[j] = v
+        if n & 1:
+            return s[n // 2]
+        return (s[n // 2 - 1] + s[n // 2]) / 2
+
+
+class OUTLIER:
+    # low/high: accepted range.  max_step: largest accepted distance from the
+    # current estimate; after max_rejects values in a row are dropped for it,
+    # the step is taken as real and the next one is accepted.
+    def __init__(self, inner, **kwargs):
+        self.inner = inner
+        self.low = kwargs.get('low')
+        self.high = kwargs.get('high')
+        self.max_step = kwargs.get('max_step')
+        self.max_rejects = kwargs.get('max_rejects', 3)
+        self.rejects = 0  # in a row
+        self.rejected = 0  # total
+
+    def submit(self, value):
+        # returns False if the value was dropped
+        if value is None or (self.low is not None and value < self.low) \
+                or (self.high is not None and value > self.high):
+            self.rejected += 1
+            return False
+        estimate = self.inner.compute_avg()
+        if self.max_step is not None and estimate is not None \
+                and abs(value - estimate) > self.max_step \
+                and self.rejects < self.max_rejects:
+            self.rejects += 1
+            self.rejected += 1
+            return False
+        self.rejects = 0
+        self.inner.submit(value)
+        return True
+
+    def compute_avg(self):
+        return self.inner.compute_avg()
+
+
+class CHAIN:
+    def __init__(self, *filters):
+        self.filters = filters
+
+    def submit(self, value):
+        for f in self.filters:
+            f.submit(value)
+            value = f.compute_avg()
+            if value is None:
+                break
+
+    def compute_avg(self):
+        return self.filters[-1].compute_avg()
+
+
+class CIRCULAR:
+    # angles average as unit vectors, so 350 and 10 give 0 and not 180.
+    # submit(angle, weight): wind directions weighted by wind speed give the
+    # direction the air mostly came from.  compute_avg() is None while all
+    # weights are 0
+    def __init__(self, **kwargs):
+        samples = kwargs.get('samples', 5)
+        self.x = array('f', bytes(4 * samples))
+        self.y = array('f', bytes(4 * samples))
+        self.index = 0
+
+    def submit(self, value, weight=1.0):
+        a = radians(value)
+        self.x[self.index] = weight * cos(a)
+        self.y[self.index] = weight * sin(a)
+        self.index = (self.index + 1) % len(self.x)
+
+    def compute_avg(self):
+        x = y = 0.0
+        for i in range(len(self.x)):
+            x += self.x[i]
+            y += self.y[i]
+        if x == 0 and y == 0:
+            return None
+        return degrees(atan2(y, x)) % 360
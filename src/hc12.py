@@ -0,0 +1,107 @@
+import uasyncio as asyncio
+
+# HC-12 433MHz serial radio on a UART, driven with uasyncio streams.
+# The SET pin held low puts the module in AT command mode (and wakes it from
+# sleep), high returns it to transparent mode.  Rather than fixed delays the
+# driver waits for the module to answer each AT command, with a timeout.
+
+CMD_ENTER_MS = 40  # datasheet: SET low to command mode
+CMD_EXIT_MS = 80  # datasheet: SET high to transparent mode
+POLL_MS = 20  # answer timeout while waiting for command mode
+TX_MARGIN_MS = 20  # air time margin after the UART has sent a frame
+
+
+class HC12Exception(Exception):
+    "No or unexpected answer from the radio."
+
+
+class HC12:
+    def __init__(self, uart, set_pin, baudrate=9600, timeout_ms=200, wake_timeout_ms=400):
+        self.uart = uart
+        self.set_pin = set_pin
+        self.baudrate = baudrate
+        self.timeout_ms = timeout_ms
+        self.wake_timeout_ms = wake_timeout_ms
+        self.reader = asyncio.StreamReader(uart)
+        self.writer = asyncio.StreamWriter(uart, {})
+        self.lock = asyncio.Lock()
+        self.asleep = False
+        self.set_pin.on()
+
+    async def command(self, cmd, expect=b'OK', timeout_ms=None):
+        # send one AT command, SET must already be low.  returns the answer line
+        self._drain_rx()
+        self.writer.write(cmd)
+        await self.writer.drain()
+        try:
+            line = await asyncio.wait_for_ms(self.reader.readline(), timeout_ms or self.timeout_ms)
+        except asyncio.TimeoutError:
+            raise HC12Exception("no answer to {}".format(cmd))
+        line = line.strip()
+        if not line.startswith(expect):
+            raise HC12Exception("{} answered {}".format(cmd, line))
+        return line
+
+    async def configure(self, *commands):
+        # commands are (command, expected answer) pairs, e.g. (b'AT+P6', b'OK+P6')
+        async with self.lock:
+            await self._enter_command_mode()
+            try:
+                for cmd, expect in commands:
+                    await self.command(cmd, expect)
+            finally:
+                await self._exit_command_mode()
+
+    async def wake(self):
+        async with self.lock:
+            await self._enter_command_mode()
+            await self._exit_command_mode()
+
+    async def sleep(self):
+        async with self.lock:
+            await self._enter_command_mode()
+            try:
+                await self.command(b'AT+SLEEP', b'OK+SLEEP')
+            finally:
+                await self._exit_command_mode()
+            # the module sleeps once it leaves command mode
+            self.asleep = True
+
+    async def send(self, data):
+        async with self.lock:
+            if self.asleep:
+                await self._enter_command_mode()
+                await self._exit_command_mode()
+            self.writer.write(data)
+            await self.writer.drain()
+            while not self.uart.txdone():
+                await asyncio.sleep_ms(2)
+            # the radio is still sending what it received over the UART
+            await asyncio.sleep_ms(len(data) * 10000 // self.baudrate + TX_MARGIN_MS)
+
+    async def _enter_command_mode(self):
+        # the module is still transparent for CMD_ENTER_MS after SET goes
+        # low, an AT sent earlier would go out over the air.  then poll with
+        # AT until it answers instead of waiting a fixed time
+        self.set_pin.off()
+        await asyncio.sleep_ms(CMD_ENTER_MS)
+        tries = max(1, (self.wake_timeout_ms - CMD_ENTER_MS) // POLL_MS)
+        while True:
+            try:
+                await self.command(b'AT', timeout_ms=POLL_MS)
+                break
+            except HC12Exception:
+                tries -= 1
+                if tries <= 0:
+                    self.set_pin.on()
+                    raise
+        self.asleep = False
+
+    async def _exit_command_mode(self):
+        self.set_pin.on()
+        await asyncio.sleep_ms(CMD_EXIT_MS)
+
+    def _drain_rx(self):
+        # drop stale bytes so the next line read is the answer to our command
+        if self.uart.any():
+            self.uart.read()
@@ -1,159 +1,373 @@
 import sht4x
+import bme280_float
 import time
+import uasyncio as asyncio
 import umsgpack
-import rolling_average
-from struct import pack
+import tscodec
+import filters
+from struct import pack_into
+from array import array
+from math import atan2, cos, sin, degrees, radians
 from machine import I2C, Pin, UART, lightsleep, RTC, ADC
-from ulp_weather import ULP_WEATHER
-from as5600 import AS5600
+from ulp_weather import ULP_WEATHER, WAKE_RAIN, WAKE_GUST
+from as5600 import AS5600, AS5600_OUT_ANALOG_REDUCED, circular_mean
+from store_forward import STORE_FORWARD
+from hc12 import HC12
+from acquire import ACQUISITION
+from scheduler import SCHEDULER
+from profiler import PROFILER
 
 # I2C specific configs
 i2c = I2C(0, scl=Pin(22), sda=Pin(21))
 sht = sht4x.SHT4X(i2c=i2c)
-as5600 = AS5600(i2c=i2c) 
+sht_data = array('f', [0, 0])
+as5600 = AS5600(i2c=i2c, output=AS5600_OUT_ANALOG_REDUCED)
+bme = bme280_float.BME280(i2c=i2c)
+bme_raw = array('i', [0, 0, 0])
+bme_data = array('f', [0, 0, 0])
 
 # init the ULP data gather process
 ulp = ULP_WEATHER()
 
+# the ULP ends the sleep early after EVENT_RAIN_PULSES bucket tips or a wind
+# pulse shorter than EVENT_GUST_SECONDS, the reading then goes out right away
+# in a priority frame.  0.04s is 25 pulses/s, 60km/h on the usual 2.4km/h per
+# pulse/s cup anemometer.  a reason that ended a sleep is not armed again for
+# EVENT_HOLDOFF_SECONDS, so steady rain or wind does not wake us every cycle.
+# in calm weather the sleep is CALM_SLEEP_FACTOR longer.
+EVENT_RAIN_PULSES = 2
+EVENT_GUST_SECONDS = 0.04
+EVENT_HOLDOFF_SECONDS = 600
+CALM_SLEEP_FACTOR = 2
+ulp.set_wake_thresholds(EVENT_RAIN_PULSES, EVENT_GUST_SECONDS)
+event_at = {WAKE_RAIN: None, WAKE_GUST: None}  # ticks_ms of the last early wake up
+
+def event_armed(reason):
+    at = event_at[reason]
+    if at is None:
+        return True
+    if time.ticks_diff(time.ticks_ms(), at) < EVENT_HOLDOFF_SECONDS * 1000:
+        return False
+    # forget it before ticks_ms wraps around
+    event_at[reason] = None
+    return True
+
+# the ULP reads the wind vane through the AS5600 analog output (OUT to GPIO39)
+# every VANE_SAMPLE_SECONDS while we sleep.  VANE_ADC_MIN and VANE_ADC_MAX are
+# the readings at 0 and 360 degrees, 10% and 90% of 3.3V: measure your board
+VANE_SAMPLE_SECONDS = 1
+VANE_ADC_MIN = 300
+VANE_ADC_MAX = 3800
+ulp.set_vane_sampling(VANE_SAMPLE_SECONDS, VANE_ADC_MIN, VANE_ADC_MAX)
+
 # setup hc-12 radio
 uart2 = UART(2, baudrate=9600, tx=17, rx=16)
+radio = HC12(uart2, Pin(23, Pin.OUT))
 
 # create the RTC object
 rtc = RTC()
 
-# voltage rolling average 
-bat_volt_avg = rolling_average.ROLLINGAVERAGE(samples=5)
+# battery voltage estimate for sleep scheduling.  failed reads and readings
+# outside the pack's range never reach it, neither do jumps of more than
+# 0.3V unless they persist.  a 5 sample median removes single spikes and an
+# EWMA smooths the rest.
+bat_volt_avg = filters.OUTLIER(
+    filters.CHAIN(filters.MEDIAN(samples=5), filters.EWMA(alpha=0.3)),
+    low=2.5, high=4.5, max_step=0.3)
 
-def read_sht41():
-    dict = {}
-    temp, humidity = sht.measurements
-    dict['temp'] = temp
-    dict['humidity'] = humidity
-    return dict
+# fixed layout of a reading.  readings are queued as fixed size records and sent
+# as tscodec batches, the base station decodes them with the same field list.
+PAYLOAD_FIELDS = (
+    ('temp', 'f'),
+    ('humidity', 'f'),
+    ('battery', 'f'),
+    ('avg_wind', 'f'),
+    ('gust_wind', 'f'),
+    ('pressure', 'f'),
+    ('wind_dir', 'H'),
+    ('rainbuckets', 'H'),
+    ('rainbuckets_total', 'I'),
+    ('timemark', 'I'),
+)
+
+# store and forward.  every reading is queued, the radio only wakes once
+# BATCH_SIZE readings are waiting.  the newest RTC_RECORDS readings are kept in
+# RTC memory, older ones spill to flash and beyond FLASH_RECORDS the oldest are
+# dropped.
+BATCH_SIZE = 10
+MAX_BATCHES_PER_WAKE = 3
+RTC_RECORDS = 40
+FLASH_RECORDS = 2000
+store = STORE_FORWARD(PAYLOAD_FIELDS, RTC_RECORDS, FLASH_RECORDS, rtc=rtc)
+
+# a priority frame is PRIORITY_FRAME, the wake reason, then a tscodec batch.
+# tscodec batches start with their version byte, 1.
+PRIORITY_FRAME = 0x50
+
+# awake time, heap and charge per phase of a cycle.  at least every
+# PROFILE_FRAME_EVERY cycles a cycle that transmitted is packed as it goes to
+# sleep, with its radio phases, and the next transmission carries
+# PROFILE_FRAME and that profile.  PROFILE_MA is the board current in each phase, a rough estimate:
+# about 40mA for the cpu, the HC-12 adds 16mA awake and 60mA sending at P6.
+PROFILE_FRAME = 0x51
+PROFILE_FRAME_EVERY = 30
+PROFILE_PHASES = ('sensors', 'ulp', 'pack', 'checksum', 'radio_wake', 'transmit', 'radio_sleep')
+PROFILE_MA = (41, 40, 40, 40, 56, 116, 56)
+profiler = PROFILER(PROFILE_PHASES, ma=PROFILE_MA, idle_ma=40, frame_every=PROFILE_FRAME_EVERY)
+profile_frame = None
+
+# transmit buffers, allocated once and reused for every frame.  big enough for
+# a batch of BATCH_SIZE readings where every value changed.
+TX_BUFFER_SIZE = 512
+chk_buf = bytearray(TX_BUFFER_SIZE)
+chk_view = memoryview(chk_buf)
+tx_buf = bytearray(TX_BUFFER_SIZE)
+tx_view = memoryview(tx_buf)
+
+# ADC reads averaged for one battery reading
+BATTERY_OVERSAMPLE = 16
+batpin = ADC(Pin(34), atten=ADC.ATTN_11DB)
 
 def read_battery():
     # this reads the voltage of the battery pack where it's divided.  the value returned is half
-    # the actual voltage in micro volts.  
-    batpin = ADC(Pin(34), atten=ADC.ATTN_11DB)
-    try:
-        value = float((batpin.read_uv() / 1000000) * 2)
-    except:
-        return 0.0
+    # the actual voltage in micro volts.  returns None if no read worked.
+    total = 0
+    good = 0
+    for _ in range(BATTERY_OVERSAMPLE):
+        try:
+            total += batpin.read_uv()
+            good += 1
+        except:
+            pass
+    if not good:
+        return None
+    value = (total / good / 1000000) * 2
     if value > 0 and value < 5:
         return value
-    else:
-        return 0.0
-
-def pack_data(payload):
-    packed = pack(">LfHHfffffs", 
-                  payload['timemark'], # L
-                  payload['battery'], # f
-                  payload['rainbuckets'], # H
-                  payload['wind']['wind_dir'], # H
-                  payload['wind']['avg_wind'], # f
-                  payload['wind']['gust_wind'], # f
-                  payload['bme280']['temp'], # f
-                  payload['bme280']['humidity'], # f
-                  payload['bme280']['pressure'], # f
-                  b'\n', #terminate character
-                  ) 
-    return packed
-
-def broadcast_data(payload):
+    return None
+
+def read_sht41():
+    # temperature, humidity.  returns sht_data, overwritten next call
+    return sht.read_measurement(sht_data)
+
+def read_bme280():
+    # temperature, pressure, humidity.  returns bme_data, overwritten next call
+    bme.read_forced(bme_raw)
+    return bme.compensate(bme_raw, bme_data)
+
+# BME280 oversampling and IIR filter per battery level, at the voltages
+# the scheduler's ramp starts and stops stretching the sleep.  lower battery
+# gives a shorter conversion: about 58ms at 8x, 17ms at 2x, 10ms at 1x.
+# (minimum average voltage, oversampling, filter)
+BME280_PROFILES = (
+    (3.7, bme280_float.BME280_OSAMPLE_8, bme280_float.BME280_FILTER_4),
+    (3.0, bme280_float.BME280_OSAMPLE_2, bme280_float.BME280_FILTER_2),
+    (0.0, bme280_float.BME280_OSAMPLE_1, bme280_float.BME280_FILTER_OFF),
+)
+bme_profile = None
+
+def select_bme280_profile(avg):
+    global bme_profile
+    for profile in BME280_PROFILES:
+        if avg is None or avg >= profile[0]:
+            break
+    if profile is not bme_profile:
+        bme.set_oversampling(profile[1])
+        bme.set_filter(profile[2])
+        bme_profile = profile
+        print("bme280 profile: oversampling {} filter {}".format(profile[1], profile[2]))
+
+# wind vane burst: WIND_DIR_SAMPLES angles BURST_INTERVAL_US apart, about
+# 64ms.  acquisition collects it first and the waits run to each conversion's
+# deadline, so it overlaps the SHT41 and BME280 conversions.  only when the
+# ULP has fewer than VANE_MIN_SAMPLES vane readings of the sleep, e.g. after
+# an early wake up.  the reported direction is this cycle's: the ULP's vane
+# readings and the burst as one vector mean weighted by the wind.  a ULP
+# reading weighs one plus the pulses of the second before it, a burst sample
+# one plus the cycle's mean pulses per second.
+WIND_DIR_SAMPLES = 16
+VANE_MIN_SAMPLES = 5
+wind_raw = array('H', bytes(2 * WIND_DIR_SAMPLES))
+
+def read_wind_dir():
+    # (degrees, r) of this burst, None if the ULP has the direction
+    if ulp.snapshot().vane_samples >= VANE_MIN_SAMPLES:
+        return None
+    return circular_mean(as5600.read_burst(wind_raw))
+
+# sensors read each cycle.  all conversions are started together and collected
+# once each is done, instead of one sensor after the other.
+acquisition = ACQUISITION()
+acquisition.add('sht41', sht.start_measurement, read_sht41)
+acquisition.add('bme280', bme.start_forced, read_bme280)
+acquisition.add('battery', None, read_battery)
+acquisition.add('wind_dir', None, read_wind_dir)
+
+async def broadcast_data(frames):
     #transmitPayload = binascii.b2a_base64(payload.encode())
-    # console dump for anyone looking
-    chksumed = checksum_payload(payload)
-    print("checksumed payload: {}".format(chksumed))
-    # wake up HC-12
-    set_pin = Pin(23, Pin.OUT)
-    set_pin.off()
-    time.sleep_ms(200)
-    uart2.write('AT')
-    trash = uart2.read()
-    uart2.flush()
-    set_pin.on()
-    time.sleep_ms(200)
-
-    uart2.write(chksumed)
-    uart2.flush()
-    time.sleep_ms(200)
-
-    set_pin.off()
-    time.sleep_ms(200)
-    uart2.write('AT+SLEEP')
-    uart2.flush()
-    set_pin.on()
-    time.sleep_ms(200)
+    # send() wakes the HC-12 first if it is asleep
+    for payload in frames:
+        profiler.begin('checksum')
+        chksumed = checksum_payload(payload)
+        profiler.end('checksum')
+        # console dump for anyone looking
+        print("checksumed payload: {}".format(bytes(chksumed)))
+        profiler.begin('transmit')
+        await radio.send(chksumed)
+        profiler.end('transmit')
+    profiler.begin('radio_sleep')
+    await radio.sleep()
+    profiler.end('radio_sleep')
     # HC-12 now in sleep mode
 
-def init_hc12():
-    # wake up HC-12
-    set_pin = Pin(23, Pin.OUT)
-    set_pin.off()
-    time.sleep_ms(200)
-    uart2.write('AT+P6')
-    trash = uart2.read()
-    uart2.flush()
-    set_pin.on()
-    time.sleep_ms(200)
+async def wake_radio():
+    profiler.begin('radio_wake')
+    await radio.wake()
+    profiler.end('radio_wake')
+
+async def init_hc12():
+    await radio.configure((b'AT+P6', b'OK+P6'))
 
 def checksum_payload(bytes):
-    data = umsgpack.dumps(bytes)
-    checksum = sum(data)
+    # returns a view of tx_buf, valid until the next call
+    end = umsgpack.dumps_into(bytes, chk_buf, use_mpext=False)
+    checksum = sum(chk_view[:end])
     checksum1 = int(checksum // 256)
     checksum2 = int(checksum % 256)
-    checksum = pack(">hh", checksum1, checksum2)
-    checksum_payload = data + checksum
-    return umsgpack.dumps(checksum_payload)
-
-def compute_sleep_seconds(avg):
-    default_seconds = 20
-    max_delay = 200
-    cutoff_voltage = 3.7
-    min_voltage = 3.0
-    delay_factor = (max_delay / (cutoff_voltage - min_voltage)) 
-    if avg is None:
-        sleep_seconds = default_seconds
-    elif avg >= cutoff_voltage:
-        sleep_seconds = default_seconds
-    elif avg >= min_voltage:
-        sleep_seconds = ((cutoff_voltage - avg) * delay_factor) + default_seconds
+    pack_into(">hh", chk_buf, end, checksum1, checksum2)
+    end = umsgpack.dumps_into(chk_view[:end + 4], tx_buf, use_mpext=False)
+    return tx_view[:end]
+
+async def send_batches(wake=None, event=0):
+    # only whole batches are sent, unless an event woke us: then the queue
+    # goes out now in priority frames.  readings stay queued until the radio
+    # write returned, a failed cycle retries them on the next wake up.
+    # wake is the radio wake up task started before the sensor reads.
+    # returns True if the radio sent
+    global profile_frame
+    if event:
+        batches = min((len(store) + BATCH_SIZE - 1) // BATCH_SIZE, MAX_BATCHES_PER_WAKE)
     else:
-        sleep_seconds = max_delay + default_seconds
+        batches = min(len(store) // BATCH_SIZE, MAX_BATCHES_PER_WAKE)
+    if batches == 0:
+        return False
+    profiler.begin('pack')
+    readings = store.peek(batches * BATCH_SIZE)
+    frames = [tscodec.encode(PAYLOAD_FIELDS, readings[i:i + BATCH_SIZE])
+              for i in range(0, len(readings), BATCH_SIZE)]
+    if event:
+        frames = [bytes((PRIORITY_FRAME, event)) + frame for frame in frames]
+    profiler.end('pack')
+    if profile_frame is not None:
+        frames.append(profile_frame)
+        print(profiler.report())
+    try:
+        if wake is not None:
+            await wake
+        await broadcast_data(frames)
+    except Exception as e:
+        print("broadcast failed, {} readings queued: {}".format(len(store), e))
+        return False
+    store.commit(len(readings))
+    profile_frame = None
+    return True
+
+# sleep between readings from the battery trend, time of day and weather
+scheduler = SCHEDULER(calm_factor=CALM_SLEEP_FACTOR)
+RTC_SET_YEAR = 2024  # before this the RTC was never set, time.time() counts from boot
 
-    return int(sleep_seconds)
+def local_hour():
+    tm = time.localtime()
+    if tm[0] < RTC_SET_YEAR:
+        return None
+    return tm[3] + tm[4] / 60
 
-def gather_loop():
+async def gather_loop():
+    global profile_frame
     sleep_seconds = 20
+    sent = False
+    select_bme280_profile(bat_volt_avg.compute_avg())
     start_ms = time.ticks_ms()
+    payload = {}
+    sensor_data = {}
     while True:
+        ulp.arm_wake(event_armed(WAKE_RAIN), event_armed(WAKE_GUST))
+        profiler.end_cycle()
+        if sent and profiler.frame_due():
+            profile_frame = bytes((PROFILE_FRAME,)) + profiler.frame()
         lightsleep(int(sleep_seconds * 1000))
-        span_secs = int((time.ticks_ms() - start_ms) / 1000)
-        payload = {}
-        sht41_data = read_sht41()
-        payload['temp'] = sht41_data['temp']
-        payload['humidity'] = sht41_data['humidity']
-        payload['battery'] = read_battery()
+        profiler.start_cycle()
+        event = ulp.wake_reason()
+        for reason in event_at:
+            if event & reason:
+                event_at[reason] = time.ticks_ms()
+        if event & WAKE_RAIN:
+            print("woken early by rain")
+        if event & WAKE_GUST:
+            print("woken early by a gust")
+        # if this reading completes a batch, or goes out in a priority frame,
+        # wake the radio while the sensors are read
+        wake = None
+        if event or len(store) + 1 >= BATCH_SIZE:
+            wake = asyncio.create_task(wake_radio())
+            await asyncio.sleep_ms(0)
+        # an early wake up can come well under a second into the sleep
+        span_secs = time.ticks_diff(time.ticks_ms(), start_ms) / 1000
+        profiler.begin('sensors')
+        await acquisition.run(sensor_data)
+        profiler.end('sensors')
+        payload['temp'], payload['humidity'] = sensor_data['sht41']
+        payload['pressure'] = sensor_data['bme280'][1]
+        battery = sensor_data['battery']
+        # 0.0 still marks a failed read for the base station, the estimate skips it
+        payload['battery'] = 0.0 if battery is None else battery
+        profiler.begin('ulp')
         ulp_data = ulp.retrieve_metrics(span_secs)
+        profiler.end('ulp')
         payload['avg_wind'] = ulp_data['wind_avg_pulse_second']
-        payload['gust_wind'] = ulp_data['wind_burst_pulse_second']
-        payload['wind_dir'] = int(as5600.getAngle())
+        # 3 second gust the ULP kept over the whole sleep, the shortest pulse
+        # gap only after a wake up less than 3 seconds into the sleep
+        gust = ulp_data['wind_gust_3s']
+        payload['gust_wind'] = ulp_data['wind_burst_pulse_second'] if gust is None else gust
+        # samples of total weight w and mean length r add up to a vector of
+        # length w * r
+        x = y = 0.0
+        vane = ulp_data['vane_dir']
+        if vane is not None:
+            w = ulp_data['vane_weight'] * ulp_data['vane_r']
+            x += w * cos(radians(vane))
+            y += w * sin(radians(vane))
+        burst = sensor_data['wind_dir']
+        if burst is not None:
+            w = WIND_DIR_SAMPLES * (1 + payload['avg_wind']) * burst[1]
+            x += w * cos(radians(burst[0]))
+            y += w * sin(radians(burst[0]))
+        payload['wind_dir'] = int(degrees(atan2(y, x)) % 360) if x or y else 0
         payload['rainbuckets'] = int(ulp_data['rain_total_pulse_count'])
         payload['rainbuckets_total'] = int(ulp_data['rain_total_pulse_counter'])
-        bat_volt_avg.submit(payload['battery'])
+        if battery is not None:
+            bat_volt_avg.submit(battery)
         # we're using seconds since boot as a way to tell the data packets apart.
         payload['timemark'] = time.time()
         print("payload: {} ulp data: {}".format(payload, ulp_data))
-        msgpacked = umsgpack.dumps(payload)
-        broadcast_data(msgpacked)
-        sleep_seconds = compute_sleep_seconds(bat_volt_avg.compute_avg())
+        profiler.begin('pack')
+        store.append(payload)
+        profiler.end('pack')
+        sent = await send_batches(wake, event)
+        bat_avg = bat_volt_avg.compute_avg()
+        scheduler.submit(payload['timemark'], bat_avg, wind=payload['avg_wind'], pressure=payload['pressure'])
+        sleep_seconds = scheduler.next_sleep_seconds(local_hour())
+        select_bme280_profile(bat_avg)
         print("sleeping for {} seconds".format(sleep_seconds))
         start_ms = time.ticks_ms()
 
+async def run():
+    await init_hc12()
+    await gather_loop()
+
 def main():
     print("waiting for 15 seconds before entering main loop.  break if you want to get REPL")
     time.sleep(15)
-    init_hc12()
-    gather_loop()
+    asyncio.run(run())
 
 main()
\ No newline at end of file
@@ -0,0 +1,153 @@
+import gc
+import time
+from array import array
+from struct import pack_into, unpack_from, calcsize
+
+# Where the awake window goes.  gather_loop brackets each phase of a cycle
+# with begin(name) and end(name); a phase may run more than once a cycle and
+# adds up.  Per phase and cycle the profiler keeps the time in us and the heap
+# allocated (gc.mem_free before minus after, negative if a collection ran),
+# for the last `cycles` cycles in a ring of arrays.  begin and end allocate
+# nothing, the mAh estimates and frames only when asked for.
+#
+# Charge is estimated from ma, the board current in each phase, and idle_ma
+# for the rest of the awake time.  Phases may overlap (the radio wakes up
+# while the sensors convert), so a cycle is its awake time at idle_ma plus
+# each phase's current above idle_ma.
+#
+# frame() packs the last finished cycle for the base station, decode() reads
+# it back:
+#   phase count (B), cycle number (>H), awake ms (>H), estimated mAh (>f),
+#   then per phase the time in 100us units (>H) and the heap bytes (>h)
+
+_HEADER = ">BHHf"
+_PHASE = ">Hh"
+
+
+class PROFILER:
+    def __init__(self, phases, **kwargs):
+        n = len(phases)
+        cycles = kwargs.get('cycles', 8)
+        self.phases = phases
+        self.index = {}
+        for i in range(n):
+            self.index[phases[i]] = i
+        self.cycles = cycles
+        self.idle_ma = kwargs.get('idle_ma', 40)
+        self.ma = array('f', kwargs.get('ma', [self.idle_ma] * n))
+        self.heap = kwargs.get('heap', True)
+        self.frame_every = kwargs.get('frame_every', 0)  # 0: no frames
+        self.us = array('I', bytes(4 * n * cycles))
+        self.alloc = array('i', bytes(4 * n * cycles))
+        self.awake = array('I', bytes(4 * cycles))
+        self.started = array('I', bytes(4 * n))
+        self.free = array('i', bytes(4 * n))
+        self.slot = 0  # ring slot of the cycle being recorded
+        self.count = 0  # finished cycles
+        self.since_frame = 0
+        self.woke = time.ticks_us()
+
+    def start_cycle(self):
+        # right after waking up
+        self.woke = time.ticks_us()
+        n = len(self.phases)
+        base = self.slot * n
+        for j in range(base, base + n):
+            self.us[j] = 0
+            self.alloc[j] = 0
+
+    def end_cycle(self):
+        # right before going to sleep
+        self.awake[self.slot] = time.ticks_diff(time.ticks_us(), self.woke)
+        self.slot = (self.slot + 1) % self.cycles
+        self.count += 1
+        self.since_frame += 1
+
+    def begin(self, phase):
+        i = self.index[phase]
+        if self.heap:
+            self.free[i] = gc.mem_free()
+        self.started[i] = time.ticks_us()
+
+    def end(self, phase):
+        t = time.ticks_us()
+        i = self.index[phase]
+        j = self.slot * len(self.phases) + i
+        self.us[j] += time.ticks_diff(t, self.started[i])
+        if self.heap:
+            self.alloc[j] += self.free[i] - gc.mem_free()
+
+    def _slot(self, back):
+        # ring slot of the cycle finished `back` cycles ago, 1 the last one
+        if not 0 < back <= min(self.count, self.cycles):
+            raise IndexError("no such cycle")
+        return (self.slot - back) % self.cycles
+
+    def mah(self, phase=None, back=1):
+        # estimated charge of a phase, or of the whole cycle
+        s = self._slot(back)
+        n = len(self.phases)
+        if phase is not None:
+            i = self.index[phase]
+            return self.us[s * n + i] * self.ma[i] / 3600000000
+        uas = self.awake[s] * self.idle_ma
+        for i in range(n):
+            uas += self.us[s * n + i] * (self.ma[i] - self.idle_ma)
+        return uas / 3600000000
+
+    def frame_due(self):
+        return self.frame_every and self.count and self.since_frame >= self.frame_every
+
+    def frame(self):
+        # the last finished cycle as bytes, see decode()
+        s = self._slot(1)
+        n = len(self.phases)
+        buf = bytearray(calcsize(_HEADER) + n * calcsize(_PHASE))
+        pack_into(_HEADER, buf, 0, n, self.count & 0xffff,
+                  min(self.awake[s] // 1000, 0xffff), self.mah())
+        off = calcsize(_HEADER)
+        for i in range(n):
+            alloc = self.alloc[s * n + i]
+            pack_into(_PHASE, buf, off, min(self.us[s * n + i] // 100, 0xffff),
+                      max(-0x8000, min(alloc, 0x7fff)))
+            off += calcsize(_PHASE)
+        self.since_frame = 0
+        return bytes(buf)
+
+    def report(self):
+        # one line per phase, averaged over the cycles in the ring
+        cycles = min(self.count, self.cycles)
+        if not cycles:
+            return "no cycles"
+        n = len(self.phases)
+        lines = []
+        for i in range(n):
+            us = alloc = 0
+            mah = 0.0
+            for back in range(1, cycles + 1):
+                s = self._slot(back)
+                us += self.us[s * n + i]
+                alloc += self.alloc[s * n + i]
+                mah += self.mah(self.phases[i], back)
+            lines.append("{}: {} us {} bytes {:.5f} mAh".format(
+                self.phases[i], us // cycles, alloc // cycles, mah / cycles))
+        awake = mah = 0
+        for back in range(1, cycles + 1):
+            awake += self.awake[self._slot(back)]
+            mah += self.mah(None, back)
+        lines.append("awake: {} us {:.5f} mAh over {} cycles".format(awake // cycles, mah / cycles, cycles))
+        return "\n".join(lines)
+
+
+def decode(phases, data):
+    # a frame() back into a dict, phase times in us
+    n, cycle, awake_ms, mah = unpack_from(_HEADER, data, 0)
+    if n != len(phases):
+        raise ValueError("frame has {} phases, expected {}".format(n, len(phases)))
+    out = {'cycle': cycle, 'awake_ms': awake_ms, 'mah': mah}
+    off = calcsize(_HEADER)
+    for name in phases:
+        us, alloc = unpack_from(_PHASE, data, off)
+        out[name] = (us * 100, alloc)
+        off += calcsize(_PHASE)
+    return out
@@ -1,26 +1,149 @@
-class ROLLINGAVERAGE:
+from array import array
+
+
+# Windowed statistics over the last `samples` values, O(1) per submit.
+# Values are kept in an array('f') ring.  Mean and variance are updated with
+# Welford's method for a sliding window, and rebuilt from the ring each time
+# it wraps so float rounding does not build up.  Minimum and maximum come from
+# monotonic deques of sample sequence numbers.
+class ROLLINGSTATS:
     def __init__(self, **kwargs):
         samples = kwargs.get('samples', 5)
-        self.holder = [None] * samples
-        self.index = 0
+        self.samples = samples
+        self.values = array('f', bytes(4 * samples))
+        self.index = 0  # next slot
+        self.count = 0
+        self.seq = 0  # sequence number of the next sample
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self._min = _MONODEQUE(self.values, lambda a, b: a <= b)
+        self._max = _MONODEQUE(self.values, lambda a, b: a >= b)
 
     def submit(self, value):
-        self.holder[self.index] = value
-        if self.index < len(self.holder) - 1:
-            self.index += 1
+        values = self.values
+        old = values[self.index]
+        values[self.index] = value
+        value = values[self.index]  # as stored
+        if self.count < self.samples:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
         else:
+            mean = self.mean
+            self.mean = mean + (value - old) / self.count
+            self.m2 += (value - old) * (value - self.mean + old - mean)
+        self._min.push(self.seq, value)
+        self._max.push(self.seq, value)
+        self.seq += 1
+        self.index += 1
+        if self.index == self.samples:
             self.index = 0
+            self._resync()
+
+    def _resync(self):
+        mean = 0.0
+        for i in range(self.count):
+            mean += self.values[i]
+        mean /= self.count
+        m2 = 0.0
+        for i in range(self.count):
+            d = self.values[i] - mean
+            m2 += d * d
+        self.mean = mean
+        self.m2 = m2
 
     def compute_avg(self):
-        samples = 0
-        total = 0
-        for i in self.holder:
-            if i is not None:
-                samples += 1
-                total += i
-        if samples > 0:
-            return (total / samples)
-        else:
+        if self.count:
+            return self.mean
+        return None
+
+    def variance(self):
+        # sample variance, None below two samples
+        if self.count > 1:
+            return max(self.m2, 0.0) / (self.count - 1)
+        return None
+
+    def stddev(self):
+        v = self.variance()
+        return None if v is None else v ** 0.5
+
+    def minimum(self):
+        return self._min.front()
+
+    def maximum(self):
+        return self._max.front()
+
+
+# Fixed size deque of sequence numbers whose values are monotonic, so the
+# front is the minimum (or maximum) of the window.  The value of sequence
+# number seq is values[seq % samples].
+class _MONODEQUE:
+    def __init__(self, values, keep):
+        self.values = values
+        self.samples = len(values)
+        self.seqs = array('i', bytes(4 * self.samples))
+        self.head = 0
+        self.length = 0
+        self.keep = keep  # keep(older, newer): older stays in front of newer
+
+    def push(self, seq, value):
+        seqs = self.seqs
+        samples = self.samples
+        # drop the front once it has left the window
+        if self.length and seqs[self.head] <= seq - samples:
+            self.head = (self.head + 1) % samples
+            self.length -= 1
+        # drop values from the back that can no longer be the extreme
+        while self.length:
+            back = (self.head + self.length - 1) % samples
+            if self.keep(self.values[seqs[back] % samples], value):
+                break
+            self.length -= 1
+        seqs[(self.head + self.length) % samples] = seq
+        self.length += 1
+
+    def front(self):
+        if not self.length:
             return None
+        return self.values[self.seqs[self.head] % self.samples]
 
 
+# Mean of the last `samples` submits, None while they are all None.  A None
+# (a failed read) takes its slot like any value but is left out of the mean.
+# O(1) per submit from a running sum, summed again each time the ring wraps.
+class ROLLINGAVERAGE:
+    def __init__(self, **kwargs):
+        samples = kwargs.get('samples', 5)
+        self.values = array('f', bytes(4 * samples))
+        self.valid = bytearray(samples)
+        self.index = 0
+        self.count = 0  # values in the window that are not None
+        self.total = 0.0
+
+    def submit(self, value):
+        i = self.index
+        if self.valid[i]:
+            self.total -= self.values[i]
+            self.count -= 1
+        if value is None:
+            self.valid[i] = 0
+        else:
+            self.values[i] = value
+            self.valid[i] = 1
+            self.total += self.values[i]  # as stored
+            self.count += 1
+        i += 1
+        if i == len(self.values):
+            i = 0
+            total = 0.0
+            for j in range(len(self.values)):
+                if self.valid[j]:
+                    total += self.values[j]
+            self.total = total
+        self.index = i
+
+    def compute_avg(self):
+        if self.count:
+            return self.total / self.count
+        return None
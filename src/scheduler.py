@@ -0,0 +1,143 @@
+from array import array
+from rolling_average import ROLLINGSTATS
+
+# Chooses the sleep between readings.  Without history this is the fixed ramp
+# compute_sleep_seconds used: min_seconds above cutoff_voltage, stretching
+# linearly to max_seconds at min_voltage.  With a battery trend it plans
+# instead: the voltage slope over the last window_hours tells how fast the
+# current interval drains (or the panel charges) the battery, and the interval
+# is scaled so the battery still holds reserve_voltage at the next sunrise.
+# Spare charge at night goes into shorter intervals, down to min_seconds.  The
+# plan only ever shortens the ramp: below reserve_voltage, without spare
+# charge and while charging the ramp is kept.  While wind or pressure change
+# quickly the interval is halved, unless the battery is below the reserve; in
+# calm weather it is stretched by calm_factor.
+
+class SCHEDULER:
+    def __init__(self, **kwargs):
+        self.min_seconds = kwargs.get('min_seconds', 20)
+        self.max_seconds = kwargs.get('max_seconds', 220)
+        self.cutoff_voltage = kwargs.get('cutoff_voltage', 3.7)
+        self.min_voltage = kwargs.get('min_voltage', 3.0)
+        self.reserve_voltage = kwargs.get('reserve_voltage', 3.55)
+        self.window_hours = kwargs.get('window_hours', 2.0)
+        self.min_trend_hours = kwargs.get('min_trend_hours', 0.5)
+        self.sunrise_hour = kwargs.get('sunrise_hour', 7)
+        # energy of one reading in seconds of sleep current: the sleep current
+        # drains the battery whatever the interval, only the rest scales
+        self.reading_seconds = kwargs.get('reading_seconds', 24)
+        # thresholds for volatile weather: wind speed standard deviation
+        # (pulses per second) and pressure range (Pa) over the recent readings
+        self.wind_volatile = kwargs.get('wind_volatile', 2.0)
+        self.pressure_volatile = kwargs.get('pressure_volatile', 100.0)
+        # sleep stretch in calm weather, for when an event (ULP threshold
+        # wake) ends the sleep early anyway
+        self.calm_factor = kwargs.get('calm_factor', 1)
+
+        samples = kwargs.get('samples', 128)
+        self.times = array('f', bytes(4 * samples))  # hours since the first reading
+        self.volts = array('f', bytes(4 * samples))
+        self.index = 0
+        self.count = 0
+        self.t0 = None
+        self.voltage = None
+        self.interval = self.min_seconds
+        self.wind = ROLLINGSTATS(samples=kwargs.get('volatility_samples', 15))
+        self.pressure = ROLLINGSTATS(samples=kwargs.get('volatility_samples', 15))
+
+    def submit(self, now, voltage, wind=None, pressure=None):
+        # now in seconds, voltage the filtered battery estimate (or None)
+        if wind is not None:
+            self.wind.submit(wind)
+        if pressure is not None:
+            self.pressure.submit(pressure)
+        if voltage is None:
+            return
+        if self.t0 is None:
+            self.t0 = now
+        self.voltage = voltage
+        self.times[self.index] = (now - self.t0) / 3600
+        self.volts[self.index] = voltage
+        self.index = (self.index + 1) % len(self.times)
+        if self.count < len(self.times):
+            self.count += 1
+
+    def slope(self):
+        # least squares battery slope in volts per hour over the window,
+        # None until the readings span min_trend_hours
+        n = self.count
+        if n < 2:
+            return None
+        newest = self.times[(self.index - 1) % len(self.times)]
+        start = newest - self.window_hours
+        k = 0
+        st = sv = 0.0
+        oldest = newest
+        for i in range(n):
+            t = self.times[i]
+            if t >= start:
+                k += 1
+                st += t
+                sv += self.volts[i]
+                if t < oldest:
+                    oldest = t
+        if k < 2 or newest - oldest < self.min_trend_hours:
+            return None
+        mt = st / k
+        mv = sv / k
+        num = den = 0.0
+        for i in range(n):
+            t = self.times[i]
+            if t >= start:
+                d = t - mt
+                num += d * (self.volts[i] - mv)
+                den += d * d
+        return num / den if den else None
+
+    def volatile(self):
+        sd = self.wind.stddev()
+        if sd is not None and sd >= self.wind_volatile:
+            return True
+        if self.pressure.count > 1:
+            return self.pressure.maximum() - self.pressure.minimum() >= self.pressure_volatile
+        return False
+
+    def ramp_seconds(self, voltage):
+        # the fixed curve of compute_sleep_seconds
+        if voltage is None or voltage >= self.cutoff_voltage:
+            return self.min_seconds
+        if voltage < self.min_voltage:
+            return self.max_seconds
+        span = self.max_seconds - self.min_seconds
+        return self.min_seconds + (self.cutoff_voltage - voltage) * span / (self.cutoff_voltage - self.min_voltage)
+
+    def next_sleep_seconds(self, hour=None):
+        # hour: local time of day as a float, None if the RTC was never set
+        v = self.voltage
+        seconds = self.ramp_seconds(v)
+        slope = self.slope()
+        if v is not None and v < self.min_voltage:
+            seconds = self.max_seconds
+        elif slope is not None and slope < 0:
+            # while charging the ramp stands, it reaches min_seconds once the
+            # battery is above cutoff_voltage
+            hours = 12.0 if hour is None else (self.sunrise_hour - hour) % 24 or 24.0
+            headroom = v - self.reserve_voltage
+            if headroom > 0:
+                # drain is base * (1 + reading_seconds / interval): pick the
+                # interval that uses up the headroom at sunrise, if that is
+                # shorter than the ramp
+                r = self.reading_seconds
+                base = -slope / (1 + r / self.interval)
+                spare = headroom / (hours * base) - 1
+                if spare > 0:
+                    seconds = min(seconds, r / spare)
+        volatile = self.volatile()
+        if volatile and (v is None or v >= self.reserve_voltage):
+            seconds /= 2
+        seconds = max(self.min_seconds, min(self.max_seconds, seconds))
+        if not volatile:
+            seconds *= self.calm_factor
+        seconds = int(seconds)
+        self.interval = seconds
+        return seconds
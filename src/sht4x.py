@@ -14,8 +14,8 @@ MicroPython Driver fot the Sensirion Temperature and Humidity SHT40, SHT41 and S
 """
 
 import time
-import struct
 from micropython import const
+from crc import crc8, check_crc8
 
 try:
     from typing import Tuple
@@ -53,6 +53,30 @@ wat_config = {
     HEATER20mW: (0x1E, 0x15),
 }
 
+# Maximum measurement duration in ms per command, datasheet table 4:
+# high 8.3 ms, medium 4.5 ms, low 1.6 ms.  Heater commands run the heater for
+# 1.1 s or 0.11 s at most, then take a high precision measurement.
+measurement_time_ms = {
+    0xFD: const(9),
+    0xF6: const(5),
+    0xE0: const(2),
+    0x39: const(1110),
+    0x2F: const(1110),
+    0x1E: const(1110),
+    0x32: const(120),
+    0x24: const(120),
+    0x15: const(120),
+}
+
+# The sensor NACKs reads until the measurement is done, poll every
+# _POLL_MS for at most _POLL_TRIES times before giving up
+_POLL_MS = const(1)
+_POLL_TRIES = const(20)
+
+# ticks to degrees Celsius and % rH, datasheet section 4.6
+_T_SCALE = 175.0 / 65535.0
+_RH_SCALE = 125.0 / 65535.0
+
 
 class SHT4X:
     """Driver for the SHT4X Sensor connected over I2C.
@@ -92,6 +116,7 @@ class SHT4X:
         self._i2c = i2c
         self._address = address
         self._data = bytearray(6)
+        self._cmd = bytearray(1)
 
         self._command = 0xFD
         self._temperature_precision = HIGH_PRECISION
@@ -149,42 +174,59 @@ class SHT4X:
         back. Waiting time is added to the logic to account for this situation
         """
 
-        self._i2c.writeto(self._address, bytes([self._command]), True)
-        if self._command in (0x39, 0x2F, 0x1E):
-            time.sleep(1.2)
-        elif self._command in (0x32, 0x24, 0x15):
-            time.sleep(0.2)
-        time.sleep(0.2)
-        self._i2c.readfrom_into(self._address, self._data)
-
-        temperature, temp_crc, humidity, humidity_crc = struct.unpack_from(
-            ">HBHB", self._data
-        )
-
-        if temp_crc != self._crc(
-            memoryview(self._data[0:2])
-        ) or humidity_crc != self._crc(memoryview(self._data[3:5])):
-            raise RuntimeError("Invalid CRC calculated")
+        time.sleep_ms(self.start_measurement())
+        return self.read_measurement()
 
-        temperature = -45.0 + 175.0 * temperature / 65535.0
+    def start_measurement(self) -> int:
+        """Send the measure command without waiting for the result.
+        Returns the maximum measurement time in ms for the current precision
+        and heater setting, after which :meth:`read_measurement` can be
+        called. Other sensors can convert meanwhile.
+        """
+        self._cmd[0] = self._command
+        self._i2c.writeto(self._address, self._cmd, True)
+        return measurement_time_ms[self._command]
+
+    def read_measurement(self, result=None) -> Tuple[float, float]:
+        """Read the result of :meth:`start_measurement`, as
+        `temperature` and `relative_humidity`. While the measurement is
+        still running the sensor NACKs the read, which is retried.
+
+        :param result: array of length 2 or alike where temperature and
+         humidity are stored and which is returned instead of a new tuple.
+         The reading itself goes into a buffer of the driver, so with a
+         result array only the two float values are allocated.
+        """
+        data = self._data
+        for _ in range(_POLL_TRIES):
+            try:
+                self._i2c.readfrom_into(self._address, data)
+                break
+            except OSError:
+                time.sleep_ms(_POLL_MS)
+        else:
+            raise RuntimeError("Sensor SHT4X not ready")
+
+        if not (check_crc8(data, 0, 2) and check_crc8(data, 3, 2)):
+            raise RuntimeError("Invalid CRC calculated")
 
-        humidity = -6.0 + 125.0 * humidity / 65535.0
-        humidity = max(min(humidity, 100), 0)
+        temperature = ((data[0] << 8) | data[1]) * _T_SCALE - 45.0
+        humidity = ((data[3] << 8) | data[4]) * _RH_SCALE - 6.0
+        if humidity > 100:
+            humidity = 100.0
+        elif humidity < 0:
+            humidity = 0.0
 
-        return temperature, humidity
+        if result is None:
+            return temperature, humidity
+        result[0] = temperature
+        result[1] = humidity
+        return result
 
     @staticmethod
     def _crc(buffer) -> int:
         """verify the crc8 checksum"""
-        crc = 0xFF
-        for byte in buffer:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x80:
-                    crc = (crc << 1) ^ 0x31
-                else:
-                    crc = crc << 1
-        return crc & 0xFF
+        return crc8(buffer)
 
     @property
     def heater_power(self) -> str:
@@ -257,5 +299,6 @@ class SHT4X:
         """
         Reset the sensor
         """
-        self._i2c.writeto(self._address, bytes([_RESET]), True)
+        self._cmd[0] = _RESET
+        self._i2c.writeto(self._address, self._cmd, True)
         time.sleep(0.1)
@@ -0,0 +1,143 @@
+import struct
+import os
+
+# Queue of readings waiting for the radio, stored as fixed size records.
+# The most recent readings live in a RAM ring that is mirrored to RTC slow
+# memory, so they survive a reset.  When that ring is full the oldest record
+# moves to a ring file in flash, and once the file is full too the oldest
+# reading there is dropped.
+#
+# Readers take readings oldest first: peek(n) returns up to n of them as dicts
+# without removing them, commit(n) removes them once they have been sent.
+
+_MAGIC = 0x5346
+_HDR = "<HHHH"  # magic, record size, start, count
+_HDR_SIZE = 8
+
+
+class STORE_FORWARD:
+    def __init__(self, fields, ram_records=30, flash_records=0, path='readings.dat', rtc=None):
+        self.names = tuple(name for name, _ in fields)
+        self.fmt = '<' + ''.join(code for _, code in fields)
+        self.rec_size = struct.calcsize(self.fmt)
+
+        # RAM ring, header first so the whole buffer is the RTC memory image
+        self.ram_records = ram_records
+        self.mem = bytearray(_HDR_SIZE + ram_records * self.rec_size)
+        self.mv = memoryview(self.mem)
+        self.start = 0
+        self.count = 0
+        self.rtc = rtc
+
+        # flash ring, same header followed by flash_records records
+        self.flash_records = flash_records
+        self.path = path
+        self.flash_start = 0
+        self.flash_count = 0
+
+        self._restore_ram()
+        if flash_records:
+            self._open_flash()
+
+    def __len__(self):
+        return self.flash_count + self.count
+
+    def append(self, obj):
+        if self.count == self.ram_records:
+            if self.flash_records:
+                self._flash_push(self._ram_offset(0))
+            self.start = (self.start + 1) % self.ram_records
+            self.count -= 1
+        struct.pack_into(self.fmt, self.mem, self._ram_offset(self.count),
+                         *[obj[name] for name in self.names])
+        self.count += 1
+        self._save_ram()
+
+    def peek(self, n):
+        out = []
+        n = min(n, len(self))
+        if n and self.flash_count:
+            rec = bytearray(self.rec_size)
+            with open(self.path, 'rb') as f:
+                for i in range(min(n, self.flash_count)):
+                    f.seek(self._flash_offset(i))
+                    f.readinto(rec)
+                    out.append(self._record(rec, 0))
+        for i in range(n - len(out)):
+            out.append(self._record(self.mem, self._ram_offset(i)))
+        return out
+
+    def commit(self, n):
+        n = min(n, len(self))
+        flash_n = min(n, self.flash_count)
+        if flash_n:
+            self.flash_start = (self.flash_start + flash_n) % self.flash_records
+            self.flash_count -= flash_n
+            with open(self.path, 'r+b') as f:
+                self._write_flash_header(f)
+        ram_n = n - flash_n
+        if ram_n:
+            self.start = (self.start + ram_n) % self.ram_records
+            self.count -= ram_n
+            self._save_ram()
+
+    def _record(self, buf, off):
+        return dict(zip(self.names, struct.unpack_from(self.fmt, buf, off)))
+
+    def _ram_offset(self, i):
+        return _HDR_SIZE + ((self.start + i) % self.ram_records) * self.rec_size
+
+    def _flash_offset(self, i):
+        return _HDR_SIZE + ((self.flash_start + i) % self.flash_records) * self.rec_size
+
+    def _save_ram(self):
+        struct.pack_into(_HDR, self.mem, 0, _MAGIC, self.rec_size, self.start, self.count)
+        if self.rtc is not None:
+            self.rtc.memory(self.mem)
+
+    def _restore_ram(self):
+        if self.rtc is None:
+            return
+        data = self.rtc.memory()
+        if len(data) != len(self.mem):
+            return
+        magic, rec_size, start, count = struct.unpack_from(_HDR, data, 0)
+        if magic == _MAGIC and rec_size == self.rec_size and start < self.ram_records and count <= self.ram_records:
+            self.mem[:] = data
+            self.start = start
+            self.count = count
+
+    def _open_flash(self):
+        size = _HDR_SIZE + self.flash_records * self.rec_size
+        try:
+            ok = os.stat(self.path)[6] == size
+        except OSError:
+            ok = False
+        if ok:
+            with open(self.path, 'rb') as f:
+                magic, rec_size, start, count = struct.unpack(_HDR, f.read(_HDR_SIZE))
+            if magic == _MAGIC and rec_size == self.rec_size and start < self.flash_records and count <= self.flash_records:
+                self.flash_start = start
+                self.flash_count = count
+                return
+        # missing or written with another layout, start an empty ring
+        with open(self.path, 'wb') as f:
+            self._write_flash_header(f)
+            zero = bytes(self.rec_size)
+            for _ in range(self.flash_records):
+                f.write(zero)
+
+    def _write_flash_header(self, f):
+        f.seek(0)
+        f.write(struct.pack(_HDR, _MAGIC, self.rec_size, self.flash_start, self.flash_count))
+
+    def _flash_push(self, ram_off):
+        with open(self.path, 'r+b') as f:
+            if self.flash_count == self.flash_records:
+                # retention limit reached, drop the oldest reading
+                self.flash_start = (self.flash_start + 1) % self.flash_records
+                self.flash_count -= 1
+            f.seek(self._flash_offset(self.flash_count))
+            f.write(self.mv[ram_off:ram_off + self.rec_size])
+            self.flash_count += 1
+            self._write_flash_header(f)
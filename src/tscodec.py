@@ -0,0 +1,269 @@
+# tscodec.py Compact columnar encoding for batches of readings.
+
+# A batch of readings sharing one field layout (the same (name, type) pairs
+# used with umsgpack.schema) is packed column by column into a bit stream,
+# following the Gorilla time series scheme:
+#  * the time field as delta-of-delta, mostly a single 0 bit at a fixed interval
+#  * float fields ('f') as the XOR with the previous value of the channel,
+#    storing only the meaningful bits between the leading and trailing zeros
+#  * integer fields as the delta from the previous value
+# Times and integers are 32 bit, deltas wrap modulo 2**32.
+# Floats are stored as IEEE-754 single precision, the float size on the ESP32.
+# Names are not sent: both ends must use the same field list.
+#
+# Layout: version (B), reading count (>H), field count (B), then the bit stream
+# with the time column first and the other columns in field order.
+
+import struct
+
+VERSION = 1
+_HEADER = ">BHB"
+_HEADER_SIZE = 4
+_INT_CODES = 'BHIbhi'
+
+
+class TSCodecException(Exception):
+    "Batch cannot be encoded or decoded with the given fields."
+
+
+# number of leading and trailing zero bits of a 32 bit value, v != 0
+def _clz32(v):
+    n = 0
+    if v <= 0x0000ffff:
+        n += 16
+        v <<= 16
+    if v <= 0x00ffffff:
+        n += 8
+        v <<= 8
+    if v <= 0x0fffffff:
+        n += 4
+        v <<= 4
+    if v <= 0x3fffffff:
+        n += 2
+        v <<= 2
+    if v <= 0x7fffffff:
+        n += 1
+    return n
+
+
+def _ctz32(v):
+    n = 0
+    while not v & 1:
+        v >>= 1
+        n += 1
+    return n
+
+
+class _BitWriter:
+    def __init__(self):
+        self.buf = bytearray()
+        self._acc = 0  # Bits not yet written, at most 7
+        self._n = 0
+
+    def write(self, value, nbits):
+        while nbits:
+            take = min(nbits, 8 - self._n)
+            nbits -= take
+            self._acc = (self._acc << take) | ((value >> nbits) & ((1 << take) - 1))
+            self._n += take
+            if self._n == 8:
+                self.buf.append(self._acc)
+                self._acc = 0
+                self._n = 0
+
+    def flush(self):
+        if self._n:
+            self.buf.append(self._acc << (8 - self._n))
+            self._acc = 0
+            self._n = 0
+        return self.buf
+
+
+class _BitReader:
+    def __init__(self, buf, pos):
+        self._buf = buf
+        self._pos = pos * 8  # Bit position
+
+    def read(self, nbits):
+        value = 0
+        buf = self._buf
+        pos = self._pos
+        end = pos + nbits
+        if end > len(buf) * 8:
+            raise TSCodecException("truncated batch")
+        while pos < end:
+            bit = pos & 7
+            take = min(end - pos, 8 - bit)
+            byte = buf[pos >> 3]
+            value = (value << take) | ((byte >> (8 - bit - take)) & ((1 << take) - 1))
+            pos += take
+        self._pos = pos
+        return value
+
+
+# Signed value in variable width buckets: 0 | 10+7 | 110+9 | 1110+12 | 1111+32
+def _put_signed(w, v):
+    if v == 0:
+        w.write(0, 1)
+    elif -64 <= v <= 63:
+        w.write(0b10, 2)
+        w.write(v & 0x7f, 7)
+    elif -256 <= v <= 255:
+        w.write(0b110, 3)
+        w.write(v & 0x1ff, 9)
+    elif -2048 <= v <= 2047:
+        w.write(0b1110, 4)
+        w.write(v & 0xfff, 12)
+    else:
+        w.write(0b1111, 4)
+        w.write(v & 0xffffffff, 32)
+
+
+def _get_signed(r):
+    if not r.read(1):
+        return 0
+    for nbits in (7, 9, 12):
+        if not r.read(1):
+            break
+    else:
+        nbits = 32
+    v = r.read(nbits)
+    if v >= 1 << (nbits - 1):
+        v -= 1 << nbits
+    return v
+
+
+# 32 bit difference as a signed value
+def _wrap32(v):
+    v &= 0xffffffff
+    return v - 0x100000000 if v & 0x80000000 else v
+
+
+def _float_bits(fbuf, v):
+    struct.pack_into(">f", fbuf, 0, v)
+    return struct.unpack_from(">I", fbuf, 0)[0]
+
+
+def _bits_float(fbuf, v):
+    struct.pack_into(">I", fbuf, 0, v)
+    return struct.unpack_from(">f", fbuf, 0)[0]
+
+
+def _put_floats(w, values, fbuf):
+    prev = _float_bits(fbuf, values[0])
+    w.write(prev, 32)
+    lead = trail = 33  # No previous window yet
+    for i in range(1, len(values)):
+        cur = _float_bits(fbuf, values[i])
+        x = cur ^ prev
+        prev = cur
+        if x == 0:
+            w.write(0, 1)
+            continue
+        l = _clz32(x)
+        t = _ctz32(x)
+        if lead <= l and trail <= t:
+            # Meaningful bits fit in the previous window
+            w.write(0b10, 2)
+            w.write(x >> trail, 32 - lead - trail)
+        else:
+            lead = min(l, 31)
+            trail = t
+            w.write(0b11, 2)
+            w.write(lead, 5)
+            w.write(31 - lead - trail, 5)  # Meaningful length - 1
+            w.write(x >> trail, 32 - lead - trail)
+
+
+def _get_floats(r, count, fbuf):
+    prev = r.read(32)
+    values = [_bits_float(fbuf, prev)]
+    lead = trail = 0
+    for _ in range(1, count):
+        if r.read(1):
+            if r.read(1):
+                lead = r.read(5)
+                trail = 32 - lead - (r.read(5) + 1)
+            prev ^= r.read(32 - lead - trail) << trail
+        values.append(_bits_float(fbuf, prev))
+    return values
+
+
+def _columns(fields, time_field):
+    names = [name for name, _ in fields]
+    if time_field not in names:
+        raise TSCodecException("no time field {}".format(time_field))
+    for name, code in fields:
+        if code != 'f' and code not in _INT_CODES:
+            raise TSCodecException("unsupported field type: {}".format(code))
+    return [(name, code) for name, code in fields if name != time_field]
+
+
+def encode(fields, records, time_field='timemark'):
+    # records: sequence of dicts (or anything indexable by field name)
+    count = len(records)
+    if not 0 < count < 2**16:
+        raise TSCodecException("batch must hold 1 to 65535 readings")
+    columns = _columns(fields, time_field)
+    w = _BitWriter()
+    w.buf.extend(struct.pack(_HEADER, VERSION, count, len(fields)))
+
+    # time column: first value in full, then delta-of-delta
+    t = records[0][time_field]
+    w.write(t & 0xffffffff, 32)
+    delta = 0
+    for i in range(1, count):
+        cur = records[i][time_field]
+        d = _wrap32(cur - t)
+        _put_signed(w, _wrap32(d - delta))
+        delta = d
+        t = cur
+
+    fbuf = bytearray(4)
+    for name, code in columns:
+        values = [rec[name] for rec in records]
+        if code == 'f':
+            _put_floats(w, values, fbuf)
+        else:
+            prev = values[0]
+            w.write(prev & 0xffffffff, 32)
+            for i in range(1, count):
+                _put_signed(w, _wrap32(values[i] - prev))
+                prev = values[i]
+    return bytes(w.flush())
+
+
+def decode(fields, data, time_field='timemark'):
+    if len(data) < _HEADER_SIZE:
+        raise TSCodecException("truncated batch")
+    version, count, nfields = struct.unpack_from(_HEADER, data, 0)
+    if version != VERSION:
+        raise TSCodecException("unsupported version {}".format(version))
+    if nfields != len(fields):
+        raise TSCodecException("batch has {} fields, expected {}".format(nfields, len(fields)))
+    columns = _columns(fields, time_field)
+    r = _BitReader(data, _HEADER_SIZE)
+
+    records = [{} for _ in range(count)]
+    t = r.read(32)
+    records[0][time_field] = t
+    delta = 0
+    for i in range(1, count):
+        delta = _wrap32(delta + _get_signed(r))
+        t = (t + delta) & 0xffffffff
+        records[i][time_field] = t
+
+    fbuf = bytearray(4)
+    for name, code in columns:
+        if code == 'f':
+            values = _get_floats(r, count, fbuf)
+        else:
+            signed = code in 'bhi'
+            v = r.read(32)
+            values = [_wrap32(v) if signed else v]
+            for _ in range(1, count):
+                v = (v + _get_signed(r)) & 0xffffffff
+                values.append(_wrap32(v) if signed else v)
+        for i in range(count):
+            records[i][name] = values[i]
+    return records
@@ -0,0 +1,41 @@
+import sys
+from esp32_ulp import preprocess, Assembler, make_binary
+
+# Assembles a ULP program with micropython-esp32-ulp and writes the binary and
+# its symbol map next to the source: ulp_two_pins.S gives ulp_two_pins.ulp and
+# ulp_two_pins.sym.  ULP_WEATHER finds its variables through the .sym file, so
+# rebuild both together whenever the .S changes.  Runs on the board or on a PC
+#
+#   python src/ulp_build.py src/ulp_two_pins.S
+#   >>> import ulp_build; ulp_build.build('ulp_two_pins.S')
+
+SYMBOL_HEADER = """# ULP symbol map written by ulp_build.py, do not edit.
+# word offset from the start of RTC slow memory, symbol name
+"""
+
+
+def build(filename):
+    f = open(filename)
+    src = f.read()
+    f.close()
+
+    assembler = Assembler()
+    assembler.assemble(preprocess(src), remove_comments=False)
+    symbols = assembler.symbols.export()
+    text, data, bss_len = assembler.fetch()
+
+    base = filename[:-2] if filename.endswith(('.s', '.S')) else filename
+    f = open(base + '.ulp', 'wb')
+    f.write(make_binary(text, data, bss_len))
+    f.close()
+    f = open(base + '.sym', 'w')
+    f.write(SYMBOL_HEADER)
+    for addr, name in symbols:
+        f.write('%04d %s\n' % (addr, name))
+    f.close()
+    return symbols
+
+
+if __name__ == '__main__':
+    for addr, name in build(sys.argv[1]):
+        print('%04d %s' % (addr, name))
@@ -1,93 +1,281 @@
-from esp32 import ULP
-from machine import mem32
+from esp32 import ULP, wake_on_ulp
+from machine import ADC, Pin
+from math import atan2, cos, sin, sqrt, pi
+from array import array
+import uctypes
 import time
+from wind_stats import WINDSTATS
 
 ULP_MEM_BASE = 0x50000000
 ULP_DATA_MASK = 0xffff  # ULP data is only in lower 16 bits
 
+# wake_reason() bits
+WAKE_RAIN = 1
+WAKE_GUST = 2
+
+ENTRY_SYMBOL = 'wind_entry'
+WIND_BUCKETS = 128  # wind_buckets_len in ulp_two_pins.S
+VANE_BINS = 64  # vane_bins_len in ulp_two_pins.S
+VANE_ADC_PIN = 39  # vanepad in ulp_two_pins.S
+
+
+def load_symbols(filename):
+    # symbol map written by ulp_build.py: {name: word offset}
+    symbols = {}
+    f = open(filename)
+    for line in f:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            addr, name = line.split()
+            symbols[name] = int(addr)
+    f.close()
+    return symbols
+
+
 class ULP_WEATHER:
-    def __init__(self):
-        f = open('ulp_two_pins.ulp', 'rb')
+    def __init__(self, program='ulp_two_pins'):
+        f = open(program + '.ulp', 'rb')
         binary = f.read()
         f.close()
-        
+        symbols = load_symbols(program + '.sym')
+
         self.load_addr = 0
-        self.entry_addr = ULP_MEM_BASE + (16*4)
+        self.entry_addr = ULP_MEM_BASE + symbols[ENTRY_SYMBOL] * 4
         self.sleep_micro_seconds = 5000
 
         # rain total holder
         self.rain_buckets_counter = 0
-        #wind vars in ulp 
-        # these values are calculated upon a compile of the ULP code.  Currently
-        # this is found through watching the console during the compile and noting the 
-        # memory offsets.
-        self.ulp_wind_debounce_counter = ULP_MEM_BASE + (2*4)
-        self.ulp_wind_debounce_max_count = ULP_MEM_BASE + (3*4)
-        self.ulp_wind_pulse_edge = ULP_MEM_BASE 
-        self.ulp_wind_next_edge = ULP_MEM_BASE + (1*4)
-        self.ulp_wind_edge_count = ULP_MEM_BASE + (7*4)
-        self.ulp_wind_pulse_min = ULP_MEM_BASE + (6*4)
-
-        #rain vars in ulp 
-        self.ulp_rain_debounce_counter = ULP_MEM_BASE + (10*4)
-        self.ulp_rain_debounce_max_count = ULP_MEM_BASE + (11*4)
-        self.ulp_rain_pulse_edge = ULP_MEM_BASE + (8*4) 
-        self.ulp_rain_next_edge = ULP_MEM_BASE + (9*4)
-        self.ulp_rain_edge_count = ULP_MEM_BASE + (15*4)
-        self.ulp_rain_pulse_min = ULP_MEM_BASE + (14*4)  
+
+        # ULP variables are the symbols before the entry point, one word each.
+        # self.mem reads and writes them in place by name.  snapshot() copies
+        # them all in one pass and self.snap reads the copy, the 16 bit fields
+        # drop the upper half the ULP fills with its store instruction.
+        words = symbols[ENTRY_SYMBOL]
+        layout = {}
+        snap_layout = {}
+        for name, addr in symbols.items():
+            if addr < words:
+                layout[name] = uctypes.UINT32 | addr * 4
+                snap_layout[name] = uctypes.UINT16 | addr * 4
+        self.mem = uctypes.struct(ULP_MEM_BASE, layout, uctypes.LITTLE_ENDIAN)
+        self.ulp_vars = uctypes.bytearray_at(ULP_MEM_BASE, words * 4)
+        self.snap_buf = bytearray(words * 4)
+        self.snap = uctypes.struct(uctypes.addressof(self.snap_buf), snap_layout, uctypes.LITTLE_ENDIAN)
+
+        # per second wind pulse counts.  the ring is copied to wind_buf and
+        # read through self.buckets, slot i at buckets[2 * i]
+        self.wind_ring = uctypes.bytearray_at(ULP_MEM_BASE + symbols['wind_buckets'] * 4, WIND_BUCKETS * 4)
+        self.wind_buf = bytearray(WIND_BUCKETS * 4)
+        self.buckets = uctypes.struct(uctypes.addressof(self.wind_buf),
+                                      {'count': (uctypes.ARRAY | 0, uctypes.UINT16 | WIND_BUCKETS * 2)},
+                                      uctypes.LITTLE_ENDIAN).count
+        self.wind_seq = 0  # wind_bucket_seq at the last read
+        self.wind_lost = 0  # seconds that were overwritten before a read
+        self.wind = WINDSTATS()
+
+        # wind vane histogram, 64 ADC ranges, copied to vane_buf like the wind
+        # ring.  vane_cos and vane_sin hold the direction of each bin
+        self.vane_ring = uctypes.bytearray_at(ULP_MEM_BASE + symbols['vane_bins'] * 4, VANE_BINS * 4)
+        self.vane_buf = bytearray(VANE_BINS * 4)
+        self.vane_zero = bytes(VANE_BINS * 4)
+        self.vane_counts = uctypes.struct(uctypes.addressof(self.vane_buf),
+                                          {'count': (uctypes.ARRAY | 0, uctypes.UINT16 | VANE_BINS * 2)},
+                                          uctypes.LITTLE_ENDIAN).count
+        self.vane_cos = array('f', bytes(4 * VANE_BINS))
+        self.vane_sin = array('f', bytes(4 * VANE_BINS))
+        self.vane_adc = None
 
         self.ulp = ULP()
         self.ulp.set_wakeup_period(0, self.sleep_micro_seconds)
         self.ulp.load_binary(self.load_addr, binary)
 
-        mem32[ULP_MEM_BASE + self.load_addr] = 0x0  # initialise state to 0
+        mem = self.mem
         # init starting values for wind
         # min pulse calc.   sleep_micro_seconds * debounce_counter + 1.  5ms * 4 = 20ms
-        mem32[self.ulp_wind_debounce_counter] = 0x1
-        mem32[self.ulp_wind_debounce_max_count] = 0x1
-        mem32[self.ulp_wind_pulse_edge] = 0x1
-        mem32[self.ulp_wind_next_edge] = 0x1
+        mem.wind_debounce_counter = 0x1
+        mem.wind_debounce_max_count = 0x1
+        mem.wind_pulse_edge = 0x1
+        mem.wind_next_edge = 0x1
 
         # init starting values for rain
-        mem32[self.ulp_rain_debounce_counter] = 0x1 
-        mem32[self.ulp_rain_debounce_max_count] = 0x1 
-        mem32[self.ulp_rain_pulse_edge] = 0x1  
-        mem32[self.ulp_rain_next_edge] = 0x1
+        mem.rain_debounce_counter = 0x1
+        mem.rain_debounce_max_count = 0x1
+        mem.rain_pulse_edge = 0x1
+        mem.rain_next_edge = 0x1
+
+        # init wind history
+        mem.wind_second_ticks = 1000000 // self.sleep_micro_seconds
+        mem.wind_tick = 0
+        mem.wind_bucket_count = 0
+        mem.wind_bucket_seq = 0
+        self.reset_gust_lull()
+
+        # no vane sampling until set_vane_sampling
+        mem.vane_sample_ticks = 0
+        mem.vane_tick = 0
+        mem.vane_samples = 0
+
+        # no threshold wake until set_wake_thresholds
+        self.rain_wake_edges = 0
+        self.wind_wake_ticks = 0
+        mem.rain_wake_edges = 0
+        mem.wind_wake_ticks = 0
+        mem.wake_armed = 0
+        mem.wake_reason = 0
 
         self.ulp.run(self.entry_addr)
-    
+
+    def snapshot(self):
+        # copy every ULP variable at once, read them from self.snap
+        self.snap_buf[:] = self.ulp_vars
+        return self.snap
+
+    def set_wake_thresholds(self, rain_pulses=0, gust_seconds=0):
+        # wake the cpu from lightsleep once rain_pulses bucket tips were counted
+        # since the last retrieve_metrics, or on a wind pulse shorter than
+        # gust_seconds.  0 turns a check off
+        self.rain_wake_edges = rain_pulses * 2
+        self.wind_wake_ticks = int(gust_seconds * 1000000 / self.sleep_micro_seconds)
+        self.mem.rain_wake_edges = self.rain_wake_edges
+        self.mem.wind_wake_ticks = self.wind_wake_ticks
+        wake_on_ulp(bool(rain_pulses or gust_seconds))
+
+    def set_vane_sampling(self, seconds, adc_min=0, adc_max=4095):
+        # read the AS5600 analog output on VANE_ADC_PIN every `seconds` while
+        # the cpu sleeps, 0 turns it off.  adc_min and adc_max are the ADC
+        # readings at 0 and 360 degrees
+        if self.vane_adc is None:
+            self.vane_adc = ADC(Pin(VANE_ADC_PIN), atten=ADC.ATTN_11DB)
+        span = adc_max - adc_min
+        for i in range(VANE_BINS):
+            centre = i * (4096 // VANE_BINS) + 2048 // VANE_BINS
+            a = min(max(centre - adc_min, 0), span) * 2 * pi / span
+            self.vane_cos[i] = cos(a)
+            self.vane_sin[i] = sin(a)
+        self.mem.vane_sample_ticks = int(seconds * 1000000 / self.sleep_micro_seconds)
+
+    def arm_wake(self, rain=True, gust=True):
+        # call right before sleeping, the ulp disarms itself when it wakes the
+        # cpu.  rain or gust False leaves that check off for this sleep
+        mem = self.mem
+        mem.rain_wake_edges = self.rain_wake_edges if rain else 0
+        mem.wind_wake_ticks = self.wind_wake_ticks if gust else 0
+        mem.wake_reason = 0
+        mem.wake_armed = 1
+
+    def wake_reason(self):
+        # WAKE_RAIN or WAKE_GUST if the ulp ended the last sleep, else 0
+        self.mem.wake_armed = 0
+        return self.mem.wake_reason & ULP_DATA_MASK
+
     def increment_rain_holder(self, count):
         self.rain_buckets_counter += count
         return self.rain_buckets_counter
 
     def retrieve_metrics(self, seconds):
+        # seconds since the last call, may be a fraction of a second after an
+        # early wake up
         dict = {}
-        wind_p, rain_p = self.get_pulse_count()
-        wind_sp, rain_sp = self.get_shortest_pulse(seconds)
+        snap = self.snapshot()
+        wind_p, rain_p = self.get_pulse_count(snap)
+        wind_sp, rain_sp = self.get_shortest_pulse(seconds, snap)
         dict['wind_total_pulse_count'] = wind_p
         dict['rain_total_pulse_count'] = rain_p
-        dict['wind_avg_pulse_second'] = (wind_p / seconds)
-        dict['rain_avg_pulse_second'] = (rain_p / seconds)
+        if seconds > 0:
+            dict['wind_avg_pulse_second'] = (wind_p / seconds)
+            dict['rain_avg_pulse_second'] = (rain_p / seconds)
+        else:
+            dict['wind_avg_pulse_second'] = 0.0
+            dict['rain_avg_pulse_second'] = 0.0
         # shortest time in seconds betweeen two detected pulses.
-        dict['wind_burst_pulse_second'] = wind_sp 
-        dict['rain_burst_pulse_second'] = rain_sp 
+        dict['wind_burst_pulse_second'] = wind_sp
+        dict['rain_burst_pulse_second'] = rain_sp
         # total number of rain buckets since boot
         dict['rain_total_pulse_counter'] = self.increment_rain_holder(rain_p)
+        # from the per second counts, pulses per second.  None below 3 seconds.
+        # gust and lull cover the whole sleep, the percentiles the last
+        # WIND_BUCKETS seconds
+        wind = self.get_wind_statistics(snap)
+        dict['wind_gust_3s'], dict['wind_lull_3s'] = self.get_gust_lull(snap)
+        dict['wind_p10'] = wind.p10
+        dict['wind_p50'] = wind.p50
+        dict['wind_p90'] = wind.p90
+        # wind vane from the ulp samples weighted by the wind, None without any
+        dict['vane_dir'], dict['vane_r'], dict['vane_weight'] = self.get_vane_statistics()
         return dict
 
-    def get_pulse_count(self):
-        wind_pulse_count = int((mem32[self.ulp_wind_edge_count] & 0xffff) / 2)
-        mem32[self.ulp_wind_edge_count] = (mem32[self.ulp_wind_edge_count] & 0xffff) % 2
-        rain_pulse_count = int((mem32[self.ulp_rain_edge_count] & 0xffff) / 2)
-        mem32[self.ulp_rain_edge_count] = (mem32[self.ulp_rain_edge_count] & 0xffff) % 2
-        return wind_pulse_count, rain_pulse_count
+    def get_vane_statistics(self):
+        # (mean direction in degrees, r, weight) of the vane readings since
+        # the last call.  each reading weighs one plus the wind pulses of the
+        # second before it, weight is their sum.  r is the length of the mean
+        # unit vector, 1 when the vane did not move.  the histogram stays in
+        # self.vane_counts, bin i at vane_counts[2 * i]
+        self.vane_buf[:] = self.vane_ring
+        self.vane_ring[:] = self.vane_zero
+        self.mem.vane_samples = 0
+        counts = self.vane_counts
+        n = 0
+        x = y = 0.0
+        for i in range(VANE_BINS):
+            c = counts[2 * i]
+            if c:
+                n += c
+                x += c * self.vane_cos[i]
+                y += c * self.vane_sin[i]
+        if not n:
+            return None, None, 0
+        return atan2(y, x) * 180 / pi % 360, sqrt(x * x + y * y) / n, n
+
+    def get_wind_statistics(self, snap=None):
+        # the seconds finished since the last call, at most WIND_BUCKETS: the
+        # last WIND_BUCKETS seconds of a longer sleep
+        if snap is None:
+            snap = self.snapshot()
+        seq = snap.wind_bucket_seq
+        n = (seq - self.wind_seq) & ULP_DATA_MASK
+        self.wind_seq = seq
+        self.wind_lost = n - WIND_BUCKETS if n > WIND_BUCKETS else 0
+        n = min(n, WIND_BUCKETS)
+        self.wind_buf[:] = self.wind_ring
+        return self.wind.compute(self.buckets, WIND_BUCKETS, (seq - n) % WIND_BUCKETS, n, 2)
+
+    def get_gust_lull(self, snap=None):
+        # (gust, lull) 3 second means the ulp kept since the last call, None
+        # before it summed 3 seconds
+        if snap is None:
+            snap = self.snapshot()
+        gust = snap.wind_gust_sum
+        lull = snap.wind_lull_sum
+        self.reset_gust_lull()
+        if lull == ULP_DATA_MASK:
+            return None, None
+        return gust / 3, lull / 3
+
+    def reset_gust_lull(self):
+        # the first sum is of the 3 seconds after this
+        mem = self.mem
+        mem.wind_gust_sum = 0
+        mem.wind_lull_sum = ULP_DATA_MASK
+        mem.wind_sum_wait = 2
+
+    def get_pulse_count(self, snap=None):
+        # two edges per pulse, an odd edge stays counted for the next read
+        if snap is None:
+            snap = self.snapshot()
+        wind_edges = snap.wind_edge_count
+        rain_edges = snap.rain_edge_count
+        self.mem.wind_edge_count = wind_edges % 2
+        self.mem.rain_edge_count = rain_edges % 2
+        return wind_edges // 2, rain_edges // 2
 
-    def get_shortest_pulse(self,seconds):
-        wind_pulse_time_us = (mem32[self.ulp_wind_pulse_min] & 0xffff) * self.sleep_micro_seconds
-        mem32[self.ulp_wind_pulse_min] = 0
+    def get_shortest_pulse(self, seconds, snap=None):
+        if snap is None:
+            snap = self.snapshot()
+        wind_pulse_time_us = snap.wind_pulse_min * self.sleep_micro_seconds
+        self.mem.wind_pulse_min = 0
         wind_pulse_time_min = self.compute_shortest_pulse(wind_pulse_time_us, seconds)
-        rain_pulse_time_us = (mem32[self.ulp_rain_pulse_min] & 0xffff) * self.sleep_micro_seconds
-        mem32[self.ulp_rain_pulse_min] = 0
+        rain_pulse_time_us = snap.rain_pulse_min * self.sleep_micro_seconds
+        self.mem.rain_pulse_min = 0
         rain_pulse_time_min = self.compute_shortest_pulse(rain_pulse_time_us, seconds)
         return wind_pulse_time_min, rain_pulse_time_min
 
@@ -95,7 +283,7 @@ class ULP_WEATHER:
         if short_pulse == 0:
             return 0.0
         # inverse and convert to seconds
-        pulse_per_second = 1 / (short_pulse / 1000000) 
+        pulse_per_second = 1 / (short_pulse / 1000000)
         if pulse_per_second > seconds:
             return seconds
         else:
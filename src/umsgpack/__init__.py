@@ -170,6 +170,10 @@ class UnsupportedTypeException(PackException):
     "Object type not supported for packing."
 
 
+class BufferOverflowException(PackException):
+    "Insufficient space in the buffer to pack the object."
+
+
 # Unpacking error
 class InsufficientDataException(UnpackException):
     "Insufficient data to unpack the serialized object."
@@ -193,6 +197,10 @@ class UnhashableKeyException(UnpackException):
 class DuplicateKeyException(UnpackException):
     "Duplicate key encountered during map unpacking."
 
+
+class BufferFullException(UnpackException):
+    "Unpacker buffer cannot hold the data being fed."
+
 # Lazy module load to save RAM: takes about 20μs on Pyboard 1.x after initial load
 
 def load(fp, **options):
@@ -243,7 +251,8 @@ def loads(s, **options):
     Deserialize MessagePack bytes into a Python object.
 
     Args:
-        s: a 'bytes' or 'bytearray' containing serialized MessagePack bytes
+        s: a 'bytes', 'bytearray' or 'memoryview' containing serialized
+           MessagePack bytes
 
     Kwargs:
         ext_handlers (dict): dictionary of Ext handlers, mapping integer Ext
@@ -255,13 +264,21 @@ def loads(s, **options):
                                  (default False)
         allow_invalid_utf8 (bool): unpack invalid strings into bytes
                                  (default False)
+        zero_copy (bool): unpack binaries into memoryview slices of s
+                                 instead of copying them into bytes. The
+                                 slices are only valid while s is unchanged
+                                 (default False)
+        iterative (bool): decode arrays and maps with an explicit stack
+                                 instead of recursion. Use for deeply
+                                 nested messages, flat batches decode
+                                 faster without it (default False)
 
     Returns:
         A Python object.
 
     Raises:
         TypeError:
-            Packed data type is neither 'bytes' nor 'bytearray'.
+            Packed data type is not 'bytes', 'bytearray' or 'memoryview'.
         InsufficientDataException(UnpackException):
             Insufficient data to unpack the serialized object.
         InvalidStringException(UnpackException):
@@ -279,8 +296,11 @@ def loads(s, **options):
     {'compact': True, 'schema': 0}
     >>>
     """
-    from . import mp_load
-    return mp_load.loads(s, options)
+    if options.get('iterative'):
+        from . import mp_unpacker
+        return mp_unpacker.loads(s, options)
+    from . import mp_load_buf
+    return mp_load_buf.loads(s, options)
 
 def dump(obj, fp, **options):
     """
@@ -298,6 +318,10 @@ def dump(obj, fp, **options):
                                      IEEE-754 single-precision floats,
                                      "double" to force packing floats as
                                      IEEE-754 double-precision floats.
+        use_mpext (bool): pass each object through umsgpack_ext.mpext so
+                          complex, set and tuple pack as Ext types. False
+                          skips that step: tuples pack as arrays and
+                          complex or set are unsupported (default True)
 
     Returns:
         None.
@@ -329,6 +353,10 @@ def dumps(obj, **options):
                                      IEEE-754 single-precision floats,
                                      "double" to force packing floats as
                                      IEEE-754 double-precision floats.
+        use_mpext (bool): pass each object through umsgpack_ext.mpext so
+                          complex, set and tuple pack as Ext types. False
+                          skips that step: tuples pack as arrays and
+                          complex or set are unsupported (default True)
 
     Returns:
         A 'bytes' containing serialized MessagePack bytes.
@@ -345,6 +373,123 @@ def dumps(obj, **options):
     from . import mp_dump
     return mp_dump.dumps(obj, options)
 
+def dumps_into(obj, buf, offset=0, **options):
+    """
+    Serialize a Python object into a caller-owned buffer.
+
+    Args:
+        obj: a Python object
+        buf: a writeable 'bytearray' or 'memoryview'
+        offset: position in buf where packing starts (default 0)
+
+    Kwargs:
+        ext_handlers (dict): dictionary of Ext handlers, mapping a custom type
+                             to a callable that packs an instance of the type
+                             into an Ext object
+        force_float_precision (str): "single" to force packing floats as
+                                     IEEE-754 single-precision floats,
+                                     "double" to force packing floats as
+                                     IEEE-754 double-precision floats.
+        use_mpext (bool): pass each object through umsgpack_ext.mpext so
+                          complex, set and tuple pack as Ext types. False
+                          skips that step: tuples pack as arrays and
+                          complex or set are unsupported (default True)
+
+    Returns:
+        Offset in buf immediately after the packed object.
+
+    Raises:
+        UnsupportedType(PackException):
+            Object type not supported for packing.
+        BufferOverflowException(PackException):
+            Object does not fit in the buffer. Contents of buf beyond offset
+            are undefined.
+
+    Example:
+    >>> buf = bytearray(32)
+    >>> n = umsgpack.dumps_into({u"compact": True, u"schema": 0}, buf)
+    >>> bytes(buf[:n])
+    b'\x82\xa7compact\xc3\xa6schema\x00'
+    >>>
+    """
+    from . import mp_dump_into
+    return mp_dump_into.dumps_into(obj, buf, offset, options)
+
+def schema(fields):
+    """
+    Compile a packer for maps with a fixed set of keys and value types.
+
+    Args:
+        fields: sequence of (key, type) pairs in packing order. Type is a
+                struct format character: 'B', 'H', 'I', 'Q', 'b', 'h', 'i',
+                'q' for integers of that width, 'f' or 'd' for single or
+                double precision floats.
+
+    Returns:
+        A Schema object. Its pack(obj) method takes a dict (or anything
+        indexable by the keys) and returns a memoryview of the packed map.
+        The memoryview refers to a buffer owned by the Schema and is only
+        valid until the next call to pack().
+
+    Raises:
+        UnsupportedType(PackException):
+            Unknown type code or key too long.
+
+    Example:
+    >>> s = umsgpack.schema((("temp", "f"), ("wind_dir", "H")))
+    >>> bytes(s.pack({"temp": 21.5, "wind_dir": 180}))
+    b'\x82\xa4temp\xcaA\xac\x00\x00\xa8wind_dir\xcd\x00\xb4'
+    >>>
+    """
+    from . import mp_schema
+    return mp_schema.Schema(fields)
+
+def Unpacker(max_buffer_size=1024, **options):
+    """
+    Create an incremental deserializer for a stream of MessagePack objects.
+
+    Args:
+        max_buffer_size: capacity in bytes of the internal buffer. Must hold
+                         the largest string, binary or ext expected plus any
+                         undecoded bytes between feeds (default 1024)
+
+    Kwargs:
+        ext_handlers (dict): dictionary of Ext handlers, mapping integer Ext
+                             type to a callable that unpacks an instance of
+                             Ext into an object
+        use_ordered_dict (bool): unpack maps into OrderedDict, instead of
+                                 unordered dict (default False)
+        use_tuple (bool): unpacks arrays into tuples, instead of lists
+                                 (default False)
+        allow_invalid_utf8 (bool): unpack invalid strings into bytes
+                                 (default False)
+
+    Returns:
+        An Unpacker object. Pass received bytes to its feed() method and
+        iterate over it to get each object as soon as it is complete.
+        Iteration stops when the buffered bytes run out; incomplete objects
+        are kept and completed by later feeds. reset() discards all state.
+
+    Raises:
+        BufferFullException(UnpackException):
+            From feed(): data does not fit in the buffer. Nothing was
+            accepted; iterate to consume buffered objects and feed again.
+        Any exception raised by loads(), from iteration. The partially
+        unpacked object is discarded and unpacking resumes at the next byte.
+
+    Example:
+    >>> u = umsgpack.Unpacker()
+    >>> u.feed(b'\x92\x01')
+    >>> list(u)
+    []
+    >>> u.feed(b'\x02\xa2ok')
+    >>> list(u)
+    [[1, 2], 'ok']
+    >>>
+    """
+    from . import mp_unpacker
+    return mp_unpacker.Unpacker(max_buffer_size, options)
+
 async def aload(fp, **options):
     """
     Deserialize MessagePack bytes from a StreamReader into a Python object.
@@ -24,7 +24,7 @@ def _fail():  # Debug code should never be called.
 
 # struct.pack returns a bytes object
 
-def _pack_integer(obj, fp):
+def _pack_integer(obj, fp, options):
     if obj < 0:
         if obj >= -32:
             fp.write(struct.pack("b", obj))
@@ -61,11 +61,11 @@ def _pack_integer(obj, fp):
             raise UnsupportedTypeException("huge unsigned int")
 
 
-def _pack_nil(obj, fp):
+def _pack_nil(obj, fp, options):
     fp.write(b"\xc0")
 
 
-def _pack_boolean(obj, fp):
+def _pack_boolean(obj, fp, options):
     fp.write(b"\xc3" if obj else b"\xc2")
 
 
@@ -81,7 +81,7 @@ def _pack_float(obj, fp, options):
         raise ValueError("invalid float precision")
 
 
-def _pack_string(obj, fp):
+def _pack_string(obj, fp, options):
     obj = bytes(obj, 'utf-8')  # Preferred MP encode method
     obj_len = len(obj)
     if obj_len < 32:
@@ -99,7 +99,7 @@ def _pack_string(obj, fp):
         raise UnsupportedTypeException("huge string")
     fp.write(obj)
 
-def _pack_binary(obj, fp):
+def _pack_binary(obj, fp, options):
     obj_len = len(obj)
     if obj_len < 2**8:
         fp.write(b"\xc4")
@@ -168,40 +168,72 @@ def _pack_map(obj, fp, options):
         dump(k, fp, options)
         dump(v, fp, options)
 
+def _pack_ext_obj(obj, fp, options):
+    _pack_ext(obj, fp)
+
 def _utype(obj):
     raise UnsupportedTypeException("unsupported type: {:s}".format(str(type(obj))))
 
-# Pack with unicode 'str' type, 'bytes' type
-def dump(obj, fp, options):
-    # return packable object if supported in umsgpack_ext, else return obj
-    obj = mpext(obj, options)  
-    ext_handlers = options.get("ext_handlers")
+# Packer for each exact type. Subclasses of these are added on first use.
+_packers = {
+    type(None): _pack_nil,
+    bool: _pack_boolean,
+    int: _pack_integer,
+    float: _pack_float,
+    str: _pack_string,
+    bytes: _pack_binary,
+    bytearray: _pack_binary,
+    memoryview: _pack_binary,
+    list: _pack_array,
+    tuple: _pack_array,
+    dict: _pack_map,
+    Ext: _pack_ext_obj,
+}
 
-    if obj is None:
-        _pack_nil(obj, fp)
-    elif ext_handlers and obj.__class__ in ext_handlers:
-        _pack_ext(ext_handlers[obj.__class__](obj), fp)
-    elif obj.__class__ in ext_class_to_type:
-        try:
-            _pack_ext(Ext(ext_class_to_type[obj.__class__], obj.packb()), fp)
-        except AttributeError:
-            raise NotImplementedError("Ext class {:s} lacks packb()".format(repr(obj.__class__)))
-    elif isinstance(obj, bool):
-        _pack_boolean(obj, fp)
+# Packer for a subclass of a natively supported type, else None
+def _subclass_packer(obj):
+    if isinstance(obj, bool):
+        return _pack_boolean
     elif isinstance(obj, int):
-        _pack_integer(obj, fp)
+        return _pack_integer
     elif isinstance(obj, float):
-        _pack_float(obj, fp, options)
+        return _pack_float
     elif isinstance(obj, str):
-        _pack_string(obj, fp)
-    elif isinstance(obj, bytes):
-        _pack_binary(obj, fp)
+        return _pack_string
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        return _pack_binary
     elif isinstance(obj, (list, tuple)):
-        _pack_array(obj, fp, options)
+        return _pack_array
     elif isinstance(obj, dict):
-        _pack_map(obj, fp, options)
+        return _pack_map
     elif isinstance(obj, Ext):
-        _pack_ext(obj, fp)
+        return _pack_ext_obj
+    return None
+
+# Pack with unicode 'str' type, 'bytes' type
+def dump(obj, fp, options):
+    # return packable object if supported in umsgpack_ext, else return obj
+    if options.get("use_mpext", True):
+        obj = mpext(obj, options)
+    cls = obj.__class__
+    ext_handlers = options.get("ext_handlers")
+
+    if ext_handlers and cls in ext_handlers:
+        _pack_ext(ext_handlers[cls](obj), fp)
+        return
+    if cls in ext_class_to_type:
+        try:
+            _pack_ext(Ext(ext_class_to_type[cls], obj.packb()), fp)
+        except AttributeError:
+            raise NotImplementedError("Ext class {:s} lacks packb()".format(repr(cls)))
+        return
+    packer = _packers.get(cls)
+    if packer is None:
+        packer = _subclass_packer(obj)
+        if packer is not None:
+            _packers[cls] = packer
+    if packer is not None:
+        packer(obj, fp, options)
     elif ext_handlers:
         # Linear search for superclass
         t = next((t for t in ext_handlers.keys() if isinstance(obj, t)), None)
@@ -0,0 +1,259 @@
+# mp_dump_into.py MessagePack serializer writing into a caller-owned buffer.
+
+# Original source: https://github.com/vsergeev/u-msgpack-python
+# See __init__.py for details of changes made for MicroPython.
+
+# Same encoding rules as mp_dump.py but every packer writes directly into a
+# bytearray or memoryview with struct.pack_into and returns the offset after
+# the bytes it wrote. Nothing is allocated for the encoded data itself.
+
+import struct
+try:
+    from .umsgpack_ext import mpext
+except ImportError:
+    mpext = lambda x, _ : x
+
+from . import *
+from .mp_dump import _float_precision
+
+
+def _room(buf, off, n):
+    if off + n > len(buf):
+        raise BufferOverflowException("{:d} bytes needed at offset {:d}, buffer is {:d}".format(n, off, len(buf)))
+
+
+def _pack_code(code, fmt, obj, buf, off):
+    n = struct.calcsize(fmt)
+    _room(buf, off, n + 1)
+    buf[off] = code
+    struct.pack_into(fmt, buf, off + 1, obj)
+    return off + n + 1
+
+
+def _pack_byte(obj, buf, off):
+    _room(buf, off, 1)
+    buf[off] = obj & 0xff
+    return off + 1
+
+
+def _pack_data(obj, buf, off):
+    n = len(obj)
+    _room(buf, off, n)
+    buf[off:off + n] = obj
+    return off + n
+
+
+def _pack_integer(obj, buf, off, options):
+    if obj < 0:
+        if obj >= -32:
+            return _pack_byte(obj, buf, off)
+        elif obj >= -2**(8 - 1):
+            return _pack_code(0xd0, "b", obj, buf, off)
+        elif obj >= -2**(16 - 1):
+            return _pack_code(0xd1, ">h", obj, buf, off)
+        elif obj >= -2**(32 - 1):
+            return _pack_code(0xd2, ">i", obj, buf, off)
+        elif obj >= -2**(64 - 1):
+            return _pack_code(0xd3, ">q", obj, buf, off)
+        raise UnsupportedTypeException("huge signed int")
+    if obj < 128:
+        return _pack_byte(obj, buf, off)
+    elif obj < 2**8:
+        return _pack_code(0xcc, "B", obj, buf, off)
+    elif obj < 2**16:
+        return _pack_code(0xcd, ">H", obj, buf, off)
+    elif obj < 2**32:
+        return _pack_code(0xce, ">I", obj, buf, off)
+    elif obj < 2**64:
+        return _pack_code(0xcf, ">Q", obj, buf, off)
+    raise UnsupportedTypeException("huge unsigned int")
+
+
+def _pack_float(obj, buf, off, options):
+    fpr = options.get('force_float_precision', _float_precision)
+    if fpr == "double":
+        return _pack_code(0xcb, ">d", obj, buf, off)
+    elif fpr == "single":
+        return _pack_code(0xca, ">f", obj, buf, off)
+    raise ValueError("invalid float precision")
+
+
+def _pack_string(obj, buf, off, options):
+    obj = bytes(obj, 'utf-8')  # Preferred MP encode method
+    obj_len = len(obj)
+    if obj_len < 32:
+        off = _pack_byte(0xa0 | obj_len, buf, off)
+    elif obj_len < 2**8:
+        off = _pack_code(0xd9, "B", obj_len, buf, off)
+    elif obj_len < 2**16:
+        off = _pack_code(0xda, ">H", obj_len, buf, off)
+    elif obj_len < 2**32:
+        off = _pack_code(0xdb, ">I", obj_len, buf, off)
+    else:
+        raise UnsupportedTypeException("huge string")
+    return _pack_data(obj, buf, off)
+
+
+def _pack_binary(obj, buf, off, options):
+    obj_len = len(obj)
+    if obj_len < 2**8:
+        off = _pack_code(0xc4, "B", obj_len, buf, off)
+    elif obj_len < 2**16:
+        off = _pack_code(0xc5, ">H", obj_len, buf, off)
+    elif obj_len < 2**32:
+        off = _pack_code(0xc6, ">I", obj_len, buf, off)
+    else:
+        raise UnsupportedTypeException("huge binary string")
+    return _pack_data(obj, buf, off)
+
+
+def _pack_ext(obj, buf, off, tb = b'\x00\xd4\xd5\x00\xd6\x00\x00\x00\xd7\x00\x00\x00\x00\x00\x00\x00\xd8'):
+    od = obj.data
+    obj_len = len(od)
+    ot = obj.type & 0xff
+    code = tb[obj_len] if obj_len <= 16 else 0
+    if code:
+        off = _pack_code(code, "B", ot, buf, off)
+    elif obj_len < 2**8:
+        off = _pack_code(0xc7, "B", obj_len, buf, off)
+        off = _pack_byte(ot, buf, off)
+    elif obj_len < 2**16:
+        off = _pack_code(0xc8, ">H", obj_len, buf, off)
+        off = _pack_byte(ot, buf, off)
+    elif obj_len < 2**32:
+        off = _pack_code(0xc9, ">I", obj_len, buf, off)
+        off = _pack_byte(ot, buf, off)
+    else:
+        raise UnsupportedTypeException("huge ext data")
+    return _pack_data(od, buf, off)
+
+
+def _pack_array(obj, buf, off, options):
+    obj_len = len(obj)
+    if obj_len < 16:
+        off = _pack_byte(0x90 | obj_len, buf, off)
+    elif obj_len < 2**16:
+        off = _pack_code(0xdc, ">H", obj_len, buf, off)
+    elif obj_len < 2**32:
+        off = _pack_code(0xdd, ">I", obj_len, buf, off)
+    else:
+        raise UnsupportedTypeException("huge array")
+
+    for e in obj:
+        off = dump_into(e, buf, off, options)
+    return off
+
+
+def _pack_map(obj, buf, off, options):
+    obj_len = len(obj)
+    if obj_len < 16:
+        off = _pack_byte(0x80 | obj_len, buf, off)
+    elif obj_len < 2**16:
+        off = _pack_code(0xde, ">H", obj_len, buf, off)
+    elif obj_len < 2**32:
+        off = _pack_code(0xdf, ">I", obj_len, buf, off)
+    else:
+        raise UnsupportedTypeException("huge array")
+
+    for k, v in obj.items():
+        off = dump_into(k, buf, off, options)
+        off = dump_into(v, buf, off, options)
+    return off
+
+
+def _pack_nil(obj, buf, off, options):
+    return _pack_byte(0xc0, buf, off)
+
+
+def _pack_boolean(obj, buf, off, options):
+    return _pack_byte(0xc3 if obj else 0xc2, buf, off)
+
+
+def _pack_ext_obj(obj, buf, off, options):
+    return _pack_ext(obj, buf, off)
+
+
+def _utype(obj):
+    raise UnsupportedTypeException("unsupported type: {:s}".format(str(type(obj))))
+
+
+# Packer for each exact type. Subclasses of these are added on first use.
+_packers = {
+    type(None): _pack_nil,
+    bool: _pack_boolean,
+    int: _pack_integer,
+    float: _pack_float,
+    str: _pack_string,
+    bytes: _pack_binary,
+    bytearray: _pack_binary,
+    memoryview: _pack_binary,
+    list: _pack_array,
+    tuple: _pack_array,
+    dict: _pack_map,
+    Ext: _pack_ext_obj,
+}
+
+
+# Packer for a subclass of a natively supported type, else None
+def _subclass_packer(obj):
+    if isinstance(obj, bool):
+        return _pack_boolean
+    elif isinstance(obj, int):
+        return _pack_integer
+    elif isinstance(obj, float):
+        return _pack_float
+    elif isinstance(obj, str):
+        return _pack_string
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        return _pack_binary
+    elif isinstance(obj, (list, tuple)):
+        return _pack_array
+    elif isinstance(obj, dict):
+        return _pack_map
+    elif isinstance(obj, Ext):
+        return _pack_ext_obj
+    return None
+
+
+def dump_into(obj, buf, off, options):
+    # return packable object if supported in umsgpack_ext, else return obj
+    if options.get("use_mpext", True):
+        obj = mpext(obj, options)
+    cls = obj.__class__
+    ext_handlers = options.get("ext_handlers")
+
+    if ext_handlers and cls in ext_handlers:
+        return _pack_ext(ext_handlers[cls](obj), buf, off)
+    if cls in ext_class_to_type:
+        try:
+            return _pack_ext(Ext(ext_class_to_type[cls], obj.packb()), buf, off)
+        except AttributeError:
+            raise NotImplementedError("Ext class {:s} lacks packb()".format(repr(cls)))
+    packer = _packers.get(cls)
+    if packer is None:
+        packer = _subclass_packer(obj)
+        if packer is not None:
+            _packers[cls] = packer
+    if packer is not None:
+        return packer(obj, buf, off, options)
+    elif ext_handlers:
+        # Linear search for superclass
+        t = next((t for t in ext_handlers.keys() if isinstance(obj, t)), None)
+        if t:
+            return _pack_ext(ext_handlers[t](obj), buf, off)
+    elif ext_class_to_type:
+        # Linear search for superclass
+        t = next((t for t in ext_class_to_type if isinstance(obj, t)), None)
+        if t:
+            try:
+                return _pack_ext(Ext(ext_class_to_type[t], obj.packb()), buf, off)
+            except AttributeError:
+                pass
+    _utype(obj)
+
+# Interface to __init__.py
+
+def dumps_into(obj, buf, offset, options):
+    if not 0 <= offset <= len(buf):
+        raise ValueError("offset {:d} outside buffer".format(offset))
+    return dump_into(obj, buf, offset, options)
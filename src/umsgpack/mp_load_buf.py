@@ -0,0 +1,253 @@
+# mp_load_buf.py MessagePack deserializer working on an in-memory buffer.
+
+# Original source: https://github.com/vsergeev/u-msgpack-python
+# See __init__.py for details of changes made for MicroPython.
+
+# Decodes directly from a memoryview of the packed data: a cursor is advanced
+# through the buffer and scalars are read with struct.unpack_from, so no
+# stream object is created and no intermediate bytes are read per field.
+# Strings are decoded from slices of the view; binaries are copied to bytes,
+# or returned as memoryview slices of the input if zero_copy is set.
+
+import struct
+import collections
+from . import *
+try:
+    from . import umsgpack_ext
+except ImportError:
+    pass
+
+def _fail():  # Debug code should never be called.
+    raise Exception('Logic error')
+
+
+# struct formats for codes 0xcc to 0xd3
+_int_formats = ("B", ">H", ">I", ">Q", "b", ">h", ">i", ">q")
+
+
+def _deep_list_to_tuple(obj):
+    if isinstance(obj, list):
+        return tuple([_deep_list_to_tuple(e) for e in obj])
+    return obj
+
+
+class _Reader:
+    def __init__(self, s, options):
+        self.buf = memoryview(s)
+        self.end = len(s)
+        self.pos = 0
+        self.options = options
+        self.zero_copy = options.get('zero_copy')
+
+    # Advance the cursor by n bytes and return the start offset
+    def _take(self, n):
+        pos = self.pos
+        end = pos + n
+        if end > self.end:
+            raise InsufficientDataException()
+        self.pos = end
+        return pos
+
+    def _re0(self, s, n):
+        return struct.unpack_from(s, self.buf, self._take(n))[0]
+
+    def _unpack_float(self, ic):
+        if ic == 0xca:
+            return self._re0(">f", 4)
+        if ic == 0xcb:
+            return self._re0(">d", 8)
+        _fail()
+
+    def _unpack_string(self, ic):
+        if (ic & 0xe0) == 0xa0:
+            length = ic & ~0xe0
+        elif ic == 0xd9:
+            length = self._re0("B", 1)
+        elif ic == 0xda:
+            length = self._re0(">H", 2)
+        elif ic == 0xdb:
+            length = self._re0(">I", 4)
+        else:
+            _fail()
+
+        pos = self._take(length)
+        data = self.buf[pos : pos + length]
+        try:
+            return str(data, 'utf-8')  # Preferred MP way to decode
+        except:  # MP does not have UnicodeDecodeError
+            if self.options.get("allow_invalid_utf8"):
+                return bytes(data)  # MP Remove InvalidString class: subclass of built-in class
+            raise InvalidStringException("unpacked string is invalid utf-8")
+
+    def _unpack_binary(self, ic):
+        if ic == 0xc4:
+            length = self._re0("B", 1)
+        elif ic == 0xc5:
+            length = self._re0(">H", 2)
+        elif ic == 0xc6:
+            length = self._re0(">I", 4)
+        else:
+            _fail()
+
+        pos = self._take(length)
+        data = self.buf[pos : pos + length]
+        return data if self.zero_copy else bytes(data)
+
+    def _unpack_ext(self, ic):
+        length = 1 << (ic - 0xd4) if 0xd4 <= ic <= 0xd8 else 0
+        if not length:
+            if ic == 0xc7:
+                length = self._re0("B", 1)
+            elif ic == 0xc8:
+                length = self._re0(">H", 2)
+            elif ic == 0xc9:
+                length = self._re0(">I", 4)
+            else:
+                _fail()
+
+        ext_type = self._re0("b", 1)
+        pos = self._take(length)
+        ext_data = bytes(self.buf[pos : pos + length])
+
+        # Create extension object
+        ext = Ext(ext_type, ext_data)
+
+        # Unpack with ext handler, if we have one
+        ext_handlers = self.options.get("ext_handlers")
+        if ext_handlers and ext.type in ext_handlers:
+            return ext_handlers[ext.type](ext)
+        # Unpack with ext classes, if type is registered
+        if ext_type in ext_type_to_class:
+            try:
+                return ext_type_to_class[ext_type].unpackb(ext_data)
+            except AttributeError:
+                raise NotImplementedError("Ext class {:s} lacks unpackb()".format(repr(ext_type_to_class[ext_type])))
+
+        return ext
+
+    def _unpack_array(self, ic):
+        if (ic & 0xf0) == 0x90:
+            length = (ic & ~0xf0)
+        elif ic == 0xdc:
+            length = self._re0(">H", 2)
+        elif ic == 0xdd:
+            length = self._re0(">I", 4)
+        else:
+            _fail()
+        l = []
+        for _ in range(length):
+            l.append(self.load())
+        return tuple(l) if self.options.get('use_tuple') else l
+
+    def _unpack_map(self, ic):
+        if (ic & 0xf0) == 0x80:
+            length = (ic & ~0xf0)
+        elif ic == 0xde:
+            length = self._re0(">H", 2)
+        elif ic == 0xdf:
+            length = self._re0(">I", 4)
+        else:
+            _fail()
+
+        d = {} if not self.options.get('use_ordered_dict') \
+            else collections.OrderedDict()
+        for _ in range(length):
+            # Unpack key
+            k = self.load()
+
+            if isinstance(k, list):
+                # Attempt to convert list into a hashable tuple
+                k = _deep_list_to_tuple(k)
+            try:
+                hash(k)
+            except:
+                raise UnhashableKeyException(
+                    "unhashable key: \"{:s}\"".format(str(k)))
+            if k in d:
+                raise DuplicateKeyException(
+                    "duplicate key: \"{:s}\" ({:s})".format(str(k), str(type(k))))
+
+            # Unpack value
+            v = self.load()
+
+            try:
+                d[k] = v
+            except TypeError:
+                raise UnhashableKeyException(
+                    "unhashable key: \"{:s}\"".format(str(k)))
+        return d
+
+    def load(self):
+        pos = self.pos
+        if pos >= self.end:
+            raise InsufficientDataException()
+        buf = self.buf
+        ic = buf[pos]
+        pos += 1
+        self.pos = pos
+        # Inline the types that make up telemetry records
+        if ic <= 0x7f:
+            return ic
+        if ic >= 0xe0:
+            return ic - 0x100
+        if ic == 0xca:
+            end = pos + 4
+            if end > self.end:
+                raise InsufficientDataException()
+            self.pos = end
+            return struct.unpack_from(">f", buf, pos)[0]
+        if 0xa0 <= ic <= 0xbf:
+            end = pos + (ic & 0x1f)
+            if end > self.end:
+                raise InsufficientDataException()
+            self.pos = end
+            try:
+                return str(buf[pos : end], 'utf-8')
+            except:
+                if self.options.get("allow_invalid_utf8"):
+                    return bytes(buf[pos : end])
+                raise InvalidStringException("unpacked string is invalid utf-8")
+        if ic == 0xc4:
+            if pos >= self.end:
+                raise InsufficientDataException()
+            pos += 1
+            end = pos + buf[pos - 1]
+            if end > self.end:
+                raise InsufficientDataException()
+            self.pos = end
+            return buf[pos : end] if self.zero_copy else bytes(buf[pos : end])
+        if 0xcc <= ic <= 0xd3:
+            ic -= 0xcc
+            end = pos + (1 << (ic & 3))
+            if end > self.end:
+                raise InsufficientDataException()
+            self.pos = end
+            return struct.unpack_from(_int_formats[ic], buf, pos)[0]
+        if ic <= 0xc9:
+            if ic <= 0xc3:
+                if ic <= 0x8f:
+                    return self._unpack_map(ic)
+                if ic <= 0x9f:
+                    return self._unpack_array(ic)
+                if ic == 0xc1:
+                    raise ReservedCodeException("got reserved code: 0xc1")
+                return (None, 0, False, True)[ic - 0xc0]
+            if ic <= 0xc6:
+                return self._unpack_binary(ic)
+            return self._unpack_ext(ic)
+        if ic <= 0xcb:
+            return self._unpack_float(ic)
+        if ic <= 0xd8:
+            return self._unpack_ext(ic)
+        if ic <= 0xdb:
+            return self._unpack_string(ic)
+        if ic <= 0xdd:
+            return self._unpack_array(ic)
+        return self._unpack_map(ic)
+
+# Interface to __init__.py
+
+def loads(s, options):
+    if not isinstance(s, (bytes, bytearray, memoryview)):
+        raise TypeError("packed data must be type 'bytes', 'bytearray' or 'memoryview'")
+    return _Reader(s, options).load()
@@ -0,0 +1,73 @@
+# mp_schema.py Fixed-layout MessagePack map packer.
+
+# Packs maps whose keys and value types never change. The map header, the keys
+# and each value's type byte are encoded once when the Schema is built; packing
+# only writes the values into their fixed slots of a preallocated bytearray.
+# Integers are always packed at their declared width rather than the smallest
+# encoding, so the output is valid MessagePack that any unpacker will accept.
+
+import struct
+from . import *
+
+# Schema type code: (MessagePack type byte, struct format of the value)
+_types = {
+    'B': (0xcc, 'B'),
+    'H': (0xcd, '>H'),
+    'I': (0xce, '>I'),
+    'Q': (0xcf, '>Q'),
+    'b': (0xd0, 'b'),
+    'h': (0xd1, '>h'),
+    'i': (0xd2, '>i'),
+    'q': (0xd3, '>q'),
+    'f': (0xca, '>f'),
+    'd': (0xcb, '>d'),
+}
+
+
+def _map_header(n):
+    if n < 16:
+        return struct.pack("B", 0x80 | n)
+    if n < 2**16:
+        return b"\xde" + struct.pack(">H", n)
+    raise UnsupportedTypeException("huge map")
+
+
+def _key(name):
+    key = bytes(name, 'utf-8')
+    n = len(key)
+    if n < 32:
+        return struct.pack("B", 0xa0 | n) + key
+    if n < 2**8:
+        return b"\xd9" + struct.pack("B", n) + key
+    raise UnsupportedTypeException("huge key")
+
+
+class Schema:
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        layout = [_map_header(len(self.fields))]
+        slots = []
+        off = len(layout[0])
+        for name, code in self.fields:
+            try:
+                marker, fmt = _types[code]
+            except KeyError:
+                raise UnsupportedTypeException("unsupported schema type: {}".format(code))
+            key = _key(name)
+            off += len(key) + 1  # Value follows key and type byte
+            layout.append(key)
+            layout.append(struct.pack("B", marker))
+            layout.append(bytes(struct.calcsize(fmt)))
+            slots.append((name, fmt, off))
+            off += struct.calcsize(fmt)
+        self._buf = bytearray(b"".join(layout))
+        self._mv = memoryview(self._buf)
+        self._slots = tuple(slots)
+        self.size = off
+
+    def pack(self, obj):
+        # Returns a memoryview of the internal buffer: valid until next pack.
+        buf = self._buf
+        for name, fmt, off in self._slots:
+            struct.pack_into(fmt, buf, off, obj[name])
+        return self._mv
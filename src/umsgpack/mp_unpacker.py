@@ -0,0 +1,204 @@
+# mp_unpacker.py Incremental MessagePack deserializer for byte streams.
+
+# Bytes are fed in arbitrary chunks (e.g. whatever a UART read returned) and
+# complete objects are yielded as soon as their last byte arrives. Partially
+# received arrays and maps are kept on an explicit stack between feeds, so a
+# feed only ever decodes the bytes that follow the last complete element; an
+# element split across feeds is retried from its own first byte, never from
+# the start of the enclosing object. The input buffer has a fixed capacity.
+# The same decoder backs loads(..., iterative=True) for complete messages.
+
+import struct
+import collections
+from array import array
+from . import *
+from .mp_load_buf import _Reader, _deep_list_to_tuple, _int_formats
+
+_MISSING = object()  # Sentinel: None is a valid unpacked object
+_DEPTH = 8  # Initial capacity of the counts array, doubled when exceeded
+
+
+# Explicit stack decoder: nesting depth costs a list entry and an array slot,
+# not a Python frame
+class _Decoder:
+    def __init__(self, buf, options):
+        self._buf = buf
+        self._start = 0  # First byte not yet decoded
+        self._end = len(buf)  # End of received data
+        # Partially built containers, a map's key on top of it while its value
+        # is still to come. _counts[d] for the container at depth d: elements
+        # still to come (keys and values for a map) << 1 | is_map
+        self._stack = []
+        self._counts = array('q', bytes(8 * _DEPTH))
+        self._depth = 0
+        self._options = options
+        self._reader = _Reader(buf, options)
+
+    def _unpack(self):
+        stack = self._stack
+        counts = self._counts
+        depth = self._depth
+        reader = self._reader
+        buf = self._reader.buf
+        end = self._end
+        use_tuple = self._options.get('use_tuple')
+        ordered = self._options.get('use_ordered_dict')
+        pos = self._start
+        elem = pos
+        try:
+            while True:
+                elem = pos
+                if pos >= end:
+                    return _MISSING
+                ic = buf[pos]
+                if 0x80 <= ic <= 0x9f or 0xdc <= ic <= 0xdf:
+                    if ic <= 0x9f:  # fixmap, fixarray
+                        length = ic & 0x0f
+                        pos += 1
+                    else:
+                        n = 2 if ic == 0xdc or ic == 0xde else 4
+                        if pos + 1 + n > end:
+                            return _MISSING
+                        length = 0
+                        for i in range(pos + 1, pos + 1 + n):
+                            length = (length << 8) | buf[i]
+                        pos += 1 + n
+                    is_map = ic <= 0x8f or ic >= 0xde
+                    if is_map:
+                        obj = collections.OrderedDict() if ordered else {}
+                    else:
+                        obj = []
+                    if length:
+                        if depth == len(counts):
+                            counts.extend(array('q', bytes(8 * depth)))
+                        counts[depth] = (length << 2 | 1) if is_map else length << 1
+                        depth += 1
+                        stack.append(obj)
+                        continue
+                    if use_tuple and not is_map:
+                        obj = ()
+                elif ic <= 0x7f or ic >= 0xe0:  # fixint
+                    obj = ic if ic <= 0x7f else ic - 0x100
+                    pos += 1
+                elif ic == 0xca:  # float32, the bulk of telemetry records
+                    if pos + 5 > end:
+                        return _MISSING
+                    obj = struct.unpack_from(">f", buf, pos + 1)[0]
+                    pos += 5
+                elif 0xa0 <= ic <= 0xbf:  # fixstr, the map keys
+                    n = pos + 1 + (ic & 0x1f)
+                    if n > end:
+                        return _MISSING
+                    try:
+                        obj = str(buf[pos + 1 : n], 'utf-8')
+                    except:  # Invalid utf-8, the reader raises or returns bytes
+                        reader.pos = pos
+                        reader.end = end
+                        obj = reader.load()
+                    pos = n
+                elif 0xcc <= ic <= 0xd3:  # uint8 to int64
+                    n = pos + 1 + (1 << (ic & 3))
+                    if n > end:
+                        return _MISSING
+                    obj = struct.unpack_from(_int_formats[ic - 0xcc], buf, pos + 1)[0]
+                    pos = n
+                else:
+                    reader.pos = pos
+                    reader.end = end
+                    try:
+                        obj = reader.load()
+                    except InsufficientDataException:
+                        return _MISSING
+                    pos = reader.pos
+                # Store obj in its container and pop every container it completes
+                while depth:
+                    c = counts[depth - 1]
+                    if not c & 1:
+                        stack[-1].append(obj)
+                    elif not c & 2:  # Even count left: obj is a key
+                        if isinstance(obj, list):
+                            # Attempt to convert list into a hashable tuple
+                            obj = _deep_list_to_tuple(obj)
+                        try:
+                            hash(obj)
+                        except:
+                            raise UnhashableKeyException(
+                                "unhashable key: \"{:s}\"".format(str(obj)))
+                        if obj in stack[-1]:
+                            raise DuplicateKeyException(
+                                "duplicate key: \"{:s}\" ({:s})".format(str(obj), str(type(obj))))
+                        counts[depth - 1] = c - 2
+                        stack.append(obj)
+                        break  # Value still to come
+                    else:
+                        key = stack.pop()
+                        stack[-1][key] = obj
+                    c -= 2
+                    counts[depth - 1] = c
+                    if c > 1:
+                        break
+                    depth -= 1
+                    obj = stack.pop()
+                    if use_tuple and not c:
+                        obj = tuple(obj)
+                else:
+                    return obj
+        except Exception:
+            # Discard the partial object and resume after the bad byte, also
+            # when an ext handler failed
+            stack.clear()
+            depth = 0
+            pos = max(pos, elem + 1)
+            raise
+        finally:
+            self._start = pos
+            self._depth = depth
+
+
+class Unpacker(_Decoder):
+    def __init__(self, max_buffer_size, options):
+        super().__init__(bytearray(max_buffer_size), options)
+        self._mv = memoryview(self._buf)
+        self._end = 0
+        self._reader.zero_copy = False  # Buffer contents move on compaction
+
+    def feed(self, data):
+        n = len(data)
+        size = len(self._buf)
+        if self._end + n > size:
+            keep = self._end - self._start
+            if keep + n > size:
+                raise BufferFullException("{:d} bytes buffered, cannot accept {:d} more".format(keep, n))
+            self._mv[0 : keep] = self._mv[self._start : self._end]
+            self._start = 0
+            self._end = keep
+        self._mv[self._end : self._end + n] = data
+        self._end += n
+
+    def reset(self):
+        self._start = 0
+        self._end = 0
+        self._stack.clear()
+        self._depth = 0
+
+    def buffered(self):
+        return self._end - self._start
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        obj = self._unpack()
+        if obj is _MISSING:
+            raise StopIteration
+        return obj
+
+# Interface to __init__.py
+
+def loads(s, options):
+    if not isinstance(s, (bytes, bytearray, memoryview)):
+        raise TypeError("packed data must be type 'bytes', 'bytearray' or 'memoryview'")
+    obj = _Decoder(memoryview(s), options)._unpack()
+    if obj is _MISSING:
+        raise InsufficientDataException()
+    return obj
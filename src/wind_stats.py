@@ -0,0 +1,74 @@
+from array import array
+
+# Wind statistics from per second pulse counts, as the ULP logs them into its
+# wind_buckets ring.  One pass over the seconds since the last read gives
+#
+#   mean      pulses per second over all of them
+#   gust      highest 3 second mean (WMO gust)
+#   lull      lowest 3 second mean
+#   p10, p50, p90
+#             percentiles of the 1 second counts, from a histogram
+#
+# All in pulses per second, None until there are 3 seconds.  Apart from the
+# three float results nothing is allocated per call, counts above max_count
+# go to the top histogram bin.
+
+
+class WINDSTATS:
+    def __init__(self, **kwargs):
+        self.hist = array('H', bytes(2 * (kwargs.get('max_count', 63) + 1)))
+        self.seconds = 0
+        self.pulses = 0
+        self.mean = None
+        self.gust = None
+        self.lull = None
+        self.p10 = None
+        self.p50 = None
+        self.p90 = None
+
+    def compute(self, buckets, slots, start, n, stride=1):
+        # n seconds of counts from slot start on of a ring of `slots` slots.
+        # slot i is buckets[i * stride]: stride 2 reads the low half of the
+        # 32 bit ULP words through an array of 16 bit values
+        hist = self.hist
+        top = len(hist) - 1
+        for i in range(len(hist)):
+            hist[i] = 0
+        pulses = 0
+        gust = lull = -1
+        a = b = 0  # the two seconds before this one
+        for i in range(n):
+            c = buckets[((start + i) % slots) * stride]
+            pulses += c
+            hist[c if c < top else top] += 1
+            if i >= 2:
+                s = a + b + c
+                if s > gust:
+                    gust = s
+                if lull < 0 or s < lull:
+                    lull = s
+            a = b
+            b = c
+        self.seconds = n
+        self.pulses = pulses
+        if n < 3:
+            self.mean = self.gust = self.lull = None
+            self.p10 = self.p50 = self.p90 = None
+            return self
+        self.mean = pulses / n
+        self.gust = gust / 3
+        self.lull = lull / 3
+        self.p10 = self._percentile(n * 10)
+        self.p50 = self._percentile(n * 50)
+        self.p90 = self._percentile(n * 90)
+        return self
+
+    def _percentile(self, rank100):
+        # smallest count with at least rank100 / 100 of the seconds at or below
+        seen = 0
+        hist = self.hist
+        for count in range(len(hist)):
+            seen += hist[count] * 100
+            if seen >= rank100:
+                return count
+        return len(hist) - 1